@@ -0,0 +1,828 @@
+from dataclasses import dataclass
+
+import numpy as np
+import numpy.typing as npt
+from scipy.constants import Stefan_Boltzmann
+from scipy.sparse import csr_matrix, diags
+
+from base_classes import (
+    PIDHeater,
+    ProportionalHeater,
+    RelayHeater,
+    ThermalArchitecture,
+    ThermalComponent,
+    ThermalSwitch,
+    VariableConductanceLink,
+)
+
+
+def switching_fraction(
+    x: npt.NDArray[np.floating], smoothing: float = 0.0
+) -> npt.NDArray[np.floating] | npt.NDArray[np.bool_]:
+    """
+    Step function used for every on/off decision in the thermal ODE
+
+    Returns `x > 0` when `smoothing` is 0, otherwise a tanh ramp of width
+    `smoothing` (same units as `x`, usually K) going from 0 to 1. Smoothing
+    makes the RHS differentiable so implicit solvers can take large steps.
+    """
+    if smoothing == 0:
+        return x > 0
+
+    return 0.5 * (1 + np.tanh(x / smoothing))
+
+
+def switching_fraction_derivative(
+    x: npt.NDArray[np.floating], smoothing: float = 0.0
+) -> npt.NDArray[np.floating]:
+    """
+    Derivative of `switching_fraction` with respect to `x`, zero for hard switches
+    """
+    if smoothing == 0:
+        return np.zeros(np.shape(x))
+
+    return 0.5 / smoothing * (1 - np.tanh(x / smoothing) ** 2)
+
+
+def _switch_attenuation(self_temps, other_temps, cool_limit, heat_limit, smoothing):
+    # Same rule as `ThermalSwitch.get_conductance`
+    return switching_fraction(other_temps - self_temps, smoothing) * switching_fraction(
+        self_temps - heat_limit, smoothing
+    ) + switching_fraction(self_temps - other_temps, smoothing) * switching_fraction(
+        cool_limit - self_temps, smoothing
+    )
+
+
+def _switch_attenuation_derivatives(
+    self_temps, other_temps, cool_limit, heat_limit, smoothing
+):
+    # d(attenuation)/d(self temp), d(attenuation)/d(other temp)
+    difference = other_temps - self_temps
+    hot = switching_fraction(self_temps - heat_limit, smoothing)
+    cold = switching_fraction(cool_limit - self_temps, smoothing)
+    d_difference = switching_fraction_derivative(difference, smoothing)
+
+    d_other = d_difference * (hot - cold)
+    d_self = (
+        -d_other
+        + switching_fraction(difference, smoothing)
+        * switching_fraction_derivative(self_temps - heat_limit, smoothing)
+        - switching_fraction(-difference, smoothing)
+        * switching_fraction_derivative(cool_limit - self_temps, smoothing)
+    )
+
+    return d_self, d_other
+
+
+def _variable_fraction(hot_temps, ramp_start, ramp_width, ramp_floor):
+    # Same rule as `VariableConductanceLink.get_conductance`
+    return ramp_floor + (1 - ramp_floor) * np.clip(
+        (hot_temps - ramp_start) / ramp_width, 0, 1
+    )
+
+
+def _variable_fraction_derivative(hot_temps, ramp_start, ramp_width, ramp_floor):
+    # d(fraction)/d(hot temp), zero outside the ramp and for plain links
+    position = (hot_temps - ramp_start) / ramp_width
+    return np.where((position > 0) & (position < 1), (1 - ramp_floor) / ramp_width, 0.0)
+
+
+@dataclass
+class DenseLinks:
+    """
+    Dense N x N conductance network in array form
+
+    Entry [i, j] is the link as seen from component i, i.e. the conductance used
+    for the heat flowing from component j into component i. Plain `ThermalLink`s
+    have limits of -inf/+inf so they are never attenuated.
+
+    Variable conductance links scale their conductance by a fraction rising
+    from `ramp_floor` to 1 as the hotter end warms from `ramp_start` to
+    `ramp_start + ramp_width`; every other link has a `ramp_start` of -inf.
+    """
+
+    conductance: npt.NDArray[np.floating]  # W/K
+    attenuated_conductance: npt.NDArray[np.floating]  # W/K, conductance when switched off
+    cool_limit: npt.NDArray[np.floating]  # K
+    heat_limit: npt.NDArray[np.floating]  # K
+    ramp_start: npt.NDArray[np.floating]  # K
+    ramp_width: npt.NDArray[np.floating]  # K
+    ramp_floor: npt.NDArray[np.floating]  # fraction of the conductance below the ramp
+
+    def __post_init__(self):
+        self.variable = bool(np.isfinite(self.ramp_start).any())
+
+    @property
+    def num_nodes(self) -> int:
+        return self.conductance.shape[-1]
+
+    def attenuated(
+        self, temps: npt.NDArray[np.floating], smoothing: float = 0.0
+    ) -> npt.NDArray[np.floating] | npt.NDArray[np.bool_]:
+        """
+        Returns which links are switched off (self = row, other = column), as
+        fractions between 0 and 1 when `smoothing` is set
+        """
+        return _switch_attenuation(
+            temps[..., :, None],
+            temps[..., None, :],
+            self.cool_limit,
+            self.heat_limit,
+            smoothing,
+        )
+
+    def switched_conductances(
+        self,
+        temps: npt.NDArray[np.floating],
+        attenuated: npt.NDArray | None = None,
+        smoothing: float = 0.0,
+    ) -> npt.NDArray[np.floating]:
+        # Conductances after the thermal switches, before variable conductance
+        if attenuated is None:
+            attenuated = self.attenuated(temps, smoothing)
+
+        return self.conductance + (self.attenuated_conductance - self.conductance) * attenuated
+
+    def effective_conductances(
+        self,
+        temps: npt.NDArray[np.floating],
+        attenuated: npt.NDArray | None = None,
+        smoothing: float = 0.0,
+    ) -> npt.NDArray[np.floating]:
+        conductances = self.switched_conductances(temps, attenuated, smoothing)
+
+        if self.variable:
+            conductances = conductances * _variable_fraction(
+                np.maximum(temps[..., :, None], temps[..., None, :]),
+                self.ramp_start,
+                self.ramp_width,
+                self.ramp_floor,
+            )
+
+        return conductances
+
+    def conduction_fluxes(
+        self,
+        temps: npt.NDArray[np.floating],
+        attenuated: npt.NDArray | None = None,
+        smoothing: float = 0.0,
+    ) -> npt.NDArray[np.floating]:
+        """
+        Returns conduction power into each component, in W
+
+        Math
+        ----
+        Q_i = sum_j G_ij * (T_j - T_i)
+        """
+        conductances = self.effective_conductances(temps, attenuated, smoothing)
+
+        return (conductances @ temps[..., None])[..., 0] - conductances.sum(
+            axis=-1
+        ) * temps
+
+    def conduction_jacobian(
+        self,
+        temps: npt.NDArray[np.floating],
+        attenuated: npt.NDArray | None = None,
+        smoothing: float = 0.0,
+    ) -> npt.NDArray[np.floating]:
+        """
+        Returns dQ_i/dT_j of `conduction_fluxes`
+
+        Hard switches are piecewise constant; smoothed switches add the
+        derivative of the attenuation itself, variable conductance links the
+        derivative of their ramp with respect to the hotter end.
+
+        Math
+        ----
+        dQ_i/dT_j = G_ij (i != j), dQ_i/dT_i = -sum_j G_ij
+        """
+        conductances = self.effective_conductances(temps, attenuated, smoothing)
+        jacobian = conductances - np.diag(conductances.sum(axis=-1))
+
+        self_temps = temps[:, None]
+        other_temps = temps[None, :]
+        fraction = 1.0
+
+        if self.variable:
+            hot_temps = np.maximum(self_temps, other_temps)
+            ramp = (self.ramp_start, self.ramp_width, self.ramp_floor)
+            fraction = _variable_fraction(hot_temps, *ramp)
+
+            weight = (
+                self.switched_conductances(temps, attenuated, smoothing)
+                * _variable_fraction_derivative(hot_temps, *ramp)
+                * (other_temps - self_temps)
+            )
+            other_hotter = other_temps > self_temps
+            jacobian += weight * other_hotter + np.diag(
+                (weight * ~other_hotter).sum(axis=-1)
+            )
+
+        if smoothing > 0 and attenuated is None:
+            d_self, d_other = _switch_attenuation_derivatives(
+                self_temps, other_temps, self.cool_limit, self.heat_limit, smoothing
+            )
+            weight = (
+                (self.attenuated_conductance - self.conductance)
+                * fraction
+                * (other_temps - self_temps)
+            )
+            jacobian += weight * d_other + np.diag((weight * d_self).sum(axis=-1))
+
+        return jacobian
+
+
+@dataclass
+class SparseLinks:
+    """
+    Sparse conductance network stored as a directed edge list
+
+    Edge e carries heat from component `cols[e]` into component `rows[e]`, with
+    the switch parameters of that link as seen from `rows[e]`. A symmetric link
+    is therefore stored as two edges. Evaluation is O(edges). Variable
+    conductance ramps work as in `DenseLinks`.
+    """
+
+    num_nodes: int
+    rows: npt.NDArray[np.integer]  # receiving component
+    cols: npt.NDArray[np.integer]  # other component
+    conductance: npt.NDArray[np.floating]  # W/K
+    attenuated_conductance: npt.NDArray[np.floating]  # W/K, conductance when switched off
+    cool_limit: npt.NDArray[np.floating]  # K
+    heat_limit: npt.NDArray[np.floating]  # K
+    ramp_start: npt.NDArray[np.floating]  # K
+    ramp_width: npt.NDArray[np.floating]  # K
+    ramp_floor: npt.NDArray[np.floating]
+
+    def __post_init__(self):
+        self.variable = bool(np.isfinite(self.ramp_start).any())
+
+        # N x E matrix summing edge contributions into their receiving node
+        num_edges = len(self.rows)
+        self.scatter = csr_matrix(
+            (np.ones(num_edges), (self.rows, np.arange(num_edges))),
+            shape=(self.num_nodes, num_edges),
+        )
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.rows)
+
+    @classmethod
+    def from_edge_list(
+        cls,
+        num_nodes: int,
+        node_1: npt.ArrayLike,
+        node_2: npt.ArrayLike,
+        conductance: npt.ArrayLike,
+        cool_limit: npt.ArrayLike = -np.inf,
+        heat_limit: npt.ArrayLike = np.inf,
+        attenuation_factor: npt.ArrayLike = 1.0,
+    ) -> "SparseLinks":
+        """
+        Builds a symmetric network from undirected links, e.g. exported from a
+        CAD mesh. Each link is stored in both directions with the same switch
+        parameters, just like the symmetrized prefab conductivity matrix.
+        """
+        node_1 = np.asarray(node_1, dtype=np.intp)
+        node_2 = np.asarray(node_2, dtype=np.intp)
+        conductance, cool_limit, heat_limit, attenuation_factor = np.broadcast_arrays(
+            *(
+                np.asarray(value, dtype=float)
+                for value in (conductance, cool_limit, heat_limit, attenuation_factor)
+            ),
+            node_1,
+        )[:4]
+
+        def both_ways(values):
+            return np.concatenate((values, values))
+
+        num_edges = 2 * len(node_1)
+
+        return cls(
+            num_nodes=num_nodes,
+            rows=np.concatenate((node_1, node_2)),
+            cols=np.concatenate((node_2, node_1)),
+            conductance=both_ways(conductance),
+            attenuated_conductance=both_ways(conductance / attenuation_factor),
+            cool_limit=both_ways(cool_limit),
+            heat_limit=both_ways(heat_limit),
+            ramp_start=np.full(num_edges, -np.inf),
+            ramp_width=np.ones(num_edges),
+            ramp_floor=np.ones(num_edges),
+        )
+
+    @classmethod
+    def from_dense(cls, links: DenseLinks) -> "SparseLinks":
+        """
+        Keeps only the nonzero entries of a dense network
+        """
+        rows, cols = np.nonzero(links.conductance)
+
+        return cls(
+            num_nodes=links.num_nodes,
+            rows=rows,
+            cols=cols,
+            conductance=links.conductance[rows, cols],
+            attenuated_conductance=links.attenuated_conductance[rows, cols],
+            cool_limit=links.cool_limit[rows, cols],
+            heat_limit=links.heat_limit[rows, cols],
+            ramp_start=links.ramp_start[rows, cols],
+            ramp_width=links.ramp_width[rows, cols],
+            ramp_floor=links.ramp_floor[rows, cols],
+        )
+
+    def attenuated(
+        self, temps: npt.NDArray[np.floating], smoothing: float = 0.0
+    ) -> npt.NDArray[np.floating] | npt.NDArray[np.bool_]:
+        """
+        Returns which edges are switched off, as fractions between 0 and 1 when
+        `smoothing` is set
+        """
+        return _switch_attenuation(
+            temps[..., self.rows],
+            temps[..., self.cols],
+            self.cool_limit,
+            self.heat_limit,
+            smoothing,
+        )
+
+    def switched_conductances(
+        self,
+        temps: npt.NDArray[np.floating],
+        attenuated: npt.NDArray | None = None,
+        smoothing: float = 0.0,
+    ) -> npt.NDArray[np.floating]:
+        # Conductances after the thermal switches, before variable conductance
+        if attenuated is None:
+            attenuated = self.attenuated(temps, smoothing)
+
+        return self.conductance + (self.attenuated_conductance - self.conductance) * attenuated
+
+    def effective_conductances(
+        self,
+        temps: npt.NDArray[np.floating],
+        attenuated: npt.NDArray | None = None,
+        smoothing: float = 0.0,
+    ) -> npt.NDArray[np.floating]:
+        conductances = self.switched_conductances(temps, attenuated, smoothing)
+
+        if self.variable:
+            conductances = conductances * _variable_fraction(
+                np.maximum(temps[..., self.rows], temps[..., self.cols]),
+                self.ramp_start,
+                self.ramp_width,
+                self.ramp_floor,
+            )
+
+        return conductances
+
+    def conduction_fluxes(
+        self,
+        temps: npt.NDArray[np.floating],
+        attenuated: npt.NDArray | None = None,
+        smoothing: float = 0.0,
+    ) -> npt.NDArray[np.floating]:
+        """
+        Returns conduction power into each component, in W
+
+        Math
+        ----
+        Q_i = sum_(edges e into i) G_e * (T_cols[e] - T_i)
+        """
+        edge_fluxes = self.effective_conductances(temps, attenuated, smoothing) * (
+            temps[..., self.cols] - temps[..., self.rows]
+        )
+
+        return (self.scatter @ edge_fluxes.T).T
+
+    def conduction_jacobian(
+        self,
+        temps: npt.NDArray[np.floating],
+        attenuated: npt.NDArray | None = None,
+        smoothing: float = 0.0,
+    ) -> csr_matrix:
+        """
+        Returns dQ_i/dT_j of `conduction_fluxes` as a sparse matrix
+        """
+        conductances = self.effective_conductances(temps, attenuated, smoothing)
+        off_diagonal = conductances
+        diagonal = -(self.scatter @ conductances)
+
+        self_temps = temps[self.rows]
+        other_temps = temps[self.cols]
+        fraction = 1.0
+
+        if self.variable:
+            hot_temps = np.maximum(self_temps, other_temps)
+            ramp = (self.ramp_start, self.ramp_width, self.ramp_floor)
+            fraction = _variable_fraction(hot_temps, *ramp)
+
+            weight = (
+                self.switched_conductances(temps, attenuated, smoothing)
+                * _variable_fraction_derivative(hot_temps, *ramp)
+                * (other_temps - self_temps)
+            )
+            other_hotter = other_temps > self_temps
+            off_diagonal = off_diagonal + weight * other_hotter
+            diagonal += self.scatter @ (weight * ~other_hotter)
+
+        if smoothing > 0 and attenuated is None:
+            d_self, d_other = _switch_attenuation_derivatives(
+                self_temps, other_temps, self.cool_limit, self.heat_limit, smoothing
+            )
+            weight = (
+                (self.attenuated_conductance - self.conductance)
+                * fraction
+                * (other_temps - self_temps)
+            )
+            off_diagonal = off_diagonal + weight * d_other
+            diagonal += self.scatter @ (weight * d_self)
+
+        return csr_matrix(
+            (off_diagonal, (self.rows, self.cols)),
+            shape=(self.num_nodes, self.num_nodes),
+        ) + diags(diagonal)
+
+
+@dataclass
+class SwitchingModes:
+    """
+    Frozen discrete state of every on/off element in the thermal ODE
+
+    Used by the event-driven integrator, which holds the modes constant between
+    switching events so the RHS is smooth within each integration segment.
+    """
+
+    heater_on: npt.NDArray[np.bool_]  # (N,)
+    louver_closed: npt.NDArray[np.bool_]  # (N,)
+    attenuated: npt.NDArray[np.bool_]  # same shape as the links' conductance array
+
+
+@dataclass
+class HeaterControls:
+    """
+    Heaters with a control law in array form, see `control`
+
+    Heater h belongs to component `components[h]`; every other heater is an
+    ideal thermostat, on below its set temperature. Relays are `RelayHeater`s,
+    the rest PID laws (a `ProportionalHeater` is one without integral and
+    derivative action). Internal controller states are carried in the ODE
+    state after the component temperatures, at the indices `output_state`
+    (relay output), `integral_state` (integral of the error) and `filter_state`
+    (filtered temperature for the derivative), -1 when a law has no such state.
+    """
+
+    components: npt.NDArray[np.integer]  # (H,)
+    relay: npt.NDArray[np.bool_]  # (H,)
+    deadband: npt.NDArray[np.floating]  # K, relays switch on at set temp - deadband
+    lag: npt.NDArray[np.floating]  # s, relay output time constant
+    gain: npt.NDArray[np.floating]  # 1/K
+    integral_gain: npt.NDArray[np.floating]  # 1/(K s)
+    derivative_gain: npt.NDArray[np.floating]  # s/K
+    filter_time: npt.NDArray[np.floating]  # s
+    output_state: npt.NDArray[np.integer]
+    integral_state: npt.NDArray[np.integer]
+    filter_state: npt.NDArray[np.integer]
+    num_states: int
+
+    @property
+    def proportional(self) -> npt.NDArray[np.bool_]:
+        # Laws without integral action, which settle below their set point
+        # instead of on it
+        return ~self.relay & (self.integral_state < 0)
+
+
+@dataclass
+class ArrayArchitecture:
+    """
+    Compiled "array form" of a `ThermalArchitecture`
+
+    Every per-component property is a flat vector indexed like
+    `ThermalArchitecture.components`, so the thermal ODE can be evaluated with a
+    handful of vectorized expressions instead of per-component Python loops.
+    Case flags which only affect the ODE (electric heaters, louvers) are baked in.
+    """
+
+    initial_temps: npt.NDArray[np.floating]  # K
+    thermal_inertia: npt.NDArray[np.floating]  # J/K
+    rad_area: npt.NDArray[np.floating]  # m^2
+    emissivity: npt.NDArray[np.floating]
+    illumination_factor: npt.NDArray[np.floating]
+    innate_power: npt.NDArray[np.floating]  # W
+    heater_power: npt.NDArray[np.floating]  # W, zero when electric heaters are disabled
+    heater_set_temp: npt.NDArray[np.floating]  # K
+    louver_attenuation: npt.NDArray[np.floating]  # 1 when louvers are disabled
+    active_power: npt.NDArray[np.floating]  # W, row sums of the active transport matrix
+    links: DenseLinks | SparseLinks
+    # F_ij between components and the exchange matrix built from it, W/K^4,
+    # sigma * A_i * script-F_ij with minus the row sums on the diagonal, so the
+    # exchange into each component is radiative_exchange @ T^4; None without
+    # view factors
+    view_factors: npt.NDArray[np.floating] | None = None
+    radiative_exchange: npt.NDArray[np.floating] | csr_matrix | None = None
+    controls: HeaterControls | None = None
+    switch_smoothing: float = 0.0  # K, width of the heater/louver/switch ramps, 0 = hard
+
+    @property
+    def num_components(self) -> int:
+        return self.thermal_inertia.shape[-1]
+
+    @property
+    def num_states(self) -> int:
+        # Component temperatures followed by the controller states
+        if self.controls is None:
+            return self.num_components
+
+        return self.num_components + self.controls.num_states
+
+
+def compile_links(
+    conductivity_matrix, sparse: bool = False
+) -> DenseLinks | SparseLinks:
+    """
+    Converts an N x N list of lists of `ThermalLink`s into a `DenseLinks`, or
+    a `SparseLinks` when `sparse` is set
+
+    Already compiled networks are passed through (converted to sparse if
+    requested), which lets large nodal models skip the list of lists entirely.
+    """
+    if isinstance(conductivity_matrix, SparseLinks):
+        return conductivity_matrix
+
+    if isinstance(conductivity_matrix, DenseLinks):
+        return (
+            SparseLinks.from_dense(conductivity_matrix)
+            if sparse
+            else conductivity_matrix
+        )
+
+    num_nodes = len(conductivity_matrix)
+
+    conductance = np.zeros((num_nodes, num_nodes))
+    attenuated_conductance = np.zeros((num_nodes, num_nodes))
+    cool_limit = np.full((num_nodes, num_nodes), -np.inf)
+    heat_limit = np.full((num_nodes, num_nodes), np.inf)
+    ramp_start = np.full((num_nodes, num_nodes), -np.inf)
+    ramp_width = np.ones((num_nodes, num_nodes))
+    ramp_floor = np.ones((num_nodes, num_nodes))
+
+    for i, row in enumerate(conductivity_matrix):
+        for j, link in enumerate(row):
+            conductance[i, j] = link.conductance
+            attenuated_conductance[i, j] = link.conductance
+
+            if isinstance(link, ThermalSwitch):
+                attenuated_conductance[i, j] = (
+                    link.conductance / link.attenuation_factor
+                )
+                cool_limit[i, j] = link.cool_limit
+                heat_limit[i, j] = link.heat_limit
+
+            if isinstance(link, VariableConductanceLink) and link.conductance:
+                ramp_start[i, j] = link.low_temp
+                ramp_width[i, j] = link.high_temp - link.low_temp
+                ramp_floor[i, j] = link.min_conductance / link.conductance
+
+    links = DenseLinks(
+        conductance=conductance,
+        attenuated_conductance=attenuated_conductance,
+        cool_limit=cool_limit,
+        heat_limit=heat_limit,
+        ramp_start=ramp_start,
+        ramp_width=ramp_width,
+        ramp_floor=ramp_floor,
+    )
+
+    return SparseLinks.from_dense(links) if sparse else links
+
+
+def gray_body_exchange_areas(
+    areas: npt.NDArray[np.floating],
+    emissivities: npt.NDArray[np.floating],
+    view_factors: npt.NDArray[np.floating],
+) -> npt.NDArray[np.floating]:
+    """
+    Returns the gray-body exchange areas A_i * script-F_ij (m^2) of diffuse gray
+    surfaces, including every path reflecting off the other components;
+    radiation escaping to space doesn't come back
+
+    Components without radiative area take no part. Leading axes of `areas`
+    and `emissivities` are batch axes.
+
+    Math
+    ----
+    Gebhart factors: B = (I - F @ diag(1 - eps))^-1 @ F @ diag(eps)
+    A_i * script-F_ij = A_i * eps_i * B_ij, symmetric by reciprocity
+    """
+    radiating = (areas > 0).astype(float)
+    view_factors = (
+        np.asarray(view_factors, dtype=float)
+        * radiating[..., :, None]
+        * radiating[..., None, :]
+    )
+
+    gebhart = np.linalg.solve(
+        np.eye(areas.shape[-1]) - view_factors * (1 - emissivities)[..., None, :],
+        view_factors * emissivities[..., None, :],
+    )
+    exchange_areas = (areas * emissivities)[..., :, None] * gebhart
+
+    # Reciprocity only holds up to the rounding of the view factors
+    return (exchange_areas + exchange_areas.swapaxes(-1, -2)) / 2
+
+
+def radiative_exchange_matrix(
+    areas: npt.NDArray[np.floating],
+    emissivities: npt.NDArray[np.floating],
+    view_factors: npt.NDArray[np.floating],
+) -> npt.NDArray[np.floating]:
+    """
+    Returns the dense `ArrayArchitecture.radiative_exchange` matrix, in W/K^4
+    """
+    exchange = Stefan_Boltzmann * gray_body_exchange_areas(
+        areas, emissivities, view_factors
+    )
+    diagonal = np.arange(exchange.shape[-1])
+    exchange[..., diagonal, diagonal] -= exchange.sum(axis=-1)
+
+    return exchange
+
+
+def compile_radiative_exchange(
+    spacecraft: ThermalArchitecture, sparse: bool = False
+) -> npt.NDArray[np.floating] | csr_matrix | None:
+    """
+    Builds `ArrayArchitecture.radiative_exchange` from the spacecraft's view
+    factors and its components' areas and emissivities
+    """
+    if spacecraft.view_factors is None:
+        return None
+
+    components = spacecraft.components
+    exchange = radiative_exchange_matrix(
+        np.array([c.rad_area for c in components], dtype=float),
+        np.array([c.emissivity for c in components], dtype=float),
+        spacecraft.view_factors,
+    )
+
+    return csr_matrix(exchange) if sparse else exchange
+
+
+def compile_controls(
+    components: list[ThermalComponent], heater_power: npt.NDArray[np.floating]
+) -> HeaterControls | None:
+    """
+    Collects the powered heaters with a control law (`RelayHeater`,
+    `ProportionalHeater`, `PIDHeater`) and numbers their internal states, None
+    when every heater is an ideal thermostat
+    """
+    laws = [
+        (i, component.heater)
+        for i, component in enumerate(components)
+        if heater_power[i] != 0
+        and isinstance(component.heater, (RelayHeater, ProportionalHeater, PIDHeater))
+    ]
+    if not laws:
+        return None
+
+    num_laws = len(laws)
+    relay = np.zeros(num_laws, dtype=bool)
+    deadband, gain, integral_gain, derivative_gain = np.zeros((4, num_laws))
+    lag, filter_time = np.ones((2, num_laws))
+    output_state, integral_state, filter_state = np.full((3, num_laws), -1)
+    num_states = 0
+
+    def new_state():
+        nonlocal num_states
+        num_states += 1
+        return num_states - 1
+
+    for h, (_, heater) in enumerate(laws):
+        if isinstance(heater, RelayHeater):
+            if heater.lag <= 0:
+                raise ValueError("relay heaters need a positive lag")
+
+            relay[h] = True
+            deadband[h] = heater.deadband
+            lag[h] = heater.lag
+            output_state[h] = new_state()
+
+        elif isinstance(heater, ProportionalHeater):
+            gain[h] = 1 / heater.band
+
+        else:
+            gain[h] = heater.gain
+
+            if np.isfinite(heater.integral_time):
+                integral_gain[h] = heater.gain / heater.integral_time
+                integral_state[h] = new_state()
+
+            if heater.derivative_time > 0:
+                derivative_gain[h] = heater.gain * heater.derivative_time
+                filter_time[h] = heater.filter_time
+                filter_state[h] = new_state()
+
+    return HeaterControls(
+        components=np.array([i for i, _ in laws], dtype=np.intp),
+        relay=relay,
+        deadband=deadband,
+        lag=lag,
+        gain=gain,
+        integral_gain=integral_gain,
+        derivative_gain=derivative_gain,
+        filter_time=filter_time,
+        output_state=output_state,
+        integral_state=integral_state,
+        filter_state=filter_state,
+        num_states=num_states,
+    )
+
+
+# `ArrayArchitecture` fields set by the case flags and the components' sizing,
+# while the links, thermal inertias and set temperatures make up the topology
+CASE_PARAMETERS = (
+    "rad_area",
+    "emissivity",
+    "innate_power",
+    "heater_power",
+    "louver_attenuation",
+    "active_power",
+)
+
+
+def compile_case_parameters(
+    spacecraft: ThermalArchitecture, case_flags: dict
+) -> dict[str, npt.NDArray[np.floating]]:
+    """
+    Compiles the `CASE_PARAMETERS` of a spacecraft, (N,) arrays by name
+    """
+    components = spacecraft.components
+    heaters_enabled = case_flags["electric_heaters"]
+
+    return {
+        "rad_area": np.array([c.rad_area for c in components], dtype=float),
+        "emissivity": np.array([c.emissivity for c in components], dtype=float),
+        "innate_power": np.array([c.innate_power for c in components], dtype=float),
+        "heater_power": np.array(
+            [c.heater.power if heaters_enabled else 0 for c in components],
+            dtype=float,
+        ),
+        "louver_attenuation": np.full(
+            len(components), 10.0 if case_flags["louvers"] else 1.0
+        ),
+        # works for both dense arrays and scipy.sparse matrices
+        "active_power": np.asarray(
+            spacecraft.active_transport_matrix.sum(axis=1), dtype=float
+        ).ravel(),
+    }
+
+
+def compile_architecture(
+    spacecraft: ThermalArchitecture,
+    case_flags: dict,
+    sparse: bool = False,
+    switch_smoothing: float = 0.0,
+) -> ArrayArchitecture:
+    """
+    Compiles a spacecraft thermal architecture into array form
+
+    Parameters
+    ----------
+    spacecraft: ThermalArchitecture
+        spacecraft thermal architecture
+    case_flags: dict
+        dictionary of case flags
+    sparse: bool
+        store the conductance network as a `SparseLinks` edge list
+    switch_smoothing: float
+        width (K) of the tanh ramps replacing the hard heater, louver and
+        switch thresholds, 0 keeps them exact
+
+    Returns
+    -------
+    ArrayArchitecture
+        the spacecraft thermal architecture as flat NumPy arrays
+    """
+    components = spacecraft.components
+    parameters = compile_case_parameters(spacecraft, case_flags)
+
+    return ArrayArchitecture(
+        initial_temps=spacecraft.to_state().astype(float),
+        thermal_inertia=spacecraft.component_thermal_inertias.astype(float),
+        illumination_factor=np.array(
+            [c.illumination_factor for c in components], dtype=float
+        ),
+        heater_set_temp=np.array([c.heater.set_temp for c in components], dtype=float),
+        **parameters,
+        links=compile_links(spacecraft.conductivity_matrix, sparse),
+        view_factors=(
+            None
+            if spacecraft.view_factors is None
+            else np.asarray(spacecraft.view_factors, dtype=float)
+        ),
+        radiative_exchange=compile_radiative_exchange(spacecraft, sparse),
+        controls=compile_controls(components, parameters["heater_power"]),
+        switch_smoothing=switch_smoothing,
+    )
@@ -37,12 +37,72 @@ class ThermalSwitch(ThermalLink):
             return self.conductance
 
 
+@dataclass
+class VariableConductanceLink(ThermalLink):
+    min_conductance: float  # W/K, below low_temp
+    low_temp: float  # K
+    high_temp: float  # K, full conductance above this
+
+    def get_conductance(self, self_temp, other_temp):
+        """
+        Gets conductance as a result of self temperature and other temperature
+
+        Rises linearly with the temperature of the hotter end, like a variable
+        conductance heat pipe opening up as its evaporator heats up. Both ends
+        see the same conductance.
+        """
+        fraction = np.clip(
+            (max(self_temp, other_temp) - self.low_temp)
+            / (self.high_temp - self.low_temp),
+            0,
+            1,
+        )
+
+        return self.min_conductance + fraction * (
+            self.conductance - self.min_conductance
+        )
+
+
 @dataclass
 class Heater:
     power: float  # W
     set_temp: float  # K, heater turns off above this temperature
 
 
+@dataclass
+class RelayHeater(Heater):
+    """
+    Thermostat with hysteresis: switches on below set_temp - deadband, off above
+    set_temp, and its output follows with a first-order lag
+    """
+
+    deadband: float  # K
+    lag: float  # s, time constant of the heater output
+
+
+@dataclass
+class ProportionalHeater(Heater):
+    """
+    Full power at set_temp - band, falling linearly to off at set_temp
+    """
+
+    band: float  # K
+
+
+@dataclass
+class PIDHeater(Heater):
+    """
+    PID law on the error set_temp - temp, output clipped to [0, 1] of full
+    power; the derivative acts on the measured temperature through a
+    first-order filter
+    """
+
+    gain: float  # 1/K, fraction of full power per K of error
+    integral_time: float = np.inf  # s
+    derivative_time: float = 0.0  # s
+    filter_time: float = 10.0  # s, derivative filter time constant
+
+
 @dataclass
 class ThermalComponent:
     mass: float  # mass [kg]
@@ -56,6 +116,8 @@ class ThermalComponent:
 
     heater: Heater  # electric heater used to keep the device warm
 
+    name: str = ""  # label used in plots and stored results
+
     @property
     def thermal_inertia(self) -> float:
         return self.mass * self.shc
@@ -66,6 +128,9 @@ class ThermalArchitecture:
     components: list[ThermalComponent]
     conductivity_matrix: npt.NDArray[np.floating]
     active_transport_matrix: npt.NDArray[np.floating]
+    # F_ij, fraction of component i's radiative area that sees component j; the
+    # rest sees space. None = no component <-> component radiation.
+    view_factors: npt.NDArray[np.floating] | None = None
 
     def to_state(self) -> npt.NDArray[np.floating]:
         # Turns the spacecraft thermal architecture into a state form
@@ -81,9 +146,56 @@ class ThermalArchitecture:
     def component_thermal_inertias(self) -> npt.NDArray[np.floating]:
         return np.array([component.thermal_inertia for component in self.components])
 
+    @property
+    def script_f(self) -> npt.NDArray[np.floating] | None:
+        """
+        Gray-body exchange factors between the components, see
+        `array_architecture.gray_body_exchange_areas`
+        """
+        from array_architecture import gray_body_exchange_areas
+
+        if self.view_factors is None:
+            return None
+
+        areas = np.array([component.rad_area for component in self.components])
+        exchange_areas = gray_body_exchange_areas(
+            areas,
+            np.array([component.emissivity for component in self.components]),
+            self.view_factors,
+        )
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.nan_to_num(exchange_areas / areas[:, None])
+
+    def steady_state(
+        self, case_flags: dict, environment: "EnvironmentalConditions", **kwargs
+    ):
+        """
+        Solves for the equilibrium temperatures and power terms in the given
+        environment, see `steady_state.solve_steady_state` for the options
+        """
+        from array_architecture import compile_architecture
+        from steady_state import solve_steady_state
+
+        arrays = compile_architecture(self, case_flags)
+        return solve_steady_state(arrays, environment, **kwargs)
+
 
 @dataclass
 class EnvironmentalConditions:
     name: str
     incident_radiative_flux: float  # W/m^2
     background_temp: float  # K, usually the temperature of space, 2.7 K
+
+    def absorbed_flux(self, t, illumination_factor):
+        """
+        Returns the radiative flux reaching each component at time(s) t, per
+        unit of its radiative area, in W/m^2 (before emissivity)
+        """
+        return self.incident_radiative_flux * illumination_factor
+
+    def peak_absorbed_flux(self, illumination_factor):
+        """
+        Returns the largest `absorbed_flux` each component ever sees, in W/m^2
+        """
+        return self.absorbed_flux(0.0, illumination_factor)
@@ -0,0 +1,348 @@
+import argparse
+import json
+import math
+import os
+import platform
+import tempfile
+import time
+from datetime import datetime, timezone
+from itertools import cycle, islice
+from pathlib import Path
+
+import numpy as np
+import scipy
+from scipy import sparse
+
+from array_architecture import SparseLinks, compile_architecture
+from base_classes import EnvironmentalConditions, ThermalArchitecture
+from case_flags import FINAL_DESIGN_ELEC_ON, NOMINAL_CASES
+from compiled_ode import JIT_AVAILABLE, CompiledODE
+from component_prefabs import get_components
+from environmental_prefabs import EARTH, ENCELADUS, VENUS
+from odes import thermal_jacobian, thermal_ode, thermal_ode_vectorized
+from simulator import run_sim
+from solver import SolverSettings, compile_for, integrate, solution_stats
+from spacecraft_prefabs import get_srs
+from store import ResultStore
+from sweep import run_tasks
+
+# Node counts of the synthetic models in `node_scaling`
+NODE_COUNTS = (8, 64, 512, 5000)
+# Number of cases per sweep in `sweep_scaling`
+SWEEP_SIZES = (1, 4, 16)
+
+
+def calls_per_second(function, *args, min_time: float = 1.0) -> float:
+    """
+    Calls `function(*args)` repeatedly for at least `min_time` seconds and
+    returns the number of calls per second
+    """
+    function(*args)  # warm up, e.g. numba compilation
+
+    calls = 0
+    start = time.perf_counter()
+    while (elapsed := time.perf_counter() - start) < min_time:
+        function(*args)
+        calls += 1
+
+    return calls / elapsed
+
+
+def rhs_throughput(
+    spacecraft: ThermalArchitecture,
+    environment: EnvironmentalConditions,
+    case_flags: dict,
+    min_time: float = 1.0,
+) -> dict[str, float]:
+    """
+    Returns RHS (and Jacobian) calls per second of the reference `thermal_ode`,
+    `thermal_ode_vectorized` and, when numba is installed, `CompiledODE`
+    """
+    arrays = compile_architecture(spacecraft, case_flags)
+    temps = arrays.initial_temps
+    y = np.concatenate((temps, np.zeros(4)))
+
+    results = {
+        "thermal_ode": calls_per_second(
+            thermal_ode, 0.0, y, spacecraft, environment, case_flags, min_time=min_time
+        ),
+        "thermal_ode_vectorized": calls_per_second(
+            thermal_ode_vectorized, 0.0, temps, arrays, environment, min_time=min_time
+        ),
+        "thermal_jacobian": calls_per_second(
+            thermal_jacobian, 0.0, temps, arrays, environment, min_time=min_time
+        ),
+    }
+
+    if JIT_AVAILABLE:
+        compiled = CompiledODE(arrays, environment)
+        results["compiled_rhs"] = calls_per_second(
+            compiled.rhs, 0.0, temps, min_time=min_time
+        )
+        results["compiled_jacobian"] = calls_per_second(
+            compiled.jacobian, 0.0, temps, min_time=min_time
+        )
+
+    return results
+
+
+def synthetic_architecture(
+    num_nodes: int, case_flags: dict, links_per_node: int = 3, seed: int = 0
+) -> ThermalArchitecture:
+    """
+    Returns a nodal model of `num_nodes` components, copies of the sample
+    return spacecraft's components, joined in a ring plus random cross links
+    to nodes at most about sqrt(num_nodes) away, so the network is banded like
+    a meshed structure rather than a random graph
+
+    A tenth of the links are thermal switches. The network is a `SparseLinks`
+    so it can be compiled at any size.
+    """
+    rng = np.random.default_rng(seed)
+
+    components = list(
+        islice(
+            (
+                component
+                for _ in range(-(-num_nodes // 8))
+                for component in get_components(case_flags)
+            ),
+            num_nodes,
+        )
+    )
+
+    ring = np.arange(num_nodes)
+    num_cross_links = max(links_per_node - 1, 0) * num_nodes // 2
+    cross_1 = rng.integers(num_nodes, size=num_cross_links)
+    offsets = rng.integers(2, max(math.isqrt(num_nodes), 2) + 1, num_cross_links)
+    node_1 = np.concatenate((ring, cross_1))
+    node_2 = np.concatenate(((ring + 1) % num_nodes, (cross_1 + offsets) % num_nodes))
+    keep = node_1 != node_2
+    node_1, node_2 = node_1[keep], node_2[keep]
+
+    switched = rng.random(len(node_1)) < 0.1
+    links = SparseLinks.from_edge_list(
+        num_nodes,
+        node_1,
+        node_2,
+        conductance=rng.uniform(1, 30, len(node_1)),
+        cool_limit=np.where(switched, 250.0, -np.inf),
+        heat_limit=np.where(switched, 330.0, np.inf),
+        attenuation_factor=np.where(switched, 100.0, 1.0),
+    )
+
+    return ThermalArchitecture(
+        components,
+        conductivity_matrix=links,
+        active_transport_matrix=sparse.csr_matrix((num_nodes, num_nodes)),
+    )
+
+
+def node_scaling(
+    node_counts=NODE_COUNTS,
+    environment: EnvironmentalConditions = VENUS,
+    settings: SolverSettings | None = None,
+    min_time: float = 1.0,
+) -> list[dict]:
+    """
+    Times the vectorized RHS and Jacobian and a full integration of synthetic
+    models of increasing size
+
+    The default settings integrate with BDF and the sparse analytic Jacobian.
+    """
+    if settings is None:
+        settings = SolverSettings(method="BDF", t_end=1e5, sparse=True)
+
+    results = []
+    for num_nodes in node_counts:
+        spacecraft = synthetic_architecture(num_nodes, FINAL_DESIGN_ELEC_ON)
+        arrays = compile_for(spacecraft, FINAL_DESIGN_ELEC_ON, settings)
+        temps = arrays.initial_temps
+
+        start = time.perf_counter()
+        sol = integrate(arrays, environment, settings)
+        solve_time = time.perf_counter() - start
+
+        results.append(
+            {
+                "num_nodes": num_nodes,
+                "num_edges": arrays.links.num_edges,
+                "rhs_calls_per_second": calls_per_second(
+                    thermal_ode_vectorized,
+                    0.0,
+                    temps,
+                    arrays,
+                    environment,
+                    min_time=min_time,
+                ),
+                "jacobian_calls_per_second": calls_per_second(
+                    thermal_jacobian, 0.0, temps, arrays, environment, min_time=min_time
+                ),
+                "solve_time": solve_time,
+                "success": bool(sol.success),
+                "stats": solution_stats(sol, settings),
+            }
+        )
+
+    return results
+
+
+def run_sim_times(
+    environments: list[EnvironmentalConditions],
+    cases: dict[str, dict],
+    settings: SolverSettings | None = None,
+) -> list[dict]:
+    """
+    Times `run_sim` (solve and store, no figures or result cache) for every
+    environment x case combination
+
+    The stored results go to a temporary directory, so nothing under outputs/
+    is touched.
+    """
+    if settings is None:
+        settings = SolverSettings()
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        store = ResultStore(directory)
+
+        for environment in environments:
+            for case_name, case_flags in cases.items():
+                start = time.perf_counter()
+                result = run_sim(
+                    get_srs(case_flags),
+                    case_flags,
+                    case_name,
+                    environment,
+                    settings=settings,
+                    store=store,
+                    render=False,
+                )
+                results.append(
+                    {
+                        "environment": environment.name,
+                        "case": case_name,
+                        "wall_time": time.perf_counter() - start,
+                        "solve_time": result.solve_time,
+                        "success": result.success,
+                        "stats": result.stats,
+                    }
+                )
+
+    return results
+
+
+def sweep_scaling(
+    sweep_sizes=SWEEP_SIZES,
+    environment: EnvironmentalConditions = VENUS,
+    cases: dict[str, dict] = NOMINAL_CASES,
+    settings: SolverSettings | None = None,
+    max_workers: int | None = None,
+) -> list[dict]:
+    """
+    Times the sweep's process pool (`sweep.run_tasks`) over increasing numbers
+    of cases, cycling through `cases` without a result cache or the grouping
+    of `run_sweep`, so every repeat is solved
+
+    The default settings integrate with BDF, which keeps the sweeps short
+    enough for the process pool overhead to show.
+    """
+    if settings is None:
+        settings = SolverSettings(method="BDF")
+
+    results = []
+    for sweep_size in sweep_sizes:
+        tasks = [
+            (case_flags, f"{case_name} #{i}", environment, settings)
+            for i, (case_name, case_flags) in enumerate(
+                islice(cycle(cases.items()), sweep_size)
+            )
+        ]
+
+        start = time.perf_counter()
+        sweep_results = list(run_tasks(tasks, max_workers))
+        results.append(
+            {
+                "num_cases": sweep_size,
+                "max_workers": max_workers or os.cpu_count() or 1,
+                "wall_time": time.perf_counter() - start,
+                "solve_time": sum(result.solve_time for result in sweep_results),
+                "nfev": sum(result.stats.get("nfev", 0) for result in sweep_results),
+            }
+        )
+
+    return results
+
+
+def run_benchmarks(
+    node_counts=NODE_COUNTS,
+    sweep_sizes=SWEEP_SIZES,
+    environments: list[EnvironmentalConditions] | None = None,
+    cases: dict[str, dict] = NOMINAL_CASES,
+    min_time: float = 1.0,
+    max_workers: int | None = None,
+) -> dict:
+    """
+    Runs every benchmark and returns the results with a description of the
+    machine and library versions they were measured with
+    """
+    if environments is None:
+        environments = [ENCELADUS, VENUS, EARTH]
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "cpu_count": os.cpu_count(),
+            "numpy": np.__version__,
+            "scipy": scipy.__version__,
+            "numba": JIT_AVAILABLE,
+        },
+        "rhs_throughput": rhs_throughput(
+            get_srs(FINAL_DESIGN_ELEC_ON), VENUS, FINAL_DESIGN_ELEC_ON, min_time
+        ),
+        "run_sim": run_sim_times(environments, cases),
+        "node_scaling": node_scaling(node_counts, min_time=min_time),
+        "sweep_scaling": sweep_scaling(sweep_sizes, max_workers=max_workers),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks the solver pipeline")
+    parser.add_argument(
+        "--output", default="outputs/benchmarks.json", help="JSON results file"
+    )
+    parser.add_argument("--nodes", type=int, nargs="+", default=NODE_COUNTS)
+    parser.add_argument("--sweep-sizes", type=int, nargs="+", default=SWEEP_SIZES)
+    parser.add_argument("--min-time", type=float, default=1.0)
+    parser.add_argument("--max-workers", type=int, default=None)
+    args = parser.parse_args()
+
+    results = run_benchmarks(
+        args.nodes,
+        args.sweep_sizes,
+        min_time=args.min_time,
+        max_workers=args.max_workers,
+    )
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+
+    for name, rate in results["rhs_throughput"].items():
+        print(f"{name}: {rate:,.0f} calls/s")
+    for run in results["run_sim"]:
+        print(
+            f"run_sim {run['environment']} - {run['case']}: {run['wall_time']:.2f} s"
+            f" ({run['stats']})"
+        )
+    for run in results["node_scaling"]:
+        print(
+            f"{run['num_nodes']} nodes: {run['rhs_calls_per_second']:,.0f} RHS/s,"
+            f" solve {run['solve_time']:.2f} s ({run['stats']})"
+        )
+    for run in results["sweep_scaling"]:
+        print(f"sweep of {run['num_cases']}: {run['wall_time']:.2f} s")
+    print(f"Results written to {output}")
@@ -0,0 +1,254 @@
+import dataclasses
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import numpy.typing as npt
+from scipy import sparse
+
+from array_architecture import ArrayArchitecture
+from base_classes import EnvironmentalConditions
+from solver import SolverSettings
+
+# Modules whose source decides the numbers a solve produces, hashed into every
+# cache key so editing them invalidates old entries
+CODE_MODULES = (
+    "array_architecture.py",
+    "base_classes.py",
+    "compiled_ode.py",
+    "control.py",
+    "energy.py",
+    "equilibrium.py",
+    "events.py",
+    "heat_transfer.py",
+    "odes.py",
+    "orbit.py",
+    "sampling.py",
+    "solver.py",
+)
+
+# Bumped when the layout of a cache entry changes
+CACHE_FORMAT = 3
+
+
+def code_version() -> str:
+    """
+    Returns a hash of the source of `CODE_MODULES`
+    """
+    digest = hashlib.sha256()
+    root = Path(__file__).parent
+
+    for module in CODE_MODULES:
+        digest.update(module.encode())
+        digest.update((root / module).read_bytes())
+
+    return digest.hexdigest()
+
+
+def _update(digest, value):
+    # Feeds a canonical, type-tagged encoding of a value into the hash
+    if dataclasses.is_dataclass(value):
+        digest.update(f"<{type(value).__name__}>".encode())
+        for field in dataclasses.fields(value):
+            digest.update(field.name.encode())
+            _update(digest, getattr(value, field.name))
+
+    elif isinstance(value, (np.ndarray, np.generic)):
+        array = np.ascontiguousarray(value)
+        digest.update(f"<{array.dtype.str}{array.shape}>".encode())
+        digest.update(array.tobytes())
+
+    elif sparse.issparse(value):
+        _update(digest, value.toarray())
+
+    elif isinstance(value, dict):
+        digest.update(b"<dict>")
+        for key in sorted(value):
+            digest.update(str(key).encode())
+            _update(digest, value[key])
+
+    elif isinstance(value, (list, tuple)):
+        digest.update(f"<{type(value).__name__}{len(value)}>".encode())
+        for item in value:
+            _update(digest, item)
+
+    else:
+        digest.update(f"<{type(value).__name__}>{value!r}".encode())
+
+
+def result_key(
+    arrays: ArrayArchitecture,
+    environment: EnvironmentalConditions,
+    settings: SolverSettings,
+    version: str | None = None,
+) -> str:
+    """
+    Returns the content hash identifying a solve
+
+    Covers every compiled component parameter and the link matrix, the
+    environment apart from its name, the solver settings and the code version,
+    so two cases with the same physics share a key whatever they are called.
+    """
+    digest = hashlib.sha256(f"thermal-result-v{CACHE_FORMAT}".encode())
+
+    _update(digest, arrays)
+    _update(digest, dataclasses.replace(environment, name=""))
+    _update(digest, settings)
+    digest.update((code_version() if version is None else version).encode())
+
+    return digest.hexdigest()
+
+
+def architecture_key(arrays: ArrayArchitecture) -> str:
+    """
+    Returns the content hash of a compiled architecture alone, shared by every
+    set of case flags that builds the same physics
+    """
+    digest = hashlib.sha256(f"thermal-architecture-v{CACHE_FORMAT}".encode())
+    _update(digest, arrays)
+
+    return digest.hexdigest()
+
+
+@dataclasses.dataclass
+class CachedSolution:
+    t: npt.NDArray[np.floating]  # s
+    y: npt.NDArray[np.floating]  # K, component temperatures
+    energy: npt.NDArray[np.floating]  # J, cumulative energy of each heat flow term
+    success: bool
+    message: str
+    solve_time: float  # s, wall clock of the original solve
+    stats: dict[str, int] = dataclasses.field(default_factory=dict)  # nfev etc.
+    envelope: npt.NDArray[np.floating] | None = None  # K, per output window
+    t_equilibrium: float | None = None  # s, when stopped at equilibrium
+
+
+class ResultCache:
+    """
+    Content-addressed on-disk store of solutions, one .npz file per key
+
+    Entries are written atomically, so worker processes can share a cache
+    directory. Reads refresh an entry's modification time, and once the cache
+    grows past `max_bytes` or `max_entries` the least recently used entries are
+    evicted.
+    """
+
+    def __init__(
+        self,
+        directory: str | os.PathLike = ".cache/results",
+        max_bytes: int = 1 << 30,
+        max_entries: int | None = None,
+    ):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._version = code_version()
+
+    def key(
+        self,
+        arrays: ArrayArchitecture,
+        environment: EnvironmentalConditions,
+        settings: SolverSettings,
+    ) -> str:
+        return result_key(arrays, environment, settings, self._version)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.npz"
+
+    def get(self, key: str) -> CachedSolution | None:
+        path = self._path(key)
+
+        try:
+            with np.load(path) as entry:
+                solution = CachedSolution(
+                    t=entry["t"],
+                    y=entry["y"],
+                    energy=entry["energy"],
+                    success=bool(entry["success"]),
+                    message=str(entry["message"]),
+                    solve_time=float(entry["solve_time"]),
+                    stats=json.loads(str(entry["stats"])),
+                    envelope=entry["envelope"] if "envelope" in entry else None,
+                    t_equilibrium=(
+                        float(entry["t_equilibrium"])
+                        if "t_equilibrium" in entry
+                        else None
+                    ),
+                )
+            os.utime(path)
+        except (OSError, KeyError, ValueError):
+            # Missing, evicted meanwhile or unreadable
+            return None
+
+        return solution
+
+    def put(self, key: str, solution: CachedSolution):
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        # np.savez can't store None
+        optional = {
+            name: value
+            for name, value in (
+                ("envelope", solution.envelope),
+                ("t_equilibrium", solution.t_equilibrium),
+            )
+            if value is not None
+        }
+
+        fd, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(
+                    f,
+                    t=solution.t,
+                    y=solution.y,
+                    energy=solution.energy,
+                    success=solution.success,
+                    message=solution.message,
+                    solve_time=solution.solve_time,
+                    stats=json.dumps(solution.stats),
+                    **optional,
+                )
+            os.replace(temporary, self._path(key))
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+        self.evict()
+
+    def evict(self):
+        """
+        Removes the least recently used entries until the cache fits its limits
+        """
+        entries = []
+        for path in self.directory.glob("*.npz"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        max_entries = len(entries) if self.max_entries is None else self.max_entries
+
+        for i, (_, size, path) in enumerate(entries):
+            if total <= self.max_bytes and len(entries) - i <= max_entries:
+                break
+
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self):
+        for path in self.directory.glob("*.npz"):
+            path.unlink(missing_ok=True)
+
+    def stats(self) -> dict:
+        sizes = [path.stat().st_size for path in self.directory.glob("*.npz")]
+        return {"entries": len(sizes), "bytes": sum(sizes)}
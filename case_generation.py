@@ -0,0 +1,201 @@
+import dataclasses
+import itertools
+from dataclasses import dataclass
+from typing import Iterator
+
+from cache import architecture_key
+from results import SimulationResult
+from solver import SolverSettings, compile_for
+from spacecraft_prefabs import get_srs
+
+# Every flag `spacecraft_prefabs.get_srs` reads, in canonical order
+CASE_FLAGS = (
+    "electric_heaters",
+    "rhus",
+    "radiators",
+    "paint",
+    "insulation",
+    "active_cooling",
+    "electronics_active",
+    "louvers",
+)
+
+
+def canonical_flags(case_flags: dict) -> dict:
+    """
+    Returns the case flags as bools in `CASE_FLAGS` order, raising a
+    ValueError for missing or unknown flags
+    """
+    unknown = set(case_flags) - set(CASE_FLAGS)
+    if unknown:
+        raise ValueError(f"unknown case flags {sorted(unknown)}")
+
+    missing = set(CASE_FLAGS) - set(case_flags)
+    if missing:
+        raise ValueError(f"missing case flags {sorted(missing)}")
+
+    return {flag: bool(case_flags[flag]) for flag in CASE_FLAGS}
+
+
+def case_name(case_flags: dict) -> str:
+    """
+    Returns a name listing the flags that are on, "nothing" when none are
+    """
+    on = [flag for flag, level in canonical_flags(case_flags).items() if level]
+    return ", ".join(on) if on else "nothing"
+
+
+def full_factorial(
+    factors: tuple[str, ...] = CASE_FLAGS, base: dict | None = None
+) -> dict[str, dict]:
+    """
+    Returns the 2^k cases setting every combination of the factors on and off
+
+    Parameters
+    ----------
+    factors: tuple[str, ...]
+        flags to vary, all of `CASE_FLAGS` by default (256 cases)
+    base: dict | None
+        levels of the flags not varied, all off by default
+
+    Returns
+    -------
+    dict[str, dict]
+        case flags by `case_name`
+    """
+    return fractional_factorial({}, factors, base)
+
+
+def _parse_generator(generator: str) -> tuple[bool, list[str]]:
+    # "-a*b" -> (negated, ["a", "b"])
+    negated = generator.startswith("-")
+    return negated, generator.removeprefix("-").split("*")
+
+
+def fractional_factorial(
+    generators: dict[str, str],
+    factors: tuple[str, ...] | None = None,
+    base: dict | None = None,
+) -> dict[str, dict]:
+    """
+    Returns a 2^(k-p) fractional factorial design over the case flags
+
+    The factors are run as a full factorial and every generated flag is set
+    from a product of them, e.g. {"louvers": "radiators*active_cooling"} for
+    the defining relation I = radiators*active_cooling*louvers. A leading "-"
+    takes the other half fraction.
+
+    Parameters
+    ----------
+    generators: dict[str, str]
+        generator by generated flag
+    factors: tuple[str, ...] | None
+        flags run as a full factorial, the `CASE_FLAGS` not generated by
+        default
+    base: dict | None
+        levels of the flags neither varied nor generated, all off by default
+
+    Returns
+    -------
+    dict[str, dict]
+        case flags by `case_name`
+
+    Math
+    ----
+    With the levels coded off = -1, on = +1, a generated flag is on when the
+    (signed) product of its generator's factor levels is +1.
+    """
+    if factors is None:
+        factors = tuple(flag for flag in CASE_FLAGS if flag not in generators)
+
+    parsed = {flag: _parse_generator(spec) for flag, spec in generators.items()}
+    for flag, (_, generator_factors) in parsed.items():
+        for factor in [flag, *generator_factors]:
+            if factor not in CASE_FLAGS:
+                raise ValueError(f"unknown case flag {factor!r}")
+        if flag in factors or not set(generator_factors) <= set(factors):
+            raise ValueError(f"{flag} must be generated from the varied factors")
+
+    base = dict.fromkeys(CASE_FLAGS, False) | ({} if base is None else base)
+
+    cases = {}
+    for levels in itertools.product((False, True), repeat=len(factors)):
+        case_flags = base | dict(zip(factors, levels))
+        for flag, (negated, generator_factors) in parsed.items():
+            # An odd number of off factors makes the product -1
+            odd = sum(not case_flags[factor] for factor in generator_factors) % 2
+            case_flags[flag] = bool(odd) == negated
+
+        case_flags = canonical_flags(case_flags)
+        cases[case_name(case_flags)] = case_flags
+
+    return cases
+
+
+def merge_cases(*collections: dict[str, dict]) -> dict[str, dict]:
+    """
+    Merges named case collections, unlike `|` raising a ValueError when one
+    name refers to different case flags
+    """
+    merged = {}
+    for cases in collections:
+        for name, case_flags in cases.items():
+            case_flags = canonical_flags(case_flags)
+            if merged.setdefault(name, case_flags) != case_flags:
+                raise ValueError(f"case {name!r} is defined with different flags")
+
+    return merged
+
+
+@dataclass
+class CaseGroup:
+    """
+    Named cases that all build the same physical configuration, solved once
+    as `name` and fanned out to the others
+    """
+
+    cases: dict[str, dict]  # case flags by name
+
+    @property
+    def name(self) -> str:
+        return next(iter(self.cases))
+
+    @property
+    def case_flags(self) -> dict:
+        return self.cases[self.name]
+
+    def fan_out(self, result: SimulationResult) -> Iterator[SimulationResult]:
+        """
+        Yields the group's solved case once under every name of the group
+        """
+        for name, case_flags in self.cases.items():
+            if name == result.case_name:
+                yield result
+            else:
+                # Shares the solution arrays, counts as read back like a cache hit
+                yield dataclasses.replace(
+                    result, case_name=name, case_flags=case_flags, cached=True
+                )
+
+
+def group_cases(
+    cases: dict[str, dict], settings: SolverSettings | None = None
+) -> list[CaseGroup]:
+    """
+    Groups named cases by the physics they build
+
+    Cases are compared by `cache.architecture_key` of their compiled
+    spacecraft, so flags that make no difference in a configuration (paint
+    under insulation, say) and the same flags under different names all land
+    in one group.
+    """
+    if settings is None:
+        settings = SolverSettings()
+
+    groups: dict[str, CaseGroup] = {}
+    for name, case_flags in cases.items():
+        case_flags = canonical_flags(case_flags)
+        key = architecture_key(compile_for(get_srs(case_flags), case_flags, settings))
+        groups.setdefault(key, CaseGroup({})).cases[name] = case_flags
+
+    return list(groups.values())
@@ -0,0 +1,428 @@
+import math
+
+import numpy as np
+import numpy.typing as npt
+from scipy.constants import Stefan_Boltzmann
+
+from array_architecture import ArrayArchitecture, DenseLinks, SwitchingModes
+from base_classes import EnvironmentalConditions
+from heat_transfer import incident_radiation_fluxes, space_facing_areas
+from odes import thermal_jacobian, thermal_ode_vectorized
+from orbit import OrbitEnvironment
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Whether `CompiledODE` can be used, otherwise the NumPy RHS is the only one
+JIT_AVAILABLE = numba is not None
+
+
+def _jit(function):
+    # Without numba the kernels stay plain Python, only useful for checking them
+    if numba is None:
+        return function
+
+    return numba.njit(cache=True)(function)
+
+
+# Rows of the packed per-component parameters
+INERTIA, BACKGROUND, INNATE, HEATER_POWER, SET_TEMP, LOUVER, ACTIVE = range(7)
+# Layers of the packed link parameters
+G, G_ATTENUATED, COOL_LIMIT, HEAT_LIMIT, RAMP_START, RAMP_WIDTH, RAMP_FLOOR = range(7)
+
+
+@_jit
+def _step(x, smoothing):
+    # Scalar `switching_fraction`
+    if smoothing == 0:
+        return 1.0 if x > 0 else 0.0
+
+    return 0.5 * (1 + math.tanh(x / smoothing))
+
+
+@_jit
+def _step_derivative(x, smoothing):
+    # Scalar `switching_fraction_derivative`
+    if smoothing == 0:
+        return 0.0
+
+    return 0.5 / smoothing * (1 - math.tanh(x / smoothing) ** 2)
+
+
+@_jit
+def _ramp(hot_temp, start, width, floor):
+    # Scalar `_variable_fraction` and its derivative
+    position = (hot_temp - start) / width
+    if position <= 0:
+        return floor, 0.0
+    if position >= 1:
+        return 1.0, 0.0
+
+    return floor + (1 - floor) * position, (1 - floor) / width
+
+
+@_jit
+def _table_row(table, position):
+    # Linear interpolation between the rows around a fractional row position
+    index = min(int(position), table.shape[0] - 2)
+    fraction = position - index
+    return table[index] + fraction * (table[index + 1] - table[index])
+
+
+@_jit
+def _rhs_kernel(
+    temps,
+    incident,
+    background_temp,
+    components,
+    links,
+    variable,
+    exchange,
+    smoothing,
+    frozen,
+    heater_on,
+    louver_closed,
+    attenuated,
+    out,
+):
+    num_components = temps.shape[0]
+    background_power = background_temp**4
+
+    for i in range(num_components):
+        temp = temps[i]
+
+        if frozen:
+            heater = heater_on[i]
+            louver = louver_closed[i]
+        else:
+            heater = _step(components[SET_TEMP, i] - temp, smoothing)
+            louver = (
+                _step(temp - components[SET_TEMP, i], smoothing)
+                if incident[i] > 0
+                else 0.0
+            )
+
+        flux = (
+            components[INNATE, i]
+            + components[HEATER_POWER, i] * heater
+            + incident[i] * (1 - louver * components[LOUVER, i])
+            + components[BACKGROUND, i] * (background_power - temp**4)
+            + components[ACTIVE, i]
+        )
+
+        for j in range(exchange.shape[1]):
+            flux += exchange[i, j] * temps[j] ** 4
+
+        for j in range(num_components):
+            conductance = links[G, i, j]
+            attenuated_conductance = links[G_ATTENUATED, i, j]
+            if conductance == 0 and attenuated_conductance == 0:
+                continue
+
+            other = temps[j]
+            if frozen:
+                off = attenuated[i, j]
+            else:
+                off = _step(other - temp, smoothing) * _step(
+                    temp - links[HEAT_LIMIT, i, j], smoothing
+                ) + _step(temp - other, smoothing) * _step(
+                    links[COOL_LIMIT, i, j] - temp, smoothing
+                )
+            conductance += (attenuated_conductance - conductance) * off
+
+            if variable:
+                fraction, _ = _ramp(
+                    max(temp, other),
+                    links[RAMP_START, i, j],
+                    links[RAMP_WIDTH, i, j],
+                    links[RAMP_FLOOR, i, j],
+                )
+                conductance *= fraction
+
+            flux += conductance * (other - temp)
+
+        out[i] = flux / components[INERTIA, i]
+
+
+@_jit
+def _jacobian_kernel(
+    temps,
+    incident,
+    components,
+    links,
+    variable,
+    exchange,
+    smoothing,
+    frozen,
+    attenuated,
+    out,
+):
+    num_components = temps.shape[0]
+    out[:, :] = 0.0
+
+    # Frozen modes are constant, like hard switches
+    if frozen:
+        smoothing = 0.0
+
+    for i in range(num_components):
+        temp = temps[i]
+        set_temp = components[SET_TEMP, i]
+
+        diagonal = (
+            -4 * components[BACKGROUND, i] * temp**3
+            - components[HEATER_POWER, i] * _step_derivative(set_temp - temp, smoothing)
+            - max(incident[i], 0.0)
+            * components[LOUVER, i]
+            * _step_derivative(temp - set_temp, smoothing)
+        )
+
+        for j in range(exchange.shape[1]):
+            out[i, j] += 4 * exchange[i, j] * temps[j] ** 3
+
+        for j in range(num_components):
+            conductance = links[G, i, j]
+            attenuated_conductance = links[G_ATTENUATED, i, j]
+            if conductance == 0 and attenuated_conductance == 0:
+                continue
+
+            other = temps[j]
+            heat_limit = links[HEAT_LIMIT, i, j]
+            cool_limit = links[COOL_LIMIT, i, j]
+            if frozen:
+                off = attenuated[i, j]
+            else:
+                off = _step(other - temp, smoothing) * _step(
+                    temp - heat_limit, smoothing
+                ) + _step(temp - other, smoothing) * _step(cool_limit - temp, smoothing)
+            switched = conductance + (attenuated_conductance - conductance) * off
+
+            fraction = 1.0
+            if variable:
+                fraction, d_fraction = _ramp(
+                    max(temp, other),
+                    links[RAMP_START, i, j],
+                    links[RAMP_WIDTH, i, j],
+                    links[RAMP_FLOOR, i, j],
+                )
+                weight = switched * d_fraction * (other - temp)
+                if other > temp:
+                    out[i, j] += weight
+                else:
+                    diagonal += weight
+
+            effective = switched * fraction
+            out[i, j] += effective
+            diagonal -= effective
+
+            if smoothing > 0:
+                # `_switch_attenuation_derivatives`
+                difference = other - temp
+                hot = _step(temp - heat_limit, smoothing)
+                cold = _step(cool_limit - temp, smoothing)
+                d_other = _step_derivative(difference, smoothing) * (hot - cold)
+                d_self = (
+                    -d_other
+                    + _step(difference, smoothing)
+                    * _step_derivative(temp - heat_limit, smoothing)
+                    - _step(-difference, smoothing)
+                    * _step_derivative(cool_limit - temp, smoothing)
+                )
+                weight = (attenuated_conductance - conductance) * fraction * difference
+                out[i, j] += weight * d_other
+                diagonal += weight * d_self
+
+        out[i, i] += diagonal
+
+        for j in range(num_components):
+            out[i, j] /= components[INERTIA, i]
+
+
+def supports_compiled(arrays: ArrayArchitecture) -> bool:
+    """
+    Whether `CompiledODE` covers an architecture: a single (unstacked) one
+    with `DenseLinks` and no heater control laws
+    """
+    return (
+        isinstance(arrays.links, DenseLinks)
+        and arrays.controls is None
+        and np.ndim(arrays.thermal_inertia) == 1
+    )
+
+
+class CompiledODE:
+    """
+    `thermal_ode_vectorized` and `thermal_jacobian` of one architecture and
+    environment as numba kernels, looping over the components and links
+    instead of dispatching dozens of small NumPy operations per call
+
+    The architecture's parameters are packed once. `rhs` and `jacobian` keep
+    the signature of the NumPy versions so they can be passed to `solve_ivp`
+    and `integrate_event_driven` in their place, but always use the
+    architecture and environment they were built for. States they don't
+    cover (batches, power accumulators) go to the NumPy versions.
+    """
+
+    def __init__(
+        self, arrays: ArrayArchitecture, environment: EnvironmentalConditions
+    ):
+        if not supports_compiled(arrays):
+            raise ValueError("architecture not supported by the compiled RHS")
+
+        self.arrays = arrays
+        self.environment = environment
+        num_components = arrays.num_components
+
+        self._components = np.ascontiguousarray(
+            np.stack(
+                np.broadcast_arrays(
+                    arrays.thermal_inertia,
+                    Stefan_Boltzmann * space_facing_areas(arrays) * arrays.emissivity,
+                    arrays.innate_power,
+                    arrays.heater_power,
+                    arrays.heater_set_temp,
+                    1 - 1 / arrays.louver_attenuation,
+                    arrays.active_power,
+                )
+            ),
+            dtype=float,
+        )
+
+        links = arrays.links
+        self._links = np.ascontiguousarray(
+            np.stack(
+                [
+                    links.conductance,
+                    links.attenuated_conductance,
+                    links.cool_limit,
+                    links.heat_limit,
+                    links.ramp_start,
+                    links.ramp_width,
+                    links.ramp_floor,
+                ]
+            ),
+            dtype=float,
+        )
+        self._variable = links.variable
+
+        self._exchange = (
+            np.zeros((num_components, 0))
+            if arrays.radiative_exchange is None
+            else np.ascontiguousarray(arrays.radiative_exchange, dtype=float)
+        )
+
+        # Time-invariant environments only need the incident flux once
+        self._constant_incident = (
+            type(environment).absorbed_flux is EnvironmentalConditions.absorbed_flux
+        )
+        self._incident = np.ascontiguousarray(
+            np.broadcast_to(
+                incident_radiation_fluxes(arrays, environment), (num_components,)
+            ),
+            dtype=float,
+        )
+
+        # Orbit tables are linear in the incident power, so they fold into a
+        # single table of it (first row repeated at the end) read in the kernel
+        self._incident_table = None
+        if isinstance(environment, OrbitEnvironment):
+            times = np.append(environment.times, environment.period)
+            self._incident_table = np.ascontiguousarray(
+                np.broadcast_to(
+                    incident_radiation_fluxes(arrays, environment, times),
+                    (len(times), num_components),
+                ),
+                dtype=float,
+            )
+
+        self._no_modes = np.zeros(num_components)
+        self._no_attenuated = np.zeros((num_components, num_components))
+
+    def _incident_at(self, t) -> npt.NDArray[np.floating]:
+        if self._constant_incident:
+            return self._incident
+        if self._incident_table is not None:
+            return _table_row(
+                self._incident_table, self.environment.table_position(t)
+            )
+
+        return np.ascontiguousarray(
+            incident_radiation_fluxes(self.arrays, self.environment, t), dtype=float
+        )
+
+    def _modes(self, modes: SwitchingModes | None):
+        if modes is None:
+            return False, self._no_modes, self._no_modes, self._no_attenuated
+
+        return (
+            True,
+            np.asarray(modes.heater_on, dtype=float),
+            np.asarray(modes.louver_closed, dtype=float),
+            np.asarray(modes.attenuated, dtype=float),
+        )
+
+    def rhs(
+        self,
+        t: float,
+        y: npt.NDArray[np.floating],
+        arrays: ArrayArchitecture | None = None,
+        environment: EnvironmentalConditions | None = None,
+        modes: SwitchingModes | None = None,
+    ) -> npt.NDArray[np.floating]:
+        """
+        Compiled `thermal_ode_vectorized`
+        """
+        if y.shape != self._incident.shape:
+            return thermal_ode_vectorized(t, y, self.arrays, self.environment, modes)
+
+        frozen, heater_on, louver_closed, attenuated = self._modes(modes)
+        out = np.empty(len(y))
+        _rhs_kernel(
+            np.asarray(y, dtype=float),
+            self._incident_at(t),
+            float(self.environment.background_temp),
+            self._components,
+            self._links,
+            self._variable,
+            self._exchange,
+            float(self.arrays.switch_smoothing),
+            frozen,
+            heater_on,
+            louver_closed,
+            attenuated,
+            out,
+        )
+
+        return out
+
+    def jacobian(
+        self,
+        t: float,
+        y: npt.NDArray[np.floating],
+        arrays: ArrayArchitecture | None = None,
+        environment: EnvironmentalConditions | None = None,
+        modes: SwitchingModes | None = None,
+    ) -> npt.NDArray[np.floating]:
+        """
+        Compiled `thermal_jacobian`
+        """
+        if y.shape != self._incident.shape:
+            return thermal_jacobian(t, y, self.arrays, self.environment, modes)
+
+        frozen, _, _, attenuated = self._modes(modes)
+        out = np.empty((len(y), len(y)))
+        _jacobian_kernel(
+            np.asarray(y, dtype=float),
+            self._incident_at(t),
+            self._components,
+            self._links,
+            self._variable,
+            self._exchange,
+            float(self.arrays.switch_smoothing),
+            frozen,
+            attenuated,
+            out,
+        )
+
+        return out
@@ -34,6 +34,7 @@ def get_components(case_flags: dict) -> list[ThermalComponent]:
         illumination_factor=0,
         innate_power=100 if case_flags["rhus"] else 0,
         heater=Heater(power=0, set_temp=0),
+        name="Radiators",
     )
 
     """
@@ -56,6 +57,7 @@ def get_components(case_flags: dict) -> list[ThermalComponent]:
         illumination_factor=0.33,
         innate_power=100 if case_flags["rhus"] else 0,
         heater=Heater(power=20, set_temp=220),
+        name="Structure",
     )
 
     """
@@ -78,6 +80,7 @@ def get_components(case_flags: dict) -> list[ThermalComponent]:
         if case_flags["electronics_active"]
         else (100 if case_flags["rhus"] else 0),
         heater=Heater(power=100, set_temp=293),
+        name="Electronics",
     )
 
     """
@@ -94,6 +97,7 @@ def get_components(case_flags: dict) -> list[ThermalComponent]:
         illumination_factor=0.35,
         innate_power=100 if case_flags["rhus"] else 0,
         heater=Heater(power=100, set_temp=293),
+        name="Solar Arrays",
     )
 
     """
@@ -113,6 +117,7 @@ def get_components(case_flags: dict) -> list[ThermalComponent]:
         illumination_factor=0.5,
         innate_power=10 if case_flags["electronics_active"] else 0,
         heater=Heater(power=0, set_temp=0),
+        name="Sample Box",
     )
 
     """
@@ -129,6 +134,7 @@ def get_components(case_flags: dict) -> list[ThermalComponent]:
         illumination_factor=0,
         innate_power=100 if case_flags["rhus"] else 0,
         heater=Heater(power=100, set_temp=293),
+        name="Propellant Tanks",
     )
 
     """
@@ -145,6 +151,7 @@ def get_components(case_flags: dict) -> list[ThermalComponent]:
         illumination_factor=0.3,
         innate_power=0,
         heater=Heater(power=0, set_temp=0),
+        name="Engines",
     )
 
     """
@@ -164,6 +171,7 @@ def get_components(case_flags: dict) -> list[ThermalComponent]:
         illumination_factor=0.7,
         innate_power=30,
         heater=Heater(power=20, set_temp=293),
+        name="Antenna",
     )
 
     return [
@@ -0,0 +1,249 @@
+import numpy as np
+import numpy.typing as npt
+
+from array_architecture import (
+    ArrayArchitecture,
+    HeaterControls,
+    switching_fraction,
+    switching_fraction_derivative,
+)
+
+
+def _state_columns(
+    states: npt.NDArray[np.floating], indices: npt.NDArray[np.integer]
+) -> npt.NDArray[np.floating]:
+    # Controller states at the given indices, 0 where an index is -1
+    padded = np.concatenate((states, np.zeros(states.shape[:-1] + (1,))), axis=-1)
+    return padded[..., indices]
+
+
+def _pid_outputs(heater_temps, errors, states, controls: HeaterControls):
+    # Unclipped PID law, derivative on the filtered measurement
+    return (
+        controls.gain * errors
+        + controls.integral_gain * _state_columns(states, controls.integral_state)
+        - controls.derivative_gain
+        * (heater_temps - _state_columns(states, controls.filter_state))
+        / controls.filter_time
+    )
+
+
+def _heater_temps_and_errors(temps, arrays: ArrayArchitecture):
+    components = arrays.controls.components
+    heater_temps = temps[..., components]
+    return heater_temps, arrays.heater_set_temp[..., components] - heater_temps
+
+
+def split_state(
+    y: npt.NDArray[np.floating], arrays: ArrayArchitecture
+) -> tuple[npt.NDArray[np.floating], npt.NDArray[np.floating] | None]:
+    """
+    Splits an ODE state into the component temperatures and the controller
+    states, None when the architecture has no controllers or the state is
+    just the temperatures
+    """
+    num_components = arrays.num_components
+
+    if arrays.controls is None or y.shape[-1] < arrays.num_states:
+        return y[..., :num_components], None
+
+    return y[..., :num_components], y[..., num_components : arrays.num_states]
+
+
+def initial_state(arrays: ArrayArchitecture) -> npt.NDArray[np.floating]:
+    """
+    Returns the initial ODE state: the initial temperatures, followed by the
+    controller states when there are any
+
+    Relays start on below their set temperature, integrals at zero and the
+    derivative filters at the initial temperature.
+    """
+    temps = np.array(arrays.initial_temps, dtype=float)
+    controls = arrays.controls
+
+    if controls is None:
+        return temps
+
+    heater_temps, errors = _heater_temps_and_errors(temps, arrays)
+    states = np.zeros(temps.shape[:-1] + (controls.num_states,))
+
+    relay = controls.relay
+    states[..., controls.output_state[relay]] = errors[..., relay] > 0
+
+    has_filter = controls.filter_state >= 0
+    states[..., controls.filter_state[has_filter]] = heater_temps[..., has_filter]
+
+    return np.concatenate((temps, states), axis=-1)
+
+
+def controlled_heater_outputs(
+    temps: npt.NDArray[np.floating],
+    states: npt.NDArray[np.floating] | None,
+    arrays: ArrayArchitecture,
+) -> tuple[npt.NDArray[np.integer], npt.NDArray[np.floating]]:
+    """
+    Returns the components whose heater output is set by a control law and
+    those outputs, as fractions of full heater power
+
+    Without controller states the laws fall back to their equilibrium
+    behaviour: relays and laws with integral action hold their component on
+    its set point like an ideal thermostat, so only the proportional laws are
+    returned.
+
+    Parameters
+    ----------
+    temps: npt.NDArray[np.floating]
+        K, component temperatures, leading axes are batch axes
+    states: npt.NDArray[np.floating] | None
+        controller states, see `HeaterControls`
+    arrays: ArrayArchitecture
+        spacecraft thermal architecture in array form, with controls
+
+    Returns
+    -------
+    tuple[npt.NDArray[np.integer], npt.NDArray[np.floating]]
+        (K,) components and (..., K) heater outputs
+    """
+    controls = arrays.controls
+    heater_temps, errors = _heater_temps_and_errors(temps, arrays)
+
+    if states is None:
+        proportional = controls.proportional
+        return controls.components[proportional], np.clip(
+            controls.gain[proportional] * errors[..., proportional], 0, 1
+        )
+
+    return controls.components, np.where(
+        controls.relay,
+        _state_columns(states, controls.output_state),
+        np.clip(_pid_outputs(heater_temps, errors, states, controls), 0, 1),
+    )
+
+
+def controller_rates(
+    temps: npt.NDArray[np.floating],
+    states: npt.NDArray[np.floating],
+    arrays: ArrayArchitecture,
+) -> npt.NDArray[np.floating]:
+    """
+    Returns the time derivative of every controller state
+
+    Relay outputs lag behind a target which is on below set temp - deadband,
+    off above the set temp and unchanged in between (the output's side of 0.5
+    is the relay's memory). Integrals stop while the output is saturated in
+    the direction of the error (anti-windup).
+
+    Math
+    ----
+    relay: dx/dt = (target - x) / lag
+    integral: dI/dt = set temp - T
+    filter: dz/dt = (T - z) / filter time
+    """
+    controls = arrays.controls
+    smoothing = arrays.switch_smoothing
+    heater_temps, errors = _heater_temps_and_errors(temps, arrays)
+    rates = np.zeros(np.broadcast_shapes(states.shape, temps.shape[:-1] + (1,)))
+
+    relay = controls.relay
+    outputs = states[..., controls.output_state[relay]]
+    below = switching_fraction(errors[..., relay] - controls.deadband[relay], smoothing)
+    above = switching_fraction(-errors[..., relay], smoothing)
+    target = below + (1.0 - below - above) * (outputs > 0.5)
+    rates[..., controls.output_state[relay]] = (target - outputs) / controls.lag[relay]
+
+    has_integral = controls.integral_state >= 0
+    outputs = _pid_outputs(heater_temps, errors, states, controls)[..., has_integral]
+    integral_errors = errors[..., has_integral]
+    windup = ((outputs >= 1) & (integral_errors > 0)) | (
+        (outputs <= 0) & (integral_errors < 0)
+    )
+    rates[..., controls.integral_state[has_integral]] = np.where(
+        windup, 0.0, integral_errors
+    )
+
+    has_filter = controls.filter_state >= 0
+    rates[..., controls.filter_state[has_filter]] = (
+        heater_temps[..., has_filter]
+        - states[..., controls.filter_state[has_filter]]
+    ) / controls.filter_time[has_filter]
+
+    return rates
+
+
+def controller_jacobian(
+    temps: npt.NDArray[np.floating],
+    states: npt.NDArray[np.floating] | None,
+    arrays: ArrayArchitecture,
+):
+    """
+    Derivatives of `controlled_heater_outputs` and `controller_rates`
+
+    Returns the components of `controlled_heater_outputs`, d(output)/dT of
+    each (with respect to its own component's temperature), and, with
+    controller states, d(output)/d(states) (K, C), d(rates)/dT (C, N) and
+    d(rates)/d(states) (C, C). Hard relay targets contribute nothing.
+    """
+    controls = arrays.controls
+    smoothing = arrays.switch_smoothing
+    num_laws = len(controls.components)
+    heater_temps, errors = _heater_temps_and_errors(temps, arrays)
+
+    if states is None:
+        proportional = controls.proportional
+        outputs = controls.gain[proportional] * errors[proportional]
+        return (
+            controls.components[proportional],
+            -controls.gain[proportional] * ((outputs > 0) & (outputs < 1)),
+            None,
+            None,
+            None,
+        )
+
+    pid = _pid_outputs(heater_temps, errors, states, controls)
+    active = ~controls.relay & (pid > 0) & (pid < 1)
+    laws = np.arange(num_laws)
+
+    d_outputs = (
+        -(controls.gain + controls.derivative_gain / controls.filter_time) * active
+    )
+    d_output_states = np.zeros((num_laws, controls.num_states))
+    d_rates = np.zeros((controls.num_states, arrays.num_components))
+    d_rate_states = np.zeros((controls.num_states, controls.num_states))
+
+    # Relays
+    relay = controls.relay
+    output_states = controls.output_state[relay]
+    d_output_states[laws[relay], output_states] = 1
+    latched = states[output_states] > 0.5
+    d_below = -switching_fraction_derivative(
+        errors[relay] - controls.deadband[relay], smoothing
+    )
+    d_above = switching_fraction_derivative(-errors[relay], smoothing)
+    d_rates[output_states, controls.components[relay]] = (
+        d_below * (1 - latched) - d_above * latched
+    ) / controls.lag[relay]
+    d_rate_states[output_states, output_states] = -1 / controls.lag[relay]
+
+    # Integrals
+    has_integral = controls.integral_state >= 0
+    integral_states = controls.integral_state[has_integral]
+    d_output_states[laws[has_integral], integral_states] = (
+        controls.integral_gain[has_integral] * active[has_integral]
+    )
+    integral_errors = errors[has_integral]
+    windup = ((pid[has_integral] >= 1) & (integral_errors > 0)) | (
+        (pid[has_integral] <= 0) & (integral_errors < 0)
+    )
+    d_rates[integral_states, controls.components[has_integral]] = -1.0 * ~windup
+
+    # Derivative filters
+    has_filter = controls.filter_state >= 0
+    filter_states = controls.filter_state[has_filter]
+    inverse_filter_time = 1 / controls.filter_time[has_filter]
+    d_output_states[laws[has_filter], filter_states] = (
+        controls.derivative_gain[has_filter] * inverse_filter_time * active[has_filter]
+    )
+    d_rates[filter_states, controls.components[has_filter]] = inverse_filter_time
+    d_rate_states[filter_states, filter_states] = -inverse_filter_time
+
+    return controls.components, d_outputs, d_output_states, d_rates, d_rate_states
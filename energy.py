@@ -0,0 +1,396 @@
+from dataclasses import dataclass
+
+import numpy as np
+import numpy.typing as npt
+from scipy.integrate import DOP853, RK23, RK45
+
+from array_architecture import ArrayArchitecture
+from base_classes import EnvironmentalConditions
+from control import controller_rates, split_state
+from events import blend_sides, build_switching_surfaces, modes_from_sides
+from heat_transfer import incident_radiation_fluxes
+from odes import HEAT_FLOW_TERMS, component_heat_flows, thermal_ode_vectorized
+
+# Gauss-Legendre nodes per solver step
+QUADRATURE_NODES = 3
+
+# Explicit Runge-Kutta methods whose steps are replayed stage by stage
+RUNGE_KUTTA_METHODS = {"RK23": RK23, "RK45": RK45, "DOP853": DOP853}
+
+# Fraction of the run, at its end, averaged for the power summary
+SUMMARY_WINDOW = 0.1
+
+
+def integrate_heat_flows(
+    sol,
+    arrays: ArrayArchitecture,
+    environment: EnvironmentalConditions,
+    nodes: int = QUADRATURE_NODES,
+) -> npt.NDArray[np.floating]:
+    """
+    Integrates every heat flow term into every component over time, step by
+    step of the solver
+
+    Steps of the explicit Runge-Kutta methods (`RUNGE_KUTTA_METHODS`) are
+    replayed: the heat flows are evaluated at the integrator's own stages and
+    summed with its weights, which is how it advanced the temperatures, so
+    the terms of each such step add up to C dT to rounding, hard switches
+    included. Other steps (implicit methods, event-driven solutions, a last
+    step cut short by an event) are integrated by Gauss-Legendre quadrature
+    of the dense output, and balance C dT only up to the integrator's local
+    error.
+
+    For event-driven solutions the steps end on the switching events and the
+    modes of each segment are used, including the duty fractions while
+    sliding. Otherwise the quadrature reads the modes from the temperatures
+    (with the architecture's switch smoothing) like the RHS does, except in
+    steps where a component with hard switches gets within one step's reach
+    of its heater set point: there the integrator's stages may straddle it,
+    which the quadrature can't see. The heater and louver terms of such a
+    step are integrated with the component's modes frozen on either side of
+    the set point and blended by the fraction of the step spent below it that
+    matches the step's temperature change.
+
+    Parameters
+    ----------
+    sol: OdeResult
+        solution from `solver.integrate`, with dense output
+    arrays: ArrayArchitecture
+        architecture the solution was integrated with
+    environment: EnvironmentalConditions
+        environmental conditions surrounding the spacecraft
+    nodes: int
+        quadrature nodes per step
+
+    Returns
+    -------
+    npt.NDArray[np.floating]
+        J, (len(HEAT_FLOW_TERMS), N, T) energy of each term delivered to each
+        component since the start, at the solution times
+
+    Math
+    ----
+    Runge-Kutta: E(t_k+1) = E(t_k) + h * sum_s b_s * Q(t_k + c_s h, Y_s)
+    quadrature: E(t_k+1) = E(t_k) + sum_g w_g * Q(T(tau_g)) * h / 2
+    """
+    num_steps = len(sol.t) - 1
+    step_energy = np.zeros((len(HEAT_FLOW_TERMS), num_steps, arrays.num_components))
+
+    replayed = _runge_kutta_steps(sol)
+    if replayed.any():
+        step_energy[:, replayed] = _runge_kutta_energy(
+            sol, np.flatnonzero(replayed), arrays, environment
+        )
+    if not replayed.all():
+        step_energy[:, ~replayed] = _quadrature_energy(
+            sol, np.flatnonzero(~replayed), arrays, environment, nodes
+        )
+
+    energy = np.zeros((len(HEAT_FLOW_TERMS), len(sol.t), arrays.num_components))
+    np.cumsum(step_energy, axis=1, out=energy[:, 1:])
+
+    return energy.transpose(0, 2, 1)
+
+
+def _runge_kutta_steps(sol) -> npt.NDArray[np.bool_]:
+    # Steps the explicit Runge-Kutta method took between consecutive solution
+    # times; a terminal event cuts the last one short
+    steps = np.zeros(len(sol.t) - 1, dtype=bool)
+    if (
+        getattr(sol, "method", None) not in RUNGE_KUTTA_METHODS
+        or getattr(sol, "segment_sides", None) is not None
+        or len(sol.sol.ts) != len(sol.t)
+    ):
+        return steps
+
+    return (sol.sol.ts[:-1] == sol.t[:-1]) & (sol.sol.ts[1:] == sol.t[1:])
+
+
+def _runge_kutta_energy(sol, steps, arrays, environment):
+    # Re-evaluates the stages of every step from its start, with the modes read
+    # from the stage temperatures like the RHS:
+    # Y_s = y_k + h * sum_j a_sj * K_j, K_s = f(t_k + c_s h, Y_s)
+    method = RUNGE_KUTTA_METHODS[sol.method]
+    t = sol.t[steps]
+    h = (sol.t[steps + 1] - t)[:, None]
+    y = sol.y[: arrays.num_states, steps].T
+
+    slopes = np.zeros((method.n_stages,) + y.shape)
+    energy = np.zeros((len(HEAT_FLOW_TERMS), len(steps), arrays.num_components))
+    for stage in range(method.n_stages):
+        stage_y = y + h * np.tensordot(method.A[stage, :stage], slopes[:stage], 1)
+        temps, controller_states = split_state(stage_y, arrays)
+        flows = component_heat_flows(
+            t + method.C[stage] * h[:, 0],
+            temps,
+            arrays,
+            environment,
+            None,
+            controller_states,
+        )
+
+        for k, flow in enumerate(flows.values()):
+            energy[k] += method.B[stage] * h * flow
+
+        rates = sum(flows.values()) / arrays.thermal_inertia
+        if controller_states is not None:
+            rates = np.concatenate(
+                (rates, controller_rates(temps, controller_states, arrays)), axis=-1
+            )
+        slopes[stage] = rates
+
+    return energy
+
+
+def _quadrature_energy(sol, steps, arrays, environment, nodes):
+    # Gauss-Legendre quadrature of the dense output over the given steps
+    num_components = arrays.num_components
+    t = sol.t
+
+    points, weights = np.polynomial.legendre.leggauss(nodes)
+    half_steps = (t[steps + 1] - t[steps]) / 2
+    taus = ((t[steps] + t[steps + 1]) / 2)[:, None] + half_steps[:, None] * points
+    taus = taus.ravel()
+    states = sol.sol(taus).T
+    temps, controller_states = split_state(states, arrays)
+
+    flows = np.zeros((len(HEAT_FLOW_TERMS), len(taus), num_components))
+    def add_flows(at, modes=None):
+        for k, flow in enumerate(
+            component_heat_flows(
+                taus[at],
+                temps[at],
+                arrays,
+                environment,
+                modes,
+                None if controller_states is None else controller_states[at],
+            ).values()
+        ):
+            flows[k, at] = flow
+
+    segment_sides = getattr(sol, "segment_sides", None)
+
+    if segment_sides is None:
+        add_flows(slice(None))
+    else:
+        surfaces = build_switching_surfaces(arrays, environment)
+        segments = np.searchsorted(sol.t_switches, taus, side="right")
+
+        for segment in np.unique(segments):
+            at = np.flatnonzero(segments == segment)
+            sides = segment_sides[segment]
+            sliding = sol.segment_sliding[segment]
+
+            if not sliding.any():
+                add_flows(at, modes_from_sides(sides, surfaces, arrays, environment))
+                continue
+
+            # Duty fractions follow the state while sliding
+            for i in at:
+                blended = blend_sides(
+                    thermal_ode_vectorized,
+                    taus[i],
+                    states[i],
+                    sides,
+                    sliding,
+                    surfaces,
+                    arrays,
+                    environment,
+                )
+                add_flows(
+                    [i], modes_from_sides(blended, surfaces, arrays, environment)
+                )
+
+    step_energy = (
+        flows.reshape(len(HEAT_FLOW_TERMS), len(steps), nodes, num_components)
+        * (half_steps[:, None] * weights)[..., None]
+    ).sum(axis=2)
+
+    if segment_sides is None and arrays.switch_smoothing == 0:
+        _frozen_mode_energy(
+            step_energy,
+            steps,
+            taus,
+            temps,
+            sol,
+            arrays,
+            environment,
+            half_steps[:, None] * weights,
+        )
+
+    return step_energy
+
+
+def _frozen_mode_energy(
+    step_energy, steps, taus, temps, sol, arrays, environment, weights
+):
+    # Hard heater/louver switches flip wherever the integrator's stages cross a
+    # set point, which the quadrature nodes don't see. Those two terms only
+    # depend on the component's own mode, so each step integrates them with
+    # the mode frozen below the set point (heater on, louver open) and above
+    # it (heater off, louver closed). Steps which stay out of reach of the
+    # set point take the side they are on; the rest spend the fraction f
+    # below it that matches the integrator's temperature change:
+    # C dT = E_other + f * (E_heater + E_open) + (1 - f) * E_closed
+    # Heaters with a control law don't switch there, their energy is part of
+    # E_other.
+    num_components = arrays.num_components
+    num_steps = len(steps)
+    heater, incident = HEAT_FLOW_TERMS.index("heater"), HEAT_FLOW_TERMS.index(
+        "incident_radiative"
+    )
+    start, end = sol.y[:num_components, steps], sol.y[:num_components, steps + 1]
+    durations = sol.t[steps + 1] - sol.t[steps]
+
+    thermostat_power = arrays.heater_power.copy()
+    if arrays.controls is not None:
+        thermostat_power[arrays.controls.components] = 0
+    thermostat = thermostat_power != 0
+
+    # Quadrature of both modes over every step
+    heater_on = durations[:, None] * thermostat_power
+    incident_open = (
+        np.broadcast_to(
+            incident_radiation_fluxes(arrays, environment, taus),
+            (len(taus), num_components),
+        ).reshape(num_steps, -1, num_components)
+        * weights[..., None]
+    ).sum(axis=1)
+    incident_closed = incident_open / arrays.louver_attenuation
+    switched = (thermostat_power != 0) | (arrays.louver_attenuation != 1)
+
+    # Distance to the set point at both ends of every step and its quadrature
+    # nodes, against how far the step could move in either mode
+    distance = np.concatenate(
+        (
+            start.T[:, None],
+            temps.reshape(num_steps, -1, num_components),
+            end.T[:, None],
+        ),
+        axis=1,
+    ) - arrays.heater_set_temp
+    other = (
+        np.delete(step_energy, [heater, incident], axis=0).sum(axis=0)
+        + step_energy[heater] * ~thermostat
+    )
+    reach = (
+        np.maximum(
+            np.abs(other + heater_on + incident_open),
+            np.abs(other + incident_closed),
+        )
+        / arrays.thermal_inertia
+    )
+    below_fraction = (distance.max(axis=1) <= 0).astype(float)
+
+    crossing = (distance.min(axis=1) <= 0) & (distance.max(axis=1) > 0)
+    near = np.abs(distance).min(axis=1) <= reach
+    rows, components = np.nonzero((crossing | near) & switched)
+    net = arrays.thermal_inertia[components] * (
+        end[components, rows] - start[components, rows]
+    )
+    other = other[rows, components]
+    closed = incident_closed[rows, components]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        below_fraction[rows, components] = np.clip(
+            np.nan_to_num(
+                (net - other - closed)
+                / (
+                    heater_on[rows, components]
+                    + incident_open[rows, components]
+                    - closed
+                )
+            ),
+            0,
+            1,
+        )
+
+    step_energy[heater] = np.where(
+        thermostat, below_fraction * heater_on, step_energy[heater]
+    )
+    step_energy[incident] = below_fraction * incident_open + (
+        1 - below_fraction
+    ) * incident_closed
+
+
+@dataclass
+class EnergyAccount:
+    """
+    Cumulative energy of each heat flow term into each component, read over
+    arbitrary time windows
+
+    Window edges between solution times are interpolated linearly within that
+    step.
+    """
+
+    t: npt.NDArray[np.floating]  # s, (T,)
+    energy: npt.NDArray[np.floating]  # J, (len(HEAT_FLOW_TERMS), N, T)
+
+    def _at(self, time: float) -> npt.NDArray[np.floating]:
+        index = np.clip(np.searchsorted(self.t, time), 1, len(self.t) - 1)
+        t0, t1 = self.t[index - 1], self.t[index]
+        fraction = np.clip((time - t0) / (t1 - t0), 0, 1) if t1 > t0 else 1.0
+
+        return (1 - fraction) * self.energy[..., index - 1] + fraction * self.energy[
+            ..., index
+        ]
+
+    def _window(self, start, end) -> tuple[float, float]:
+        return (
+            self.t[0] if start is None else start,
+            self.t[-1] if end is None else end,
+        )
+
+    def window(
+        self, start: float | None = None, end: float | None = None
+    ) -> npt.NDArray[np.floating]:
+        """
+        J, (len(HEAT_FLOW_TERMS), N) energy delivered between `start` and `end`,
+        the whole run by default
+        """
+        start, end = self._window(start, end)
+        return self._at(end) - self._at(start)
+
+    def average_power(
+        self, start: float | None = None, end: float | None = None
+    ) -> npt.NDArray[np.floating]:
+        """
+        W, (len(HEAT_FLOW_TERMS), N) time-averaged flow of every term into every
+        component
+        """
+        start, end = self._window(start, end)
+        return self.window(start, end) / (end - start)
+
+    def duty_cycles(
+        self,
+        heater_power: npt.NDArray[np.floating],
+        start: float | None = None,
+        end: float | None = None,
+    ) -> npt.NDArray[np.floating]:
+        """
+        (N,) fraction of the window each heater was on, NaN without a heater
+        """
+        heater = self.average_power(start, end)[HEAT_FLOW_TERMS.index("heater")]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(heater_power > 0, heater / heater_power, np.nan)
+
+    def summary_powers(self) -> npt.NDArray[np.floating]:
+        """
+        W, total innate, heater, incoming and rejected radiative power averaged
+        over the last `SUMMARY_WINDOW` of the run, the terms `thermal_ode`
+        accumulates
+        """
+        start = self.t[-1] - SUMMARY_WINDOW * (self.t[-1] - self.t[0])
+        powers = self.average_power(start).sum(axis=-1)
+
+        return powers[
+            [
+                HEAT_FLOW_TERMS.index(term)
+                for term in (
+                    "innate",
+                    "heater",
+                    "incident_radiative",
+                    "rejected_radiative",
+                )
+            ]
+        ]
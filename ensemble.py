@@ -0,0 +1,305 @@
+from dataclasses import dataclass, fields, replace
+
+import numpy as np
+import numpy.typing as npt
+
+from array_architecture import ArrayArchitecture, DenseLinks, compile_architecture
+from base_classes import EnvironmentalConditions, ThermalArchitecture
+from control import initial_state
+from odes import thermal_ode_vectorized
+
+# Dormand-Prince 5(4) tableau, the same pair `solve_ivp`'s RK45 uses
+DOPRI_C = np.array([0, 1 / 5, 3 / 10, 4 / 5, 8 / 9, 1])
+DOPRI_A = [
+    [],
+    [1 / 5],
+    [3 / 40, 9 / 40],
+    [44 / 45, -56 / 15, 32 / 9],
+    [19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729],
+    [9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656],
+]
+DOPRI_B = np.array([35 / 384, 0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84])
+# 5th minus 4th order weights, the last one for the FSAL stage
+DOPRI_E = np.array(
+    [71 / 57600, 0, -71 / 16695, 71 / 1920, -17253 / 339200, 22 / 525, -1 / 40]
+)
+
+
+def _member_fields(arrays: ArrayArchitecture) -> list[str]:
+    # Per-member arrays of an architecture, leaving out absent optional ones
+    return [
+        field.name
+        for field in fields(ArrayArchitecture)
+        if field.name not in ("links", "controls", "switch_smoothing")
+        and getattr(arrays, field.name) is not None
+    ]
+
+
+def stack_architectures(members: list[ArrayArchitecture]) -> ArrayArchitecture:
+    """
+    Stacks M architectures sharing the same N components into one whose
+    per-component arrays are (M, N) and whose links are (M, N, N)
+
+    `thermal_ode_vectorized` treats the leading axis as a batch axis, so every
+    member's RHS is evaluated in one call on an (M, N) state. Members must
+    use `DenseLinks` and share the same switch smoothing, and either all or
+    none of them have view factors. Heater controls are taken from the first
+    member, only their set temperatures may differ.
+    """
+    if any(not isinstance(member.links, DenseLinks) for member in members):
+        raise TypeError("ensemble members need DenseLinks")
+
+    if len({member.switch_smoothing for member in members}) > 1:
+        raise ValueError("ensemble members need the same switch smoothing")
+
+    arrays = {
+        name: np.stack([getattr(member, name) for member in members])
+        for name in _member_fields(members[0])
+    }
+    links = DenseLinks(
+        **{
+            field.name: np.stack(
+                [getattr(member.links, field.name) for member in members]
+            )
+            for field in fields(DenseLinks)
+        }
+    )
+
+    return ArrayArchitecture(
+        **arrays,
+        links=links,
+        controls=members[0].controls,
+        switch_smoothing=members[0].switch_smoothing,
+    )
+
+
+def take_members(
+    arrays: ArrayArchitecture, members: npt.NDArray[np.integer]
+) -> ArrayArchitecture:
+    """
+    Returns the sub-ensemble made of the given members of a stacked architecture
+    """
+    return replace(
+        arrays,
+        **{name: getattr(arrays, name)[members] for name in _member_fields(arrays)},
+        links=DenseLinks(
+            **{
+                field.name: getattr(arrays.links, field.name)[members]
+                for field in fields(DenseLinks)
+            }
+        ),
+    )
+
+
+def take_environment(
+    environment: EnvironmentalConditions, members: npt.NDArray[np.integer]
+) -> EnvironmentalConditions:
+    """
+    Returns the environment seen by the given members when it holds
+    per-member (M, 1) arrays, otherwise the environment itself
+    """
+    per_member = {
+        field.name: getattr(environment, field.name)[members]
+        for field in fields(EnvironmentalConditions)
+        if np.ndim(getattr(environment, field.name)) > 0
+    }
+
+    return replace(environment, **per_member) if per_member else environment
+
+
+def compile_ensemble(
+    spacecraft: list[ThermalArchitecture],
+    case_flags: list[dict],
+    switch_smoothing: float = 0.0,
+) -> ArrayArchitecture:
+    """
+    Compiles and stacks one spacecraft per set of case flags
+    """
+    return stack_architectures(
+        [
+            compile_architecture(member, flags, switch_smoothing=switch_smoothing)
+            for member, flags in zip(spacecraft, case_flags)
+        ]
+    )
+
+
+@dataclass
+class EnsembleResult:
+    t: npt.NDArray[np.floating]  # s, (T,) output times shared by all members
+    y: npt.NDArray[np.floating]  # K, (M, N, T) temperatures, like `solve_ivp`'s y
+    num_steps: npt.NDArray[np.integer]  # (M,) accepted steps per member
+    num_rejected: npt.NDArray[np.integer]  # (M,) rejected steps per member
+    nfev: int  # batched RHS evaluations
+    success: npt.NDArray[np.bool_]  # (M,) False when a member ran out of steps
+
+
+def integrate_ensemble(
+    arrays: ArrayArchitecture,
+    environment: EnvironmentalConditions,
+    t_end: float = 1e6,
+    rtol: float = 1e-3,
+    atol: float = 1e-2,
+    t_eval: npt.NDArray[np.floating] | None = None,
+    max_steps: int = 1000000,
+) -> EnsembleResult:
+    """
+    Integrates every member of a stacked architecture with its own adaptive
+    Dormand-Prince 5(4) step size, evaluating the RHS of all unfinished members
+    in one vectorized call per stage
+
+    Each member gets the step size and error control `solve_ivp`'s RK45 would
+    give it (error norm over that member's own state only), so results match
+    per-case runs to within the tolerances. Finished members are dropped from
+    the batch.
+
+    Parameters
+    ----------
+    arrays: ArrayArchitecture
+        stacked architecture, see `stack_architectures`
+    environment: EnvironmentalConditions
+        environmental conditions surrounding the spacecraft; the incident flux
+        may be an (M, 1) array for per-member environments
+    t_end: float
+        s, end time
+    rtol, atol
+        relative and absolute tolerances, as for `solve_ivp`
+    t_eval: npt.NDArray[np.floating] | None
+        s, sorted output times, just `t_end` by default. Steps are shortened to
+        land on them.
+    max_steps: int
+        accepted plus rejected steps allowed per member
+
+    Returns
+    -------
+    EnsembleResult
+        states of every member at the output times
+    """
+    t_eval = np.array([t_end] if t_eval is None else t_eval, dtype=float)
+    num_members, num_components = arrays.thermal_inertia.shape
+
+    y = initial_state(arrays)
+    output = np.full((num_members, num_components, len(t_eval)), np.nan)
+
+    # Outputs at the initial time
+    at_start = t_eval <= 0
+    output[:, :, at_start] = y[:, :num_components, None]
+
+    t = np.zeros(num_members)
+    next_output = np.full(num_members, np.count_nonzero(at_start))
+    num_steps = np.zeros(num_members, dtype=int)
+    num_rejected = np.zeros(num_members, dtype=int)
+    success = np.ones(num_members, dtype=bool)
+
+    nfev = 1
+    k_first = thermal_ode_vectorized(t, y, arrays, environment)
+
+    # Initial step as in `solve_ivp`'s select_initial_step, per member
+    scale = atol + np.abs(y) * rtol
+    d0 = np.sqrt(np.mean((y / scale) ** 2, axis=-1))
+    d1 = np.sqrt(np.mean((k_first / scale) ** 2, axis=-1))
+    h = np.where((d0 < 1e-5) | (d1 < 1e-5), 1e-6, 0.01 * d0 / np.maximum(d1, 1e-300))
+    y_trial = y + h[:, None] * k_first
+    nfev += 1
+    d2 = np.sqrt(
+        np.mean(
+            ((thermal_ode_vectorized(h, y_trial, arrays, environment) - k_first) / scale)
+            ** 2,
+            axis=-1,
+        )
+    ) / h
+    h_guess = np.where(
+        (d1 <= 1e-15) & (d2 <= 1e-15),
+        np.maximum(1e-6, h * 1e-3),
+        (0.01 / np.maximum(np.maximum(d1, d2), 1e-300)) ** (1 / 5),
+    )
+    h = np.minimum(100 * h, h_guess)
+
+    # Members still integrating, and the sub-ensemble they form
+    active = np.flatnonzero(next_output < len(t_eval))
+    batch_members = active
+    batch = take_members(arrays, active)
+    batch_environment = take_environment(environment, active)
+
+    while active.size:
+        # Shrink the batch once most of its members have finished
+        if active.size < batch_members.size // 2:
+            batch_members = active
+            batch = take_members(arrays, active)
+            batch_environment = take_environment(environment, active)
+
+        if active.size == batch_members.size:
+            members, member_environment = batch, batch_environment
+        else:
+            rows = np.searchsorted(batch_members, active)
+            members = take_members(batch, rows)
+            member_environment = take_environment(batch_environment, rows)
+
+        t_active = t[active]
+        y_active = y[active]
+        step = np.minimum(h[active], t_eval[next_output[active]] - t_active)
+
+        stages = [k_first[active]]
+        for c, a in zip(DOPRI_C[1:], DOPRI_A[1:]):
+            increment = sum(coefficient * k for coefficient, k in zip(a, stages))
+            stages.append(
+                thermal_ode_vectorized(
+                    t_active + c * step,
+                    y_active + step[:, None] * increment,
+                    members,
+                    member_environment,
+                )
+            )
+
+        y_new = y_active + step[:, None] * sum(
+            b * k for b, k in zip(DOPRI_B, stages)
+        )
+        k_last = thermal_ode_vectorized(
+            t_active + step, y_new, members, member_environment
+        )
+        stages.append(k_last)
+        nfev += 6
+
+        error = step[:, None] * sum(e * k for e, k in zip(DOPRI_E, stages))
+        scale = atol + np.maximum(np.abs(y_active), np.abs(y_new)) * rtol
+        with np.errstate(over="ignore"):
+            error_norm = np.sqrt(np.mean((error / scale) ** 2, axis=-1))
+
+        accepted = error_norm < 1
+        with np.errstate(divide="ignore"):
+            factor = 0.9 * error_norm ** (-1 / 5)
+        factor = np.where(accepted, np.minimum(factor, 10), np.maximum(factor, 0.2))
+
+        accepted_members = active[accepted]
+        t[accepted_members] = t_active[accepted] + step[accepted]
+        y[accepted_members] = y_new[accepted]
+        k_first[accepted_members] = k_last[accepted]
+        num_steps[accepted_members] += 1
+        num_rejected[active[~accepted]] += 1
+
+        # Full-length steps set the next step size, shortened ones keep theirs
+        full = step >= h[active]
+        h[active] = np.where(full | ~accepted, step * factor, h[active])
+
+        # Record outputs reached by this step
+        reached = accepted_members[
+            t[accepted_members] >= t_eval[next_output[accepted_members]]
+        ]
+        output[reached, :, next_output[reached]] = y[reached, :num_components]
+        next_output[reached] += 1
+
+        out_of_steps = active[num_steps[active] + num_rejected[active] >= max_steps]
+        success[out_of_steps] = False
+
+        active = active[
+            (next_output[active] < len(t_eval))
+            & (num_steps[active] + num_rejected[active] < max_steps)
+        ]
+
+    return EnsembleResult(
+        t=t_eval,
+        y=output,
+        num_steps=num_steps,
+        num_rejected=num_rejected,
+        nfev=nfev,
+        success=success,
+    )
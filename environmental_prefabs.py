@@ -1,5 +1,37 @@
+import numpy as np
+
 from base_classes import EnvironmentalConditions
+from orbit import orbit_environment
 
 VENUS = EnvironmentalConditions("Venus", 2900, 2.7)
 EARTH = EnvironmentalConditions("Earth", 1400, 2.7)
 ENCELADUS = EnvironmentalConditions("Enceladus", 15, 2.7)
+
+# Fraction of each sample return spacecraft component's radiative area facing
+# Earth, in `spacecraft_prefabs.get_components` order. Illustrative values for
+# a nadir-pointing layout with the radiators on the anti-nadir side.
+LEO_PLANET_VIEW_FACTORS = np.array(
+    [
+        0.0,  # Radiators
+        0.3,  # Structure
+        0.0,  # Electronics
+        0.1,  # Solar Arrays
+        0.2,  # Sample Box
+        0.0,  # Propellant Tanks
+        0.3,  # Engines
+        0.5,  # Antenna
+    ]
+)
+
+# Low Earth orbit of the 8-component sample return spacecraft: 92 min period,
+# 38% eclipse, 30% albedo and 237 W/m^2 IR
+LOW_EARTH_ORBIT = orbit_environment(
+    "Low Earth Orbit",
+    1400,
+    5520,
+    num_components=8,
+    eclipse_fraction=0.38,
+    albedo=0.3,
+    planet_ir_flux=237,
+    planet_view_factors=LEO_PLANET_VIEW_FACTORS,
+)
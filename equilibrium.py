@@ -0,0 +1,210 @@
+import numpy as np
+import numpy.typing as npt
+from scipy import sparse
+
+from array_architecture import ArrayArchitecture, SwitchingModes
+from base_classes import EnvironmentalConditions
+from control import initial_state, split_state
+from odes import heater_duty, thermal_jacobian
+
+# Number of blocks an equilibrium window is split into, the rates are measured
+# between consecutive block means. Blocks shorter than ~2e4 s see the chatter
+# of hard switches and the limit cycles of sliding components as drift.
+EQUILIBRIUM_BLOCKS = 4
+
+
+def slowest_time_constant(
+    arrays: ArrayArchitecture,
+    environment: EnvironmentalConditions,
+    temps: npt.NDArray[np.floating] | None = None,
+    t: float = 0.0,
+) -> float:
+    """
+    Returns the slowest thermal time constant (s) of the architecture, from the
+    temperature block of the Jacobian at the given temperatures, the initial
+    ones by default
+
+    Radiation is linearized there, so the same spacecraft settles much slower
+    when cold. Modes that don't decay (components with neither links nor
+    radiating area) are left out.
+
+    Math
+    ----
+    tau = -1 / max(Re(lambda)), over the eigenvalues lambda < 0 of
+    d(dT/dt)/dT = -C^-1 (G + 4 sigma eps A T^3)
+    """
+    num_components = arrays.num_components
+    y = initial_state(arrays)
+    if temps is not None:
+        y[:num_components] = temps
+
+    jacobian = thermal_jacobian(t, y, arrays, environment)
+    if sparse.issparse(jacobian):
+        jacobian = jacobian.toarray()
+
+    rates = np.linalg.eigvals(jacobian[:num_components, :num_components]).real
+    decaying = rates[rates < 0]
+    if len(decaying) == 0:
+        return 0.0
+
+    return -1 / decaying.max()
+
+
+class EquilibriumDetector:
+    """
+    Terminal `solve_ivp` event firing once the spacecraft has settled
+
+    The component temperatures and heater duty cycles are averaged over blocks
+    of `window / EQUILIBRIUM_BLOCKS` along the accepted steps. Equilibrium is
+    reached when, for a whole window, the block means of every temperature
+    change by at most `rate` (K/s) and those of every heater duty cycle by at
+    most `duty` from one block to the next. Block means ride over the
+    chattering of hard heater switches, which never lets the instantaneous
+    dT/dt settle. Time-varying environments only settle over windows whose
+    blocks span whole orbits.
+
+    The settled stretch also has to last the slowest time constant at the
+    current temperatures (`slowest_time_constant`), which for cold spacecraft
+    with heavy, weakly coupled components runs to 1e7 s and more. The rate
+    itself is only a rate: a component relaxing with time constant tau at the
+    threshold is still about `rate` * tau away from its equilibrium, so pick
+    `rate` as the acceptable distance over the slowest time constant.
+
+    The detector keeps its state between calls, so one instance serves a
+    single integration, across the segments of an event-driven one. Calls at
+    times before the last accepted step (`solve_ivp` locating the event within
+    a step) leave the state alone.
+    """
+
+    terminal = True
+    direction = -1
+
+    def __init__(
+        self,
+        arrays: ArrayArchitecture,
+        environment: EnvironmentalConditions,
+        rate: float,
+        duty: float,
+        window: float,
+    ):
+        """
+        Parameters
+        ----------
+        arrays: ArrayArchitecture
+            architecture being integrated
+        environment: EnvironmentalConditions
+            environment it is integrated in, for the time constants
+        rate: float
+            K/s, largest temperature rate at equilibrium
+        duty: float
+            largest duty cycle change between blocks at equilibrium
+        window: float
+            s, how long both have to hold at least
+        """
+        self.arrays = arrays
+        self.environment = environment
+        self.rate = rate
+        self.duty = duty
+        self.window = window
+
+        self.block_length = window / EQUILIBRIUM_BLOCKS
+        self.heaters = np.flatnonzero(arrays.heater_power != 0)
+        self.t_equilibrium: float | None = None  # s, start of the settled window
+        self.settled_window = window  # s, its length once settled
+
+        self._t: float | None = None  # s, last accepted time
+        self._values = None  # temperatures and duty cycles there
+        self._block_start = 0.0  # s
+        self._block_integral = None
+        self._last_mean = None
+        self._settled_blocks = 0
+
+    @property
+    def t_end(self) -> float:
+        # s, where the integration stops, the end of the settled window
+        return self.t_equilibrium + self.settled_window
+
+    def _sample(
+        self, t: float, y: npt.NDArray[np.floating], modes: SwitchingModes | None
+    ) -> npt.NDArray[np.floating]:
+        # Temperatures followed by the duty cycle of every heater
+        temps, controller_states = split_state(y, self.arrays)
+        duty = np.broadcast_to(
+            heater_duty(temps, self.arrays, modes, controller_states), temps.shape
+        )
+
+        return np.concatenate((temps, duty[self.heaters]))
+
+    def _end_block(self, mean: npt.NDArray[np.floating], end: float) -> bool:
+        # Compares a finished block with the previous one, returns whether the
+        # window has settled at its end
+        if self._last_mean is not None:
+            change = np.abs(mean - self._last_mean)
+            num_components = self.arrays.num_components
+            settled = (
+                change[:num_components].max(initial=0)
+                <= self.rate * self.block_length
+                and change[num_components:].max(initial=0) <= self.duty
+            )
+            self._settled_blocks = self._settled_blocks + 1 if settled else 0
+
+        self._last_mean = mean
+        if self._settled_blocks < EQUILIBRIUM_BLOCKS:
+            return False
+
+        # Slow components barely move within a block, they need more of them
+        tau = slowest_time_constant(
+            self.arrays, self.environment, mean[: self.arrays.num_components], end
+        )
+        if self._settled_blocks < tau / self.block_length:
+            return False
+
+        self.settled_window = self._settled_blocks * self.block_length
+        self.t_equilibrium = end - self.settled_window
+        return True
+
+    def _add(
+        self, t: float, y: npt.NDArray[np.floating], modes: SwitchingModes | None
+    ):
+        values = self._sample(t, y, modes)
+        if self._t is None:
+            self._t, self._values = t, values
+            self._block_start = t
+            self._block_integral = np.zeros_like(values)
+            return
+
+        # Trapezoid over the step, split at every block edge it passes
+        t0, v0 = self._t, self._values
+        while self._block_start + self.block_length <= t:
+            edge = self._block_start + self.block_length
+            v_edge = v0 + (edge - t0) / (t - t0) * (values - v0)
+            self._block_integral += (v0 + v_edge) / 2 * (edge - t0)
+
+            if self._end_block(self._block_integral / self.block_length, edge):
+                return
+
+            t0, v0 = edge, v_edge
+            self._block_start = edge
+            self._block_integral = np.zeros_like(values)
+
+        self._block_integral += (v0 + values) / 2 * (t - t0)
+        self._t, self._values = t, values
+
+    def __call__(
+        self,
+        t: float,
+        y: npt.NDArray[np.floating],
+        *args,
+        modes: SwitchingModes | None = None,
+    ) -> float:
+        """
+        Positive until equilibrium, then the time left to the end of the
+        settled window; `modes` are the frozen modes of an event-driven run
+        """
+        if self.t_equilibrium is None and (self._t is None or t > self._t):
+            self._add(t, y, modes)
+
+        if self.t_equilibrium is None:
+            return self.window
+
+        return self.t_end - t
@@ -0,0 +1,508 @@
+from dataclasses import dataclass
+
+import numpy as np
+import numpy.typing as npt
+from scipy import sparse
+from scipy.integrate import OdeSolution, solve_ivp
+from scipy.optimize import OptimizeResult
+
+from array_architecture import ArrayArchitecture, DenseLinks, SwitchingModes
+from base_classes import EnvironmentalConditions
+from heat_transfer import peak_incident_radiation_fluxes
+
+# K, how far past a T_i = const surface the state has to get to cross it. Keeps
+# the event function off zero right after a surface has been flipped.
+SURFACE_TOLERANCE = 1e-6
+
+
+@dataclass
+class SwitchingSurfaces:
+    """
+    Every heater, louver and thermal switch threshold as a linear function of
+    the component temperatures, h = matrix @ T - offset
+
+    A surface is "above" when h > 0. Node surfaces (T_i - heater set temp) drive
+    both the heater and the louver of that component; each switched link gets a
+    direction surface (T_other - T_self) and surfaces for its heat/cool limits.
+    Identical surfaces are shared.
+    """
+
+    matrix: sparse.csr_matrix  # (K, N)
+    offset: npt.NDArray[np.floating]  # (K,)
+    nodes: npt.NDArray[np.integer]  # component of T_i = const surfaces, -1 otherwise
+    lit: npt.NDArray[np.bool_]  # components ever receiving incident radiation
+
+    # node surfaces
+    node_index: npt.NDArray[np.integer]  # component of each node surface
+    node_surfaces: npt.NDArray[np.integer]  # surface index of each node surface
+
+    # link surfaces, one entry per switched link
+    link_index: tuple  # index into the links' conductance array
+    direction_surfaces: npt.NDArray[np.integer]
+    hot_surfaces: npt.NDArray[np.integer]  # -1 when the heat limit is infinite
+    cold_surfaces: npt.NDArray[np.integer]  # -1 when the cool limit is infinite
+
+    @property
+    def num_surfaces(self) -> int:
+        return len(self.offset)
+
+    def values(self, temps: npt.NDArray[np.floating]) -> npt.NDArray[np.floating]:
+        return self.matrix @ temps - self.offset
+
+
+def build_switching_surfaces(
+    arrays: ArrayArchitecture,
+    environment: EnvironmentalConditions,
+    static_controls: bool = False,
+) -> SwitchingSurfaces:
+    """
+    Collects the switching surfaces which can actually change the RHS; heaters
+    without power, louvers on unlit or louver-less components and plain links
+    are left out
+
+    Heaters with a control law have no surface, their controller states set
+    their output. With `static_controls` (no controller states, see
+    `control.controlled_heater_outputs`) the relays and laws with integral
+    action get one like an ideal thermostat.
+    """
+    num_components = arrays.num_components
+    links = arrays.links
+
+    rows, cols, coefficients, offsets, nodes = [], [], [], [], []
+    existing = {}
+
+    def add_surface(entries, offset):
+        key = (tuple(entries), offset)
+        if key in existing:
+            return existing[key]
+
+        surface = len(offsets)
+        for component, coefficient in entries:
+            rows.append(surface)
+            cols.append(component)
+            coefficients.append(coefficient)
+        offsets.append(offset)
+        nodes.append(entries[0][0] if len(entries) == 1 else -1)
+
+        existing[key] = surface
+        return surface
+
+    # Heaters and louvers
+    lit = np.broadcast_to(
+        peak_incident_radiation_fluxes(arrays, environment) > 0, (num_components,)
+    )
+    louvered = (arrays.louver_attenuation != 1) & lit
+    thermostats = arrays.heater_power != 0
+    if arrays.controls is not None:
+        controls = arrays.controls
+        controlled = controls.components
+        if static_controls:
+            controlled = controlled[controls.proportional]
+        thermostats[controlled] = False
+    node_index = np.flatnonzero(thermostats | louvered)
+    node_surfaces = np.array(
+        [add_surface([(i, 1.0)], arrays.heater_set_temp[i]) for i in node_index],
+        dtype=np.intp,
+    )
+
+    # Thermal switches
+    switched = links.attenuated_conductance != links.conductance
+    if isinstance(links, DenseLinks):
+        link_index = np.nonzero(switched)
+        self_nodes, other_nodes = link_index
+    else:
+        link_index = (np.flatnonzero(switched),)
+        self_nodes = links.rows[link_index]
+        other_nodes = links.cols[link_index]
+
+    heat_limits = links.heat_limit[link_index]
+    cool_limits = links.cool_limit[link_index]
+
+    direction_surfaces, hot_surfaces, cold_surfaces = [], [], []
+    for self_node, other_node, heat_limit, cool_limit in zip(
+        self_nodes, other_nodes, heat_limits, cool_limits
+    ):
+        direction_surfaces.append(
+            add_surface([(other_node, 1.0), (self_node, -1.0)], 0.0)
+        )
+        hot_surfaces.append(
+            add_surface([(self_node, 1.0)], heat_limit)
+            if np.isfinite(heat_limit)
+            else -1
+        )
+        cold_surfaces.append(
+            add_surface([(self_node, 1.0)], cool_limit)
+            if np.isfinite(cool_limit)
+            else -1
+        )
+
+    return SwitchingSurfaces(
+        matrix=sparse.csr_matrix(
+            (coefficients, (rows, cols)), shape=(len(offsets), num_components)
+        ),
+        offset=np.array(offsets, dtype=float),
+        nodes=np.array(nodes, dtype=np.intp),
+        lit=lit,
+        node_index=node_index,
+        node_surfaces=node_surfaces,
+        link_index=link_index,
+        direction_surfaces=np.array(direction_surfaces, dtype=np.intp),
+        hot_surfaces=np.array(hot_surfaces, dtype=np.intp),
+        cold_surfaces=np.array(cold_surfaces, dtype=np.intp),
+    )
+
+
+def modes_from_sides(
+    sides: npt.NDArray[np.floating],
+    surfaces: SwitchingSurfaces,
+    arrays: ArrayArchitecture,
+    environment: EnvironmentalConditions,
+) -> SwitchingModes:
+    """
+    Converts the side of every switching surface (1 = above, 0 = below, in
+    between while sliding along it) into heater, louver and switch states,
+    using the same rules as `thermal_ode`
+    """
+    num_components = arrays.num_components
+
+    # Heater on below its set temp, louver closed above it
+    # (components without a surface have nothing to switch)
+    hot_node = np.zeros(num_components)
+    hot_node[surfaces.node_index] = sides[surfaces.node_surfaces]
+
+    heater_on = 1 - hot_node
+    louver_closed = hot_node * surfaces.lit
+
+    # Switch attenuated when heated above its heat limit or cooled below its
+    # cool limit
+    def side(indices, default):
+        return np.where(indices >= 0, sides[indices], default)
+
+    heating = sides[surfaces.direction_surfaces]
+    above_heat_limit = side(surfaces.hot_surfaces, 0.0)
+    above_cool_limit = side(surfaces.cold_surfaces, 1.0)
+
+    attenuated = np.zeros(arrays.links.conductance.shape)
+    attenuated[surfaces.link_index] = heating * above_heat_limit + (1 - heating) * (
+        1 - above_cool_limit
+    )
+
+    return SwitchingModes(
+        heater_on=heater_on, louver_closed=louver_closed, attenuated=attenuated
+    )
+
+
+def duty_fractions(
+    fun,
+    t: float,
+    y: npt.NDArray[np.floating],
+    sides: npt.NDArray[np.floating],
+    candidates: npt.NDArray[np.bool_],
+    surfaces: SwitchingSurfaces,
+    arrays: ArrayArchitecture,
+    environment: EnvironmentalConditions,
+):
+    """
+    Blend of the two sides of each candidate surface which zeroes the heat flow
+    of its component; each surface only affects its own component
+
+    Returns the fractions and the flows of those components below and above
+    their surfaces.
+    """
+    below = np.where(candidates, 0.0, sides)
+    above = np.where(candidates, 1.0, sides)
+    components = surfaces.nodes[candidates]
+    modes_below = modes_from_sides(below, surfaces, arrays, environment)
+    modes_above = modes_from_sides(above, surfaces, arrays, environment)
+    flux_below = fun(t, y, arrays, environment, modes_below)[components]
+    flux_above = fun(t, y, arrays, environment, modes_above)[components]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fractions = flux_below / (flux_below - flux_above)
+
+    return fractions, flux_below, flux_above
+
+
+def blend_sides(
+    fun,
+    t: float,
+    y: npt.NDArray[np.floating],
+    sides: npt.NDArray[np.floating],
+    sliding: npt.NDArray[np.bool_],
+    surfaces: SwitchingSurfaces,
+    arrays: ArrayArchitecture,
+    environment: EnvironmentalConditions,
+) -> npt.NDArray[np.floating]:
+    """
+    Returns the sides with the sliding surfaces replaced by their duty fractions
+    """
+    if not sliding.any():
+        return sides
+
+    fractions, _, _ = duty_fractions(
+        fun, t, y, sides, sliding, surfaces, arrays, environment
+    )
+    return np.where(sliding, 0.0, sides) + np.bincount(
+        np.flatnonzero(sliding),
+        np.clip(np.nan_to_num(fractions), 0, 1),
+        minlength=len(sides),
+    )
+
+
+def integrate_event_driven(
+    fun,
+    jac,
+    y0: npt.NDArray[np.floating],
+    t_span: tuple[float, float],
+    arrays: ArrayArchitecture,
+    environment: EnvironmentalConditions,
+    method: str = "RK45",
+    rtol: float = 1e-3,
+    atol: float = 1e-2,
+    hysteresis: float = 0.01,
+    max_events: int = 100000,
+    dense_output: bool = False,
+    equilibrium=None,
+) -> OptimizeResult:
+    """
+    Integrates the thermal ODE with every switching surface registered as a
+    `solve_ivp` event
+
+    The heater, louver and switch modes are frozen between events, so each
+    segment sees a smooth RHS. When a surface is crossed the integration stops,
+    that surface's mode is flipped and the integrator restarts from the event
+    state.
+
+    When the dynamics push back towards a T_i = const surface from both sides
+    (e.g. a heater which heats above its set point but cools below it once off),
+    the component slides along it instead of chattering: its temperature is
+    held and the modes of that surface are blended with the duty fraction that
+    balances its heat flow. Sliding ends when that fraction reaches 0 or 1.
+    Direction surfaces (T_other = T_self) only flip back after being crossed by
+    `hysteresis` (K).
+
+    Parameters
+    ----------
+    fun: callable
+        RHS with signature fun(t, y, arrays, environment, modes)
+    jac: callable | None
+        Jacobian with the same signature, used by implicit methods
+    y0: npt.NDArray[np.floating]
+        initial state, component temperatures first
+    t_span: tuple[float, float]
+        integration interval (s)
+    arrays: ArrayArchitecture
+        spacecraft thermal architecture in array form, compiled without smoothing
+    environment: EnvironmentalConditions
+        environmental conditions surrounding the spacecraft
+    method, rtol, atol
+        passed to `solve_ivp`
+    hysteresis: float
+        K, distance past a direction surface needed to flip it back
+    max_events: int
+        abort after this many switching events
+    dense_output: bool
+        join the segments' dense outputs into `sol`
+    equilibrium: EquilibriumDetector | None
+        stops the integration once it fires, fed the blended modes, see
+        `equilibrium.EquilibriumDetector`
+
+    Returns
+    -------
+    OptimizeResult
+        same fields as a `solve_ivp` solution plus `t_switches`, the times of
+        the switching events, and `segment_sides`/`segment_sliding`, the sides
+        and sliding surfaces between them (see `blend_sides`)
+    """
+    num_components = arrays.num_components
+    surfaces = build_switching_surfaces(arrays, environment)
+    node_surface = surfaces.nodes >= 0
+    thresholds = np.where(node_surface, SURFACE_TOLERANCE, hysteresis)
+
+    extra_nfev = 0
+
+    def counted(t, y, arrays, environment, modes):
+        nonlocal extra_nfev
+        extra_nfev += 1
+        return fun(t, y, arrays, environment, modes)
+
+    def fractions_at(t, y, sides, candidates):
+        return duty_fractions(
+            counted, t, y, sides, candidates, surfaces, arrays, environment
+        )
+
+    def start_sliding(t, y, candidates):
+        # Slide along surfaces approached from both sides (or balanced on one)
+        if candidates.any():
+            _, flux_below, flux_above = fractions_at(t, y, sides, candidates)
+            sliding[candidates] = (
+                (flux_below >= 0) & (flux_above <= 0) & (flux_below > flux_above)
+            )
+
+    def blended_sides(t, y):
+        return blend_sides(
+            counted, t, y, sides, sliding, surfaces, arrays, environment
+        )
+
+    def rhs(t, y, *args):
+        return fun(
+            t,
+            y,
+            arrays,
+            environment,
+            modes_from_sides(blended_sides(t, y), surfaces, arrays, environment),
+        )
+
+    def rhs_jacobian(t, y, *args):
+        modes = modes_from_sides(blended_sides(t, y), surfaces, arrays, environment)
+        jacobian = jac(t, y, arrays, environment, modes)
+
+        if not sliding.any():
+            return jacobian
+
+        # Sliding components are held on their surface
+        held = np.ones(len(y))
+        held[surfaces.nodes[sliding]] = 0
+
+        if sparse.issparse(jacobian):
+            return sparse.diags(held) @ jacobian
+
+        return held[:, None] * jacobian
+
+    def distances(t, y):
+        values = surfaces.values(y[:num_components])
+        distance = np.where(sides > 0.5, values + thresholds, thresholds - values)
+
+        if sliding.any():
+            fractions, _, _ = fractions_at(t, y, sides, sliding)
+            distance[sliding] = np.minimum(fractions, 1 - fractions)
+
+        return distance
+
+    def crossing(t, y, *args):
+        # Distance to the nearest mode change, goes negative when one happens.
+        # Surfaces left marginally on the wrong side by the last event are
+        # measured from where they started so they can't mask other crossings.
+        return np.min(distances(t, y) - start_offsets, initial=np.inf)
+
+    crossing.terminal = True
+    crossing.direction = -1
+
+    def settled(t, y, *args):
+        modes = modes_from_sides(blended_sides(t, y), surfaces, arrays, environment)
+        return equilibrium(t, y, modes=modes)
+
+    settled.terminal = True
+    settled.direction = -1
+
+    options = {"jac": rhs_jacobian} if jac is not None else {}
+    events = [crossing] if surfaces.num_surfaces else []
+    if equilibrium is not None:
+        events.append(settled)
+
+    t_segments, y_segments, t_switches = [], [], []
+    segment_sides, segment_sliding, interpolants = [], [], []
+    nfev = njev = nlu = 0
+    t_start, y_start = t_span[0], np.asarray(y0, dtype=float)
+
+    def update_modes(t, y):
+        # Resolve every mode change at the current state, returns whether any
+        # mode changed
+        distance = distances(t, y)
+        at_surface = distance <= SURFACE_TOLERANCE * 1e-2
+
+        leaving = at_surface & sliding
+        if leaving.any():
+            fractions, _, _ = fractions_at(t, y, sides, leaving)
+            sides[leaving] = np.round(np.clip(np.nan_to_num(fractions), 0, 1))
+            sliding[leaving] = False
+
+        # Only surfaces which the state is moving through are crossed
+        arriving = at_surface & ~leaving
+        if arriving.any():
+            rates = surfaces.matrix @ rhs(t, y)[:num_components]
+            crossed = arriving & (np.where(sides > 0.5, rates, -rates) < 0)
+            sides[crossed] = 1 - sides[crossed]
+            start_sliding(t, y, crossed & node_surface)
+        else:
+            crossed = arriving
+
+        return leaving.any() or crossed.any()
+
+    sides = (surfaces.values(y_start[:num_components]) > 0).astype(float)
+    sliding = np.zeros(surfaces.num_surfaces, dtype=bool)
+    update_modes(t_start, y_start)
+
+    while True:
+        start_offsets = np.minimum(distances(t_start, y_start), 0)
+
+        sol = solve_ivp(
+            rhs,
+            (t_start, t_span[1]),
+            y_start,
+            method=method,
+            rtol=rtol,
+            atol=atol,
+            events=events or None,
+            dense_output=dense_output,
+            **options,
+        )
+
+        segment_sides.append(sides.copy())
+        segment_sliding.append(sliding.copy())
+
+        nfev += sol.nfev
+        njev += sol.njev
+        nlu += sol.nlu
+
+        # Drop the restart point, it duplicates the end of the last segment. An
+        # event right at the restart adds no step.
+        steps = len(sol.t) - 1 if sol.t[-1] > t_start else 0
+        first = 1 if t_segments else 0
+        t_segments.append(sol.t[first : steps + 1])
+        y_segments.append(sol.y[:, first : steps + 1])
+        if dense_output:
+            interpolants.extend(sol.sol.interpolants[:steps])
+
+        if sol.status != 1 or equilibrium is not None and len(sol.t_events[-1]):
+            break
+
+        if len(t_switches) >= max_events:
+            sol.status = -1
+            sol.message = f"Exceeded {max_events} switching events."
+            break
+
+        t_start, y_start = sol.t[-1], sol.y[:, -1]
+        t_switches.append(t_start)
+
+        if not update_modes(t_start, y_start):
+            # Nothing is moving through a surface, the state only reached the
+            # threshold of some (grazing it, or stalled on it after sliding).
+            # The root is located to within solve_ivp's tolerance, so those are
+            # the surfaces whose guard is within SURFACE_TOLERANCE of zero;
+            # mirrored link surfaces reach theirs together.
+            reached = ~sliding & (
+                distances(t_start, y_start) - start_offsets <= SURFACE_TOLERANCE
+            )
+            if not reached.any():
+                raise RuntimeError(
+                    f"switching event at t = {t_start} s reached no surface"
+                )
+            sides[reached] = 1 - sides[reached]
+
+    t = np.concatenate(t_segments)
+
+    return OptimizeResult(
+        t=t,
+        y=np.concatenate(y_segments, axis=1),
+        sol=OdeSolution(t, interpolants) if dense_output else None,
+        t_switches=np.array(t_switches),
+        segment_sides=np.array(segment_sides).reshape(-1, surfaces.num_surfaces),
+        segment_sliding=np.array(segment_sliding).reshape(-1, surfaces.num_surfaces),
+        nfev=nfev + extra_nfev,
+        njev=njev,
+        nlu=nlu,
+        status=sol.status,
+        message=sol.message,
+        success=sol.status >= 0,
+    )
@@ -1,5 +1,9 @@
+import numpy as np
+import numpy.typing as npt
 from base_classes import ThermalComponent, EnvironmentalConditions, ThermalLink
+from array_architecture import ArrayArchitecture
 from scipy.constants import Stefan_Boltzmann
+from scipy.sparse import csr_matrix, diags
 
 
 def incident_radiation_flux(
@@ -85,3 +89,157 @@ def conduction_flux(
     return thermal_link.get_conductance(component_2.temp, component_1.temp) * (
         component_1.temp - component_2.temp
     )
+
+
+def incident_radiation_fluxes(
+    arrays: ArrayArchitecture,
+    environment: EnvironmentalConditions,
+    t: float | npt.NDArray[np.floating] = 0.0,
+) -> npt.NDArray[np.floating]:
+    """
+    Vectorized `incident_radiation_flux`, returns incident radiation power
+    into every component in W
+
+    Parameters
+    ----------
+    arrays: ArrayArchitecture
+        spacecraft thermal architecture in array form
+    environment: EnvironmentalConditions
+        environmental conditions surrounding the spacecraft
+    t: float | npt.NDArray[np.floating]
+        time (s), only matters for time-varying environments such as
+        `orbit.OrbitEnvironment`; an array of times adds leading axes
+    """
+
+    return (
+        environment.absorbed_flux(t, arrays.illumination_factor)
+        * arrays.rad_area
+        * arrays.emissivity
+    )
+
+
+def peak_incident_radiation_fluxes(
+    arrays: ArrayArchitecture, environment: EnvironmentalConditions
+) -> npt.NDArray[np.floating]:
+    """
+    Returns the largest incident radiation power each component ever receives
+    in W, e.g. to tell which louvers can matter
+    """
+
+    return (
+        environment.peak_absorbed_flux(arrays.illumination_factor)
+        * arrays.rad_area
+        * arrays.emissivity
+    )
+
+
+def space_facing_areas(arrays: ArrayArchitecture) -> npt.NDArray[np.floating]:
+    """
+    Returns the radiative area of every component which radiates to space in
+    m^2: the unlit part, less the part that sees other components
+    """
+    area = arrays.rad_area * (1 - arrays.illumination_factor)
+    if arrays.view_factors is not None:
+        area = area * (1 - arrays.view_factors.sum(axis=-1))
+
+    return area
+
+
+def background_radiation_fluxes(
+    temps: npt.NDArray[np.floating],
+    arrays: ArrayArchitecture,
+    environment: EnvironmentalConditions,
+) -> npt.NDArray[np.floating]:
+    """
+    Vectorized `background_radiation_flux`, returns radiation power from
+    interactions with the background of space for every component in W
+
+    Parameters
+    ----------
+    temps: npt.NDArray[np.floating]
+        component temperatures in K
+    arrays: ArrayArchitecture
+        spacecraft thermal architecture in array form
+    environment: EnvironmentalConditions
+        environmental conditions surrounding the spacecraft
+    """
+
+    return (
+        Stefan_Boltzmann
+        * (environment.background_temp**4 - temps**4)
+        * space_facing_areas(arrays)
+        * arrays.emissivity
+    )
+
+
+def background_radiation_jacobian(
+    temps: npt.NDArray[np.floating],
+    arrays: ArrayArchitecture,
+) -> npt.NDArray[np.floating]:
+    """
+    Returns the derivative of `background_radiation_fluxes` with respect to
+    each component's own temperature, in W/K (the diagonal of the Jacobian)
+
+    Math
+    ----
+    dQ/dT = -4 * (Stefan Boltzmann CNST) * emissivity * A * T**3
+    """
+
+    return (
+        -4
+        * Stefan_Boltzmann
+        * temps**3
+        * space_facing_areas(arrays)
+        * arrays.emissivity
+    )
+
+
+def radiative_exchange_fluxes(
+    temps: npt.NDArray[np.floating],
+    arrays: ArrayArchitecture,
+) -> npt.NDArray[np.floating] | float:
+    """
+    Returns net gray-body radiation power exchanged with the other components
+    into every component in W, 0 without view factors
+
+    Parameters
+    ----------
+    temps: npt.NDArray[np.floating]
+        component temperatures in K, leading axes are batch axes
+    arrays: ArrayArchitecture
+        spacecraft thermal architecture in array form
+
+    Math
+    ----
+    Q_i = (Stefan Boltzmann CNST) * sum_j A_i * script-F_ij * (T_j**4 - T_i**4)
+    """
+    exchange = arrays.radiative_exchange
+    if exchange is None:
+        return 0.0
+
+    emissive_powers = temps**4
+    if isinstance(exchange, np.ndarray):
+        return (exchange @ emissive_powers[..., None])[..., 0]
+
+    return (exchange @ emissive_powers.T).T
+
+
+def radiative_exchange_jacobian(
+    temps: npt.NDArray[np.floating],
+    arrays: ArrayArchitecture,
+) -> npt.NDArray[np.floating] | csr_matrix | None:
+    """
+    Returns dQ_i/dT_j of `radiative_exchange_fluxes`, None without view factors
+
+    Math
+    ----
+    dQ_i/dT_j = 4 * R_ij * T_j**3, R = `ArrayArchitecture.radiative_exchange`
+    """
+    exchange = arrays.radiative_exchange
+    if exchange is None:
+        return None
+
+    if isinstance(exchange, np.ndarray):
+        return exchange * 4 * temps**3
+
+    return (exchange @ diags(4 * temps**3)).tocsr()
@@ -0,0 +1,162 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Iterator
+
+from base_classes import EnvironmentalConditions
+from cache import ResultCache, code_version, result_key
+from case_generation import CaseGroup, group_cases
+from rendering import RenderPipeline
+from report import ReportWriter
+from results import SimulationResult
+from solver import SolverSettings, compile_for
+from spacecraft_prefabs import get_srs
+from store import ResultStore, save_atomic
+from sweep import run_tasks
+
+MANIFEST_FILE = "manifest.json"
+
+
+def case_fingerprint(
+    case_flags: dict,
+    case_name: str,
+    environment: EnvironmentalConditions,
+    settings: SolverSettings,
+    version: str | None = None,
+) -> str:
+    """
+    Returns a hash of everything a stored case depends on: its resolved
+    spacecraft (through `cache.result_key` of the compiled architecture), the
+    environment, the solver settings, the code version, and the component
+    names and labels that end up in the store and figures
+    """
+    spacecraft = get_srs(case_flags)
+    arrays = compile_for(spacecraft, case_flags, settings)
+
+    digest = hashlib.sha256(
+        result_key(arrays, environment, settings, version).encode()
+    )
+    digest.update(
+        json.dumps(
+            [
+                environment.name,
+                case_name,
+                case_flags,
+                [component.name for component in spacecraft.components],
+            ],
+            sort_keys=True,
+        ).encode()
+    )
+
+    return digest.hexdigest()
+
+
+class BuildManifest:
+    """
+    Fingerprint of every case as of its last successful build, by output name,
+    kept as JSON next to the result store
+    """
+
+    def __init__(self, path: str | os.PathLike):
+        self.path = Path(path)
+
+        try:
+            self.fingerprints = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            self.fingerprints = {}
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        save_atomic(
+            self.path,
+            lambda f: f.write(json.dumps(self.fingerprints, indent=2).encode()),
+        )
+
+
+def incremental_sweep(
+    environments: list[EnvironmentalConditions],
+    cases: dict[str, dict],
+    store: ResultStore,
+    settings: SolverSettings | None = None,
+    max_workers: int | None = None,
+    cache: ResultCache | None = None,
+    renderer: RenderPipeline | None = None,
+    report: ReportWriter | None = None,
+) -> Iterator[SimulationResult]:
+    """
+    Re-runs only the environment x case combinations whose inputs changed
+    since the last build
+
+    Each case is fingerprinted (`case_fingerprint`) and compared against the
+    store's manifest. Changed, new and missing cases are solved, written to the
+    store and handed to the renderer; unchanged cases whose figure is missing
+    are only re-rendered. Stale names building the same physics
+    (`case_generation.group_cases`) share one solve. The manifest is updated as
+    cases complete, so an interrupted build resumes where it stopped.
+
+    With a report, the unchanged cases are added to it straight from the store
+    and the re-solved ones as they finish.
+
+    Returns
+    -------
+    Iterator[SimulationResult]
+        the re-solved cases, as they finish
+    """
+    if settings is None:
+        settings = SolverSettings()
+
+    manifest = BuildManifest(store.directory / MANIFEST_FILE)
+    stored = set(store.names())
+    version = code_version()
+
+    # Names building the same physics share one solve when stale together
+    groups = group_cases(cases, settings)
+
+    tasks, fingerprints, stale_groups = [], {}, {}
+    for environment in environments:
+        for group in groups:
+            stale_cases = {}
+            for case_name, case_flags in group.cases.items():
+                name = SimulationResult.output_name_for(environment, case_name)
+                fingerprint = case_fingerprint(
+                    case_flags, case_name, environment, settings, version
+                )
+
+                if name in stored and manifest.fingerprints.get(name) == fingerprint:
+                    if renderer is not None and not renderer.output_path(name).exists():
+                        renderer.submit(name)
+                    if report is not None:
+                        report.add(name)
+                else:
+                    stale_cases[case_name] = case_flags
+                    fingerprints[name] = fingerprint
+
+            if stale_cases:
+                stale = CaseGroup(stale_cases)
+                name = SimulationResult.output_name_for(environment, stale.name)
+                stale_groups[name] = stale
+                tasks.append(
+                    (stale.case_flags, stale.name, environment, settings, cache)
+                )
+
+    try:
+        for solved in run_tasks(tasks, max_workers):
+            for result in stale_groups[solved.output_name].fan_out(solved):
+                store.write(result)
+                if renderer is not None:
+                    renderer.submit(result.output_name)
+                if report is not None:
+                    report.add(result.output_name)
+
+                if result.success:
+                    manifest.fingerprints[result.output_name] = fingerprints[
+                        result.output_name
+                    ]
+                else:
+                    manifest.fingerprints.pop(result.output_name, None)
+                manifest.save()
+
+                yield result
+    finally:
+        manifest.save()
@@ -0,0 +1,402 @@
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+import numpy.typing as npt
+
+from array_architecture import ArrayArchitecture, DenseLinks, switching_fraction
+from base_classes import EnvironmentalConditions
+from control import controlled_heater_outputs, split_state
+from events import build_switching_surfaces
+from heat_transfer import (
+    background_radiation_fluxes,
+    incident_radiation_fluxes,
+    peak_incident_radiation_fluxes,
+    radiative_exchange_fluxes,
+)
+
+# Parts of the RHS timed by `time_flux_terms`; "switching" is the heater,
+# louver and thermal switch decisions and the heater control laws, the T^4
+# terms are "rejected_radiative" and "radiative_exchange"
+FLUX_CATEGORIES = (
+    "switching",
+    "incident_radiative",
+    "rejected_radiative",
+    "radiative_exchange",
+    "conduction",
+)
+
+
+def time_flux_terms(
+    t: float,
+    y: npt.NDArray[np.floating],
+    arrays: ArrayArchitecture,
+    environment: EnvironmentalConditions,
+    modes=None,
+) -> dict[str, float]:
+    """
+    Evaluates each of `FLUX_CATEGORIES` on its own, the same way
+    `odes.component_heat_flows` does, and returns how long each took in s
+    """
+    temps, controller_states = split_state(y, arrays)
+    smoothing = arrays.switch_smoothing
+    timings = {}
+
+    start = time.perf_counter()
+
+    def lap(category):
+        nonlocal start
+        now = time.perf_counter()
+        timings[category] = now - start
+        start = now
+
+    if modes is None:
+        switching_fraction(arrays.heater_set_temp - temps, smoothing)
+        switching_fraction(temps - arrays.heater_set_temp, smoothing)
+        attenuated = arrays.links.attenuated(temps, smoothing)
+    else:
+        attenuated = modes.attenuated
+    if arrays.controls is not None:
+        controlled_heater_outputs(temps, controller_states, arrays)
+    lap("switching")
+
+    incident_radiation_fluxes(arrays, environment, t)
+    lap("incident_radiative")
+
+    background_radiation_fluxes(temps, arrays, environment)
+    lap("rejected_radiative")
+
+    radiative_exchange_fluxes(temps, arrays)
+    lap("radiative_exchange")
+
+    arrays.links.conduction_fluxes(temps, attenuated, smoothing)
+    lap("conduction")
+
+    return timings
+
+
+@dataclass
+class Transitions:
+    """
+    Heater, louver and thermal switch state changes between accepted steps
+
+    Entry k changed to `states[k]` at time `t[k]`, the first accepted step
+    showing the new state (so at step resolution). Heaters are on while below
+    their set temperature, or for heaters with a control law while their
+    output is above half power; switches are identified by the component they
+    conduct into (`components`) and the other end (`others`, -1 otherwise).
+    """
+
+    t: npt.NDArray[np.floating]  # s
+    kinds: npt.NDArray[np.str_]  # "heater", "louver" or "switch"
+    components: npt.NDArray[np.integer]
+    others: npt.NDArray[np.integer]
+    states: npt.NDArray[np.bool_]  # heater on, louver closed, switch attenuated
+
+    def counts(self) -> dict[str, int]:
+        return {
+            kind: int((self.kinds == kind).sum())
+            for kind in ("heater", "louver", "switch")
+        }
+
+
+def find_transitions(
+    t: npt.NDArray[np.floating],
+    y: npt.NDArray[np.floating],
+    arrays: ArrayArchitecture,
+    environment: EnvironmentalConditions,
+) -> Transitions:
+    """
+    Finds the heater, louver and thermal switch transitions along a trajectory
+    from the sides of its switching surfaces, see
+    `events.build_switching_surfaces`
+
+    Parameters
+    ----------
+    t: npt.NDArray[np.floating]
+        s, (T,) accepted step times
+    y: npt.NDArray[np.floating]
+        (states, T) solution at those times
+    arrays: ArrayArchitecture
+        spacecraft thermal architecture in array form
+    environment: EnvironmentalConditions
+        environmental conditions surrounding the spacecraft
+    """
+    surfaces = build_switching_surfaces(arrays, environment)
+    temps, controller_states = split_state(y.T, arrays)
+    above = surfaces.matrix @ temps.T > surfaces.offset[:, None]
+
+    # (entities, T) states of every heater, louver and switch
+    groups = []
+
+    node_above = above[surfaces.node_surfaces]
+    nodes = surfaces.node_index
+    heaters = arrays.heater_power[nodes] != 0
+    if arrays.controls is not None:
+        heaters &= ~np.isin(nodes, arrays.controls.components)
+    groups.append(("heater", nodes[heaters], -1, ~node_above[heaters]))
+
+    if arrays.controls is not None:
+        components, outputs = controlled_heater_outputs(
+            temps, controller_states, arrays
+        )
+        groups.append(("heater", components, -1, outputs.T > 0.5))
+
+    louvered = (arrays.louver_attenuation[nodes] != 1) & (
+        peak_incident_radiation_fluxes(arrays, environment)[nodes] > 0
+    )
+    groups.append(("louver", nodes[louvered], -1, node_above[louvered]))
+
+    links = arrays.links
+    if isinstance(links, DenseLinks):
+        self_nodes, other_nodes = surfaces.link_index
+    else:
+        self_nodes = links.rows[surfaces.link_index]
+        other_nodes = links.cols[surfaces.link_index]
+
+    def side(indices, default):
+        sides = np.full((len(indices), len(t)), default)
+        sides[indices >= 0] = above[indices[indices >= 0]]
+        return sides
+
+    heating = above[surfaces.direction_surfaces]
+    attenuated = np.where(
+        heating,
+        side(surfaces.hot_surfaces, False),
+        ~side(surfaces.cold_surfaces, True),
+    )
+    groups.append(("switch", self_nodes, other_nodes, attenuated))
+
+    t_changes, kinds, components, others, states = [], [], [], [], []
+    for kind, group_components, group_others, group_states in groups:
+        entity, step = np.nonzero(group_states[:, 1:] != group_states[:, :-1])
+        t_changes.append(t[step + 1])
+        kinds.append(np.full(len(step), kind))
+        components.append(np.asarray(group_components)[entity])
+        others.append(np.broadcast_to(group_others, np.shape(group_components))[entity])
+        states.append(group_states[entity, step + 1])
+
+    order = np.argsort(np.concatenate(t_changes), kind="stable")
+
+    return Transitions(
+        t=np.concatenate(t_changes)[order],
+        kinds=np.concatenate(kinds)[order].astype(str),
+        components=np.concatenate(components)[order].astype(np.intp),
+        others=np.concatenate(others)[order].astype(np.intp),
+        states=np.concatenate(states)[order].astype(bool),
+    )
+
+
+@dataclass
+class SolverProfile:
+    """
+    What an instrumented integration spent its time on, see `SolverProbe`
+    """
+
+    rhs_calls: int
+    rhs_time: float  # s
+    jacobian_calls: int
+    jacobian_time: float  # s
+    # s per RHS call of each of `FLUX_CATEGORIES`, averaged over the sampled calls
+    flux_times: dict[str, float]
+    flux_samples: int
+    step_times: npt.NDArray[np.floating]  # s, end of every accepted step
+    step_sizes: npt.NDArray[np.floating]  # s
+    transitions: Transitions
+    solve_time: float = 0.0  # s, wall clock of the whole integration
+    component_names: list[str] = field(default_factory=list)
+
+    def _component_name(self, index: int) -> str:
+        if index < len(self.component_names):
+            return self.component_names[index]
+        return f"Component {index}"
+
+    def step_size_stats(self) -> dict[str, float]:
+        # s, smallest, median and largest accepted step
+        if not len(self.step_sizes):
+            return {}
+
+        return {
+            "min": float(self.step_sizes.min()),
+            "median": float(np.median(self.step_sizes)),
+            "max": float(self.step_sizes.max()),
+        }
+
+    def to_dict(self) -> dict:
+        """
+        Summary numbers and the transitions, for JSON
+        """
+        return {
+            "rhs_calls": self.rhs_calls,
+            "rhs_time": self.rhs_time,
+            "jacobian_calls": self.jacobian_calls,
+            "jacobian_time": self.jacobian_time,
+            "flux_times": self.flux_times,
+            "flux_samples": self.flux_samples,
+            "num_steps": len(self.step_sizes),
+            "step_sizes": self.step_size_stats(),
+            "solve_time": self.solve_time,
+            "transition_counts": self.transitions.counts(),
+            "transitions": {
+                "t": self.transitions.t.tolist(),
+                "kinds": self.transitions.kinds.tolist(),
+                "components": self.transitions.components.tolist(),
+                "others": self.transitions.others.tolist(),
+                "states": self.transitions.states.tolist(),
+            },
+        }
+
+    def summary(self) -> str:
+        """
+        Returns a short text report: where the RHS time went, step sizes and
+        the most frequently switching heaters, louvers and switches
+        """
+        lines = [
+            f"RHS: {self.rhs_calls} calls, {self.rhs_time:.3f} s"
+            f" ({1e6 * self.rhs_time / max(self.rhs_calls, 1):.1f} us/call)",
+            f"Jacobian: {self.jacobian_calls} calls, {self.jacobian_time:.3f} s",
+        ]
+
+        if self.flux_samples:
+            total = sum(self.flux_times.values())
+            lines.append(
+                f"Flux terms ({self.flux_samples} sampled calls): "
+                + ", ".join(
+                    f"{category} {100 * seconds / total:.0f}%"
+                    for category, seconds in sorted(
+                        self.flux_times.items(), key=lambda item: -item[1]
+                    )
+                )
+            )
+
+        if len(self.step_sizes):
+            lines.append(
+                f"Steps: {len(self.step_sizes)} accepted, size "
+                + ", ".join(
+                    f"{name} {size:.3g} s"
+                    for name, size in self.step_size_stats().items()
+                )
+            )
+
+        transitions = self.transitions
+        lines.append(
+            f"Transitions: {len(transitions.t)} ("
+            + ", ".join(
+                f"{count} {kind}" for kind, count in transitions.counts().items()
+            )
+            + ")"
+        )
+
+        # Chattering shows up as many transitions of one entity
+        if len(transitions.t):
+            entities, counts = np.unique(
+                np.stack(
+                    (
+                        np.unique(transitions.kinds, return_inverse=True)[1],
+                        transitions.components,
+                        transitions.others,
+                    )
+                ),
+                axis=1,
+                return_counts=True,
+            )
+            kind_names = np.unique(transitions.kinds)
+            for (kind, component, other), count in sorted(
+                zip(entities.T, counts), key=lambda item: -item[1]
+            )[:3]:
+                name = f"{kind_names[kind]} {self._component_name(component)}"
+                if other >= 0:
+                    name += f" <- {self._component_name(other)}"
+                lines.append(f"  {name}: {count} transitions")
+
+        return "\n".join(lines)
+
+
+class SolverProbe:
+    """
+    Opt-in instrumentation of one integration
+
+    `wrap_rhs`/`wrap_jacobian` count and time the calls `solve_ivp` makes, and
+    every `flux_sample_interval`-th RHS call additionally times the flux
+    categories separately with `time_flux_terms`. Nothing is touched unless a
+    probe is passed to `solver.integrate`.
+    """
+
+    def __init__(
+        self,
+        arrays: ArrayArchitecture,
+        environment: EnvironmentalConditions,
+        flux_sample_interval: int = 50,
+    ):
+        self.arrays = arrays
+        self.environment = environment
+        self.flux_sample_interval = flux_sample_interval
+
+        self.rhs_calls = 0
+        self.rhs_time = 0.0
+        self.jacobian_calls = 0
+        self.jacobian_time = 0.0
+        self.flux_times = dict.fromkeys(FLUX_CATEGORIES, 0.0)
+        self.flux_samples = 0
+
+    def wrap_rhs(self, fun):
+        def rhs(t, y, *args):
+            self.rhs_calls += 1
+
+            if self.rhs_calls % self.flux_sample_interval == 0:
+                modes = args[2] if len(args) > 2 else None
+                timings = time_flux_terms(t, y, self.arrays, self.environment, modes)
+                for category, seconds in timings.items():
+                    self.flux_times[category] += seconds
+                self.flux_samples += 1
+
+            start = time.perf_counter()
+            result = fun(t, y, *args)
+            self.rhs_time += time.perf_counter() - start
+
+            return result
+
+        return rhs
+
+    def wrap_jacobian(self, jac):
+        if jac is None:
+            return None
+
+        def jacobian(t, y, *args):
+            self.jacobian_calls += 1
+
+            start = time.perf_counter()
+            result = jac(t, y, *args)
+            self.jacobian_time += time.perf_counter() - start
+
+            return result
+
+        return jacobian
+
+    def report(
+        self, sol, solve_time: float = 0.0, component_names: list[str] | None = None
+    ) -> SolverProfile:
+        """
+        Combines the counters with the step sizes and state transitions of the
+        finished solution
+        """
+        step_sizes = np.diff(sol.t)
+        # Event-driven solutions repeat the time of every switching event
+        steps = step_sizes > 0
+
+        return SolverProfile(
+            rhs_calls=self.rhs_calls,
+            rhs_time=self.rhs_time,
+            jacobian_calls=self.jacobian_calls,
+            jacobian_time=self.jacobian_time,
+            flux_times={
+                category: seconds / max(self.flux_samples, 1)
+                for category, seconds in self.flux_times.items()
+            },
+            flux_samples=self.flux_samples,
+            step_times=sol.t[1:][steps],
+            step_sizes=step_sizes[steps],
+            transitions=find_transitions(sol.t, sol.y, self.arrays, self.environment),
+            solve_time=solve_time,
+            component_names=list(component_names or []),
+        )
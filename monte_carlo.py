@@ -0,0 +1,484 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field, replace
+
+import numpy as np
+import numpy.typing as npt
+
+from array_architecture import (
+    ArrayArchitecture,
+    DenseLinks,
+    compile_architecture,
+    radiative_exchange_matrix,
+)
+from base_classes import EnvironmentalConditions, ThermalArchitecture
+from ensemble import integrate_ensemble
+
+# `ThermalComponent` fields and the `ArrayArchitecture` array they end up in.
+# mass and shc only enter through the thermal inertia, so they can only be
+# scaled.
+COMPONENT_FIELDS = {
+    "mass": "thermal_inertia",
+    "shc": "thermal_inertia",
+    "rad_area": "rad_area",
+    "emissivity": "emissivity",
+    "temp": "initial_temps",
+    "illumination_factor": "illumination_factor",
+    "innate_power": "innate_power",
+    "heater_power": "heater_power",
+    "heater_set_temp": "heater_set_temp",
+}
+
+
+@dataclass
+class Uniform:
+    low: float
+    high: float
+
+    def sample(self, rng: np.random.Generator, size) -> npt.NDArray[np.floating]:
+        return rng.uniform(self.low, self.high, size)
+
+
+@dataclass
+class Normal:
+    mean: float
+    std: float
+
+    def sample(self, rng: np.random.Generator, size) -> npt.NDArray[np.floating]:
+        return rng.normal(self.mean, self.std, size)
+
+
+@dataclass
+class LogNormal:
+    median: float
+    sigma: float  # standard deviation of the underlying normal
+
+    def sample(self, rng: np.random.Generator, size) -> npt.NDArray[np.floating]:
+        return rng.lognormal(np.log(self.median), self.sigma, size)
+
+
+@dataclass
+class Triangular:
+    low: float
+    mode: float
+    high: float
+
+    def sample(self, rng: np.random.Generator, size) -> npt.NDArray[np.floating]:
+        return rng.triangular(self.low, self.mode, self.high, size)
+
+
+@dataclass
+class ParameterUncertainty:
+    """
+    Distribution of one uncertain parameter
+
+    `parameter` is a `ThermalComponent` field (see `COMPONENT_FIELDS`, heater
+    fields as heater_power/heater_set_temp), "conductance" for `ThermalLink`
+    conductances or "incident_radiative_flux" for the environment. Samples
+    multiply the nominal value when `relative` is set, otherwise they replace
+    it.
+    """
+
+    parameter: str
+    distribution: Uniform | Normal | LogNormal | Triangular
+    # component indices, or (i, j) pairs for conductances; None = all of them
+    targets: list | None = None
+    relative: bool = True
+    # one draw per sample shared by every target, e.g. a common MLI emissivity
+    correlated: bool = False
+
+    def __post_init__(self):
+        known = {"conductance", "incident_radiative_flux"} | set(COMPONENT_FIELDS)
+        if self.parameter not in known:
+            raise ValueError(f"unknown uncertain parameter {self.parameter!r}")
+
+        if self.parameter in ("mass", "shc") and not self.relative:
+            raise ValueError(f"{self.parameter} uncertainties must be relative")
+
+    def sample(self, rng: np.random.Generator, num_samples: int, num_targets: int):
+        if self.correlated:
+            return np.repeat(
+                self.distribution.sample(rng, (num_samples, 1)), num_targets, axis=1
+            )
+
+        return self.distribution.sample(rng, (num_samples, num_targets))
+
+
+def sample_members(
+    nominal: ArrayArchitecture,
+    environment: EnvironmentalConditions,
+    uncertainties: list[ParameterUncertainty],
+    rng: np.random.Generator,
+    num_samples: int,
+) -> tuple[ArrayArchitecture, EnvironmentalConditions]:
+    """
+    Draws `num_samples` perturbed copies of a compiled architecture, stacked for
+    `integrate_ensemble`, and their environments
+
+    Uncertainties are sampled in order, so the same generator state always
+    gives the same members.
+    """
+    num_components = nominal.num_components
+
+    def stacked(values):
+        return np.repeat(np.asarray(values, dtype=float)[None], num_samples, axis=0)
+
+    arrays = {
+        name: stacked(getattr(nominal, name))
+        for name in set(COMPONENT_FIELDS.values()) | {"louver_attenuation", "active_power"}
+    }
+    links = {
+        name: stacked(getattr(nominal.links, name))
+        for name in DenseLinks.__dataclass_fields__
+    }
+    flux = np.full((num_samples, 1), float(environment.incident_radiative_flux))
+
+    for uncertainty in uncertainties:
+        if uncertainty.parameter == "incident_radiative_flux":
+            draws = uncertainty.sample(rng, num_samples, 1)
+            flux = flux * draws if uncertainty.relative else draws
+
+        elif uncertainty.parameter == "conductance":
+            pairs = uncertainty.targets
+            if pairs is None:
+                upper = np.triu(nominal.links.conductance) > 0
+                pairs = list(zip(*np.nonzero(upper)))
+
+            rows = np.array([i for i, _ in pairs], dtype=int)
+            cols = np.array([j for _, j in pairs], dtype=int)
+            draws = uncertainty.sample(rng, num_samples, len(pairs))
+
+            # Links are symmetric, both directions get the same draw
+            for name in ("conductance", "attenuated_conductance"):
+                values = links[name]
+                for i, j in ((rows, cols), (cols, rows)):
+                    if uncertainty.relative:
+                        values[:, i, j] *= draws
+                    else:
+                        ratio = np.divide(
+                            values[:, i, j],
+                            links["conductance"][:, i, j],
+                            out=np.ones_like(draws),
+                            where=links["conductance"][:, i, j] != 0,
+                        )
+                        values[:, i, j] = draws * (
+                            ratio if name == "attenuated_conductance" else 1
+                        )
+
+        else:
+            targets = (
+                np.arange(num_components)
+                if uncertainty.targets is None
+                else np.asarray(uncertainty.targets, dtype=int)
+            )
+            draws = uncertainty.sample(rng, num_samples, len(targets))
+            values = arrays[COMPONENT_FIELDS[uncertainty.parameter]]
+
+            if uncertainty.relative:
+                values[:, targets] *= draws
+            else:
+                values[:, targets] = draws
+
+    if nominal.view_factors is not None:
+        # Gray-body exchange depends on the sampled areas and emissivities
+        arrays["view_factors"] = stacked(nominal.view_factors)
+        arrays["radiative_exchange"] = radiative_exchange_matrix(
+            arrays["rad_area"], arrays["emissivity"], nominal.view_factors
+        )
+
+    members = replace(nominal, **arrays, links=DenseLinks(**links))
+
+    return members, replace(environment, incident_radiative_flux=flux)
+
+
+@dataclass
+class TemperatureHistogram:
+    """
+    Fixed-bin histogram of every component temperature at every output time
+
+    Memory depends only on the bins, never on the number of samples, and
+    histograms of separate chunks are merged by adding them, so percentiles
+    don't depend on how the samples were split up.
+    """
+
+    low: float  # K
+    high: float  # K
+    resolution: float  # K, bin width
+    counts: npt.NDArray[np.int64]  # (N, T, bins)
+    total: npt.NDArray[np.floating]  # (N, T), sum of temperatures
+    minimum: npt.NDArray[np.floating]  # (N, T)
+    maximum: npt.NDArray[np.floating]  # (N, T)
+    num_samples: int = 0
+    num_failed: int = 0  # samples whose integration didn't finish
+    num_out_of_range: int = 0  # temperatures counted in the edge bins
+
+    @classmethod
+    def empty(
+        cls,
+        num_components: int,
+        num_times: int,
+        low: float = 0.0,
+        high: float = 1000.0,
+        resolution: float = 0.25,
+    ) -> "TemperatureHistogram":
+        num_bins = int(np.ceil((high - low) / resolution))
+        return cls(
+            low=low,
+            high=high,
+            resolution=resolution,
+            counts=np.zeros((num_components, num_times, num_bins), dtype=np.int64),
+            total=np.zeros((num_components, num_times)),
+            minimum=np.full((num_components, num_times), np.inf),
+            maximum=np.full((num_components, num_times), -np.inf),
+        )
+
+    @property
+    def num_bins(self) -> int:
+        return self.counts.shape[-1]
+
+    def add(self, temps: npt.NDArray[np.floating]):
+        """
+        Adds an (M, N, T) block of sampled temperatures
+        """
+        num_components, num_times, num_bins = self.counts.shape
+
+        bins = np.floor((temps - self.low) / self.resolution).astype(np.int64)
+        self.num_out_of_range += int(np.count_nonzero((bins < 0) | (bins >= num_bins)))
+        bins = np.clip(bins, 0, num_bins - 1)
+
+        cells = np.arange(num_components * num_times).reshape(num_components, num_times)
+        self.counts += np.bincount(
+            (cells * num_bins + bins).ravel(), minlength=self.counts.size
+        ).reshape(self.counts.shape)
+
+        self.total += temps.sum(axis=0)
+        self.minimum = np.minimum(self.minimum, temps.min(axis=0))
+        self.maximum = np.maximum(self.maximum, temps.max(axis=0))
+        self.num_samples += temps.shape[0]
+
+    def merge(self, other: "TemperatureHistogram"):
+        self.counts += other.counts
+        self.total += other.total
+        self.minimum = np.minimum(self.minimum, other.minimum)
+        self.maximum = np.maximum(self.maximum, other.maximum)
+        self.num_samples += other.num_samples
+        self.num_failed += other.num_failed
+        self.num_out_of_range += other.num_out_of_range
+
+    @property
+    def mean(self) -> npt.NDArray[np.floating]:
+        return self.total / max(self.num_samples, 1)
+
+    def percentiles(self, q) -> npt.NDArray[np.floating]:
+        """
+        Returns the (len(q), N, T) percentile temperatures, interpolated within
+        the bins
+        """
+        q = np.atleast_1d(np.asarray(q, dtype=float)) / 100
+        cumulative = np.cumsum(self.counts, axis=-1)
+        edges = self.low + self.resolution * np.arange(self.num_bins + 1)
+
+        result = np.empty((len(q),) + self.counts.shape[:-1])
+        for k, fraction in enumerate(q):
+            rank = fraction * self.num_samples
+            # First bin whose cumulative count reaches the rank
+            index = np.minimum((cumulative < rank).sum(axis=-1), self.num_bins - 1)
+            below = np.where(
+                index > 0,
+                np.take_along_axis(cumulative, np.maximum(index - 1, 0)[..., None], -1)[
+                    ..., 0
+                ],
+                0,
+            )
+            in_bin = np.take_along_axis(self.counts, index[..., None], -1)[..., 0]
+            position = np.divide(
+                rank - below, in_bin, out=np.zeros(index.shape), where=in_bin > 0
+            )
+            result[k] = edges[index] + np.clip(position, 0, 1) * self.resolution
+
+        # Never report beyond the observed range
+        return np.clip(result, self.minimum, self.maximum)
+
+
+@dataclass
+class MonteCarloResult:
+    t: npt.NDArray[np.floating]  # s, (T,) output times
+    percentiles: npt.NDArray[np.floating]  # (P,) requested percentiles
+    envelopes: npt.NDArray[np.floating]  # K, (P, N, T) percentile temperatures
+    mean: npt.NDArray[np.floating]  # K, (N, T)
+    minimum: npt.NDArray[np.floating]  # K, (N, T)
+    maximum: npt.NDArray[np.floating]  # K, (N, T)
+    histogram: TemperatureHistogram = field(repr=False)
+
+    @property
+    def num_samples(self) -> int:
+        return self.histogram.num_samples
+
+
+def _run_chunk(
+    nominal: ArrayArchitecture,
+    environment: EnvironmentalConditions,
+    uncertainties: list[ParameterUncertainty],
+    seed: np.random.SeedSequence,
+    num_samples: int,
+    t_eval: npt.NDArray[np.floating],
+    rtol: float,
+    atol: float,
+    histogram_range: tuple[float, float, float],
+) -> TemperatureHistogram:
+    # Worker: samples and integrates one chunk, returning only its histogram
+    members, member_environment = sample_members(
+        nominal, environment, uncertainties, np.random.default_rng(seed), num_samples
+    )
+    sol = integrate_ensemble(
+        members,
+        member_environment,
+        t_end=t_eval[-1],
+        rtol=rtol,
+        atol=atol,
+        t_eval=t_eval,
+    )
+
+    num_components = nominal.num_components
+    histogram = TemperatureHistogram.empty(
+        num_components, len(t_eval), *histogram_range
+    )
+    histogram.add(sol.y[sol.success, :num_components])
+    histogram.num_failed = int(np.count_nonzero(~sol.success))
+
+    return histogram
+
+
+def run_monte_carlo(
+    spacecraft: ThermalArchitecture,
+    case_flags: dict,
+    environment: EnvironmentalConditions,
+    uncertainties: list[ParameterUncertainty],
+    num_samples: int,
+    seed: int = 0,
+    t_eval: npt.NDArray[np.floating] | None = None,
+    percentiles=(5, 50, 95),
+    chunk_size: int = 500,
+    max_workers: int | None = 1,
+    switch_smoothing: float = 0.0,
+    rtol: float = 1e-3,
+    atol: float = 1e-2,
+    histogram_range: tuple[float, float, float] = (0.0, 1000.0, 0.25),
+) -> MonteCarloResult:
+    """
+    Propagates parameter uncertainties through the thermal model, giving
+    percentile temperature envelopes per component
+
+    Samples are drawn and integrated in chunks of `chunk_size` members with
+    `integrate_ensemble`, in parallel when `max_workers` > 1. Chunk k always
+    uses the k-th child of `SeedSequence(seed)`, so results depend only on the
+    seed and chunk size, not on the number of workers. Each chunk is reduced to
+    a fixed-size histogram straight away, and at most two chunks per worker
+    are running or waiting to be merged, keeping memory bounded for any
+    number of samples.
+
+    Parameters
+    ----------
+    spacecraft: ThermalArchitecture
+        nominal spacecraft thermal architecture
+    case_flags: dict
+        dictionary of case flags
+    environment: EnvironmentalConditions
+        nominal environment
+    uncertainties: list[ParameterUncertainty]
+        uncertain parameters, sampled independently
+    num_samples: int
+        number of Monte Carlo samples
+    seed: int
+        root seed
+    t_eval: npt.NDArray[np.floating] | None
+        s, output times, 101 points up to 1e6 s by default
+    percentiles
+        percentiles (0-100) of the temperature envelopes
+    chunk_size: int
+        samples per ensemble integration
+    max_workers: int | None
+        worker processes, None = all cores
+    switch_smoothing: float
+        K, see `compile_architecture`
+    rtol, atol
+        integrator tolerances
+    histogram_range: tuple[float, float, float]
+        K, lowest and highest temperature and bin width of the histograms, i.e.
+        the resolution of the percentiles
+
+    Returns
+    -------
+    MonteCarloResult
+        percentile envelopes, mean, min and max temperatures
+    """
+    if t_eval is None:
+        t_eval = np.linspace(0, 1e6, 101)
+    t_eval = np.asarray(t_eval, dtype=float)
+
+    nominal = compile_architecture(
+        spacecraft, case_flags, switch_smoothing=switch_smoothing
+    )
+
+    chunk_sizes = [chunk_size] * (num_samples // chunk_size)
+    if num_samples % chunk_size:
+        chunk_sizes.append(num_samples % chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+
+    tasks = [
+        (
+            nominal,
+            environment,
+            uncertainties,
+            chunk_seed,
+            size,
+            t_eval,
+            rtol,
+            atol,
+            histogram_range,
+        )
+        for chunk_seed, size in zip(seeds, chunk_sizes)
+    ]
+
+    histogram = TemperatureHistogram.empty(
+        nominal.num_components, len(t_eval), *histogram_range
+    )
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    if max_workers == 1:
+        for task in tasks:
+            histogram.merge(_run_chunk(*task))
+    else:
+        # Chunks are only submitted while fewer than `window` are in flight or
+        # finished but unmerged. Merging in chunk order keeps the sums
+        # independent of which worker finishes first.
+        window = 2 * max_workers
+        running, finished = {}, {}
+        next_task = next_merge = 0
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            while next_merge < len(tasks):
+                while next_task < len(tasks) and len(running) + len(finished) < window:
+                    running[pool.submit(_run_chunk, *tasks[next_task])] = next_task
+                    next_task += 1
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    finished[running.pop(future)] = future.result()
+
+                while next_merge in finished:
+                    histogram.merge(finished.pop(next_merge))
+                    next_merge += 1
+
+    percentiles = np.asarray(percentiles, dtype=float)
+
+    return MonteCarloResult(
+        t=t_eval,
+        percentiles=percentiles,
+        envelopes=histogram.percentiles(percentiles),
+        mean=histogram.mean,
+        minimum=histogram.minimum,
+        maximum=histogram.maximum,
+        histogram=histogram,
+    )
@@ -1,10 +1,29 @@
 import numpy as np
+from scipy import sparse
+
+from array_architecture import (
+    ArrayArchitecture,
+    SwitchingModes,
+    switching_fraction,
+    switching_fraction_derivative,
+)
 from base_classes import ThermalArchitecture, EnvironmentalConditions
+from control import (
+    controlled_heater_outputs,
+    controller_jacobian,
+    controller_rates,
+    split_state,
+)
 
 from heat_transfer import (
     incident_radiation_flux,
     background_radiation_flux,
     conduction_flux,
+    incident_radiation_fluxes,
+    background_radiation_fluxes,
+    background_radiation_jacobian,
+    radiative_exchange_fluxes,
+    radiative_exchange_jacobian,
 )
 
 
@@ -95,3 +114,324 @@ def thermal_ode(
 
     # power draw included in yp
     return yp
+
+
+# Per-component heat flow terms of `component_heat_flows`, in summation order
+HEAT_FLOW_TERMS = (
+    "innate",
+    "heater",
+    "incident_radiative",
+    "rejected_radiative",
+    "radiative_exchange",
+    "conduction",
+    "active_transport",
+)
+
+
+def heater_duty(
+    temps: np.ndarray,
+    arrays: ArrayArchitecture,
+    modes: SwitchingModes | None = None,
+    controller_states: np.ndarray | None = None,
+) -> np.ndarray:
+    """
+    Fraction of its power each heater puts out, on below its set temperature
+    or as its control law says; see `component_heat_flows` for the arguments
+    """
+    if modes is None:
+        heater_on = switching_fraction(
+            arrays.heater_set_temp - temps, arrays.switch_smoothing
+        )
+    else:
+        heater_on = modes.heater_on
+
+    if arrays.controls is not None:
+        columns, outputs = controlled_heater_outputs(temps, controller_states, arrays)
+        heater_on = np.array(np.broadcast_to(heater_on, np.shape(temps)), dtype=float)
+        heater_on[..., columns] = outputs
+
+    return heater_on
+
+
+def component_heat_flows(
+    t: float | np.ndarray,
+    temps: np.ndarray,
+    arrays: ArrayArchitecture,
+    environment: EnvironmentalConditions,
+    modes: SwitchingModes | None = None,
+    controller_states: np.ndarray | None = None,
+) -> dict[str, np.ndarray]:
+    """
+    Splits the heat flow into each component into its terms
+
+    Parameters
+    ----------
+    t: float | np.ndarray
+        time (s), one per batch entry of `temps` when an array
+    temps: np.ndarray
+        temperatures of the components in K, leading axes are batch axes
+    arrays: ArrayArchitecture
+        spacecraft thermal architecture in array form, see `compile_architecture`
+    environment: EnvironmentalConditions
+        environmental conditions surrounding the spacecraft
+    modes: SwitchingModes | None
+        frozen heater/louver/switch states; evaluated from the temperatures
+        when not given
+    controller_states: np.ndarray | None
+        internal states of the heater control laws (see `control`), which
+        then set those heaters' outputs whatever the modes; without them the
+        laws fall back to their equilibrium behaviour
+
+    Returns
+    -------
+    dict[str, np.ndarray]
+        W, flow of every term in `HEAT_FLOW_TERMS` into each component,
+        broadcastable against `temps`
+    """
+    smoothing = arrays.switch_smoothing
+
+    # 1A. Innate power
+    innate_flux = arrays.innate_power
+
+    # 2A. Radiation flux
+    incident_flux = incident_radiation_fluxes(arrays, environment, t)
+    background_flux = background_radiation_fluxes(temps, arrays, environment)
+
+    if modes is None:
+        # hot range based on heater set temp
+        louver_closed = switching_fraction(
+            temps - arrays.heater_set_temp, smoothing
+        ) * (incident_flux > 0)
+        attenuated = None
+    else:
+        louver_closed = modes.louver_closed
+        attenuated = modes.attenuated
+
+    # 1B. Heater input
+    heater_flux = arrays.heater_power * heater_duty(
+        temps, arrays, modes, controller_states
+    )
+
+    # 2B. Louver attenuation
+    incident_flux = incident_flux * (
+        1 - louver_closed * (1 - 1 / arrays.louver_attenuation)
+    )
+
+    # 3. Conduction flux and active transport
+    return {
+        "innate": innate_flux,
+        "heater": heater_flux,
+        "incident_radiative": incident_flux,
+        "rejected_radiative": background_flux,
+        "radiative_exchange": radiative_exchange_fluxes(temps, arrays),
+        "conduction": arrays.links.conduction_fluxes(temps, attenuated, smoothing),
+        "active_transport": arrays.active_power,
+    }
+
+
+def thermal_ode_vectorized(
+    t: float,
+    y: np.ndarray,
+    arrays: ArrayArchitecture,
+    environment: EnvironmentalConditions,
+    modes: SwitchingModes | None = None,
+) -> np.ndarray:
+    """
+    Vectorized equivalent of `thermal_ode` operating on the array form of the
+    spacecraft thermal architecture
+
+    Parameters
+    ----------
+    t: float | np.ndarray
+        time (s), or one time per batch entry
+    y: np.ndarray
+        state vector, temperatures of the components in K, then the controller
+        states when the architecture has heater controls (see
+        `control.initial_state`; left out, the laws act at equilibrium),
+        optionally followed by the four power accumulators used by
+        `thermal_ode`. Leading axes are batch axes, see
+        `ensemble.stack_architectures`.
+    arrays: ArrayArchitecture
+        spacecraft thermal architecture in array form, see `compile_architecture`
+    environment: EnvironmentalConditions
+        environmental conditions surrounding the spacecraft
+    modes: SwitchingModes | None
+        frozen heater/louver/switch states; evaluated from the temperatures
+        when not given
+
+    Returns
+    -------
+    np.ndarray
+        derivative of the state vector, same layout as `thermal_ode`
+
+    Math
+    ----
+    dT/dt = (Q_in - Q_out) / (thermal inertia)
+    """
+    temps, controller_states = split_state(y, arrays)
+    flows = component_heat_flows(
+        t, temps, arrays, environment, modes, controller_states
+    )
+
+    fluxes = sum(flows.values())
+    rates = fluxes / arrays.thermal_inertia
+
+    if controller_states is not None:
+        rates = np.concatenate(
+            (rates, controller_rates(temps, controller_states, arrays)), axis=-1
+        )
+
+    if y.shape[-1] == rates.shape[-1]:
+        return rates
+
+    # power draw included in yp
+    return np.concatenate(
+        (
+            rates,
+            np.stack(
+                [
+                    flows["innate"].sum(axis=-1),
+                    flows["heater"].sum(axis=-1),
+                    flows["incident_radiative"].sum(axis=-1),
+                    flows["rejected_radiative"].sum(axis=-1),
+                ],
+                axis=-1,
+            ),
+        ),
+        axis=-1,
+    )
+
+
+def thermal_jacobian(
+    t: float,
+    y: np.ndarray,
+    arrays: ArrayArchitecture,
+    environment: EnvironmentalConditions,
+    modes: SwitchingModes | None = None,
+) -> np.ndarray | sparse.csr_matrix:
+    """
+    Analytic Jacobian of `thermal_ode_vectorized`
+
+    Hard switches, heaters and louvers are piecewise constant in the
+    temperatures, so away from their thresholds they contribute nothing; the
+    same holds for the (constant) active transport and innate power terms. What
+    is left is the conduction network and the linearized T^4 background
+    radiation and radiative exchange between components, plus the ramp
+    derivatives when `arrays.switch_smoothing` is set. Heater control laws add
+    the derivatives of their outputs and of their controller states.
+
+    Parameters
+    ----------
+    t: float
+        time (s)
+    y: np.ndarray
+        state vector, same layout as for `thermal_ode_vectorized`
+    arrays: ArrayArchitecture
+        spacecraft thermal architecture in array form
+    environment: EnvironmentalConditions
+        environmental conditions surrounding the spacecraft
+    modes: SwitchingModes | None
+        frozen heater/louver/switch states, which then contribute nothing
+
+    Returns
+    -------
+    np.ndarray | sparse.csr_matrix
+        d(yp)/dy, sparse when the architecture uses `SparseLinks`
+
+    Math
+    ----
+    J = diag(1 / thermal inertia) @ (dQ_conduction/dT + dQ_exchange/dT + diag(dQ_background/dT))
+    """
+    num_components = arrays.num_components
+    temps, controller_states = split_state(y, arrays)
+
+    # Frozen modes are constant, like hard switches
+    smoothing = arrays.switch_smoothing if modes is None else 0.0
+    attenuated = None if modes is None else modes.attenuated
+
+    conduction = arrays.links.conduction_jacobian(temps, attenuated, smoothing)
+    background = background_radiation_jacobian(temps, arrays)
+    heater = -arrays.heater_power * switching_fraction_derivative(
+        arrays.heater_set_temp - temps, smoothing
+    )
+
+    # Heater control laws override the modes
+    control_blocks = None
+    if arrays.controls is not None:
+        (
+            columns,
+            d_outputs,
+            d_output_states,
+            d_rates,
+            d_rate_states,
+        ) = controller_jacobian(temps, controller_states, arrays)
+        heater[columns] = arrays.heater_power[columns] * d_outputs
+
+        if controller_states is not None:
+            heater_states = np.zeros((num_components, arrays.controls.num_states))
+            heater_states[columns] = (
+                arrays.heater_power[columns, None] * d_output_states
+            )
+            control_blocks = (heater_states, d_rates, d_rate_states)
+
+    louver = (
+        -np.maximum(incident_radiation_fluxes(arrays, environment, t), 0)
+        * (1 - 1 / arrays.louver_attenuation)
+        * switching_fraction_derivative(temps - arrays.heater_set_temp, smoothing)
+    )
+    diagonal = background + heater + louver
+
+    exchange = radiative_exchange_jacobian(temps, arrays)
+    if exchange is not None:
+        conduction = conduction + exchange
+
+    inverse_inertia = 1 / arrays.thermal_inertia
+
+    if sparse.issparse(conduction):
+        jacobian = sparse.diags(inverse_inertia) @ (conduction + sparse.diags(diagonal))
+    else:
+        jacobian = inverse_inertia[:, None] * (conduction + np.diag(diagonal))
+
+    if control_blocks is not None:
+        heater_states, d_rates, d_rate_states = control_blocks
+        blocks = [
+            [jacobian, inverse_inertia[:, None] * heater_states],
+            [d_rates, d_rate_states],
+        ]
+        jacobian = (
+            sparse.bmat(blocks, format="csr")
+            if sparse.issparse(jacobian)
+            else np.block(blocks)
+        )
+
+    num_states = jacobian.shape[0]
+    if y.shape[0] == num_states:
+        return jacobian
+
+    # Power accumulators: innate power is constant, the rest are diagonal terms
+    # (plus the heater's controller states)
+    num_accumulators = y.shape[0] - num_states
+    accumulator_rows = np.zeros((num_accumulators, num_states))
+    accumulator_rows[1, :num_components] = heater
+    accumulator_rows[2, :num_components] = louver
+    accumulator_rows[3, :num_components] = background
+    if control_blocks is not None:
+        accumulator_rows[1, num_components:] = heater_states.sum(axis=0)
+
+    if sparse.issparse(jacobian):
+        return sparse.bmat(
+            [
+                [jacobian, sparse.csr_matrix((num_states, num_accumulators))],
+                [
+                    sparse.csr_matrix(accumulator_rows),
+                    sparse.csr_matrix((num_accumulators, num_accumulators)),
+                ],
+            ],
+            format="csr",
+        )
+
+    full_jacobian = np.zeros((y.shape[0], y.shape[0]))
+    full_jacobian[:num_states, :num_states] = jacobian
+    full_jacobian[num_states:, :num_states] = accumulator_rows
+
+    return full_jacobian
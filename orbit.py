@@ -0,0 +1,166 @@
+from dataclasses import dataclass, replace
+
+import numpy as np
+import numpy.typing as npt
+
+from base_classes import EnvironmentalConditions
+
+
+@dataclass
+class OrbitEnvironment(EnvironmentalConditions):
+    """
+    Periodic environment with per-component flux tables precomputed on a
+    uniform grid over one orbit
+
+    The direct solar flux reaching each component is `incident_radiative_flux`
+    times its illumination factor times `sun_fraction` (eclipse and attitude),
+    plus the planet's albedo and IR in `planetary_flux`. Tables are read by
+    linear interpolation, a couple of row lookups per RHS evaluation.
+    """
+
+    period: float  # s, orbit period, the tables repeat after it
+    sun_fraction: npt.NDArray[np.floating]  # (K, N), 0 in eclipse
+    planetary_flux: npt.NDArray[np.floating]  # W/m^2, (K, N) albedo + IR
+
+    def __post_init__(self):
+        # Both tables side by side, with the first row repeated at the end so
+        # interpolation never wraps
+        tables = np.stack((self.sun_fraction, self.planetary_flux), axis=1)
+        self._tables = np.concatenate((tables, tables[:1]))
+        self._rate = tables.shape[0] / self.period
+        self._last_row = tables.shape[0] - 1
+        # Asked for on every switching mode evaluation, never changes
+        self._peak_sun_fraction = np.max(self.sun_fraction, axis=0)
+        self._peak_planetary_flux = np.max(self.planetary_flux, axis=0)
+
+    def _interpolate(self, t) -> tuple[npt.NDArray, npt.NDArray]:
+        if np.ndim(t) == 0:
+            position = self.table_position(t)
+            index = min(int(position), self._last_row)
+            fraction = position - index
+            rows = self._tables[index] + fraction * (
+                self._tables[index + 1] - self._tables[index]
+            )
+            return rows[0], rows[1]
+
+        position = np.mod(t, self.period) * self._rate
+        index = np.minimum(position.astype(np.intp), self._last_row)
+        fraction = (position - index)[..., None, None]
+        rows = self._tables[index] + fraction * (
+            self._tables[index + 1] - self._tables[index]
+        )
+        return rows[..., 0, :], rows[..., 1, :]
+
+    def absorbed_flux(self, t, illumination_factor):
+        sun_fraction, planetary_flux = self._interpolate(t)
+        return (
+            self.incident_radiative_flux * illumination_factor * sun_fraction
+            + planetary_flux
+        )
+
+    def peak_absorbed_flux(self, illumination_factor):
+        return (
+            self.incident_radiative_flux
+            * illumination_factor
+            * self._peak_sun_fraction
+            + self._peak_planetary_flux
+        )
+
+    def table_position(self, t: float) -> float:
+        """
+        Fractional table row at time t, row k is at time k * period / K
+        """
+        return (t % self.period) * self._rate
+
+    def averaged(self) -> "OrbitEnvironment":
+        """
+        Returns the environment with both tables replaced by their orbit
+        averages, a single row that never changes
+        """
+        return replace(
+            self,
+            sun_fraction=self.sun_fraction.mean(axis=0, keepdims=True),
+            planetary_flux=self.planetary_flux.mean(axis=0, keepdims=True),
+        )
+
+    @property
+    def times(self) -> npt.NDArray[np.floating]:
+        # s, grid of the tables
+        return np.arange(self.sun_fraction.shape[0]) * (
+            self.period / self.sun_fraction.shape[0]
+        )
+
+
+def orbit_environment(
+    name: str,
+    solar_flux: float,
+    period: float,
+    num_components: int,
+    eclipse_fraction: float = 0.0,
+    albedo: float = 0.0,
+    planet_ir_flux: float = 0.0,
+    planet_view_factors: float | npt.NDArray[np.floating] = 0.0,
+    attitude=None,
+    background_temp: float = 2.7,
+    num_samples: int = 360,
+) -> OrbitEnvironment:
+    """
+    Tabulates a circular orbit: eclipse centered on midnight, albedo peaking at
+    noon and constant planetary IR
+
+    Parameters
+    ----------
+    name: str
+        environment name
+    solar_flux: float
+        W/m^2, direct solar flux
+    period: float
+        s, orbit period
+    num_components: int
+        number of spacecraft components the tables are for
+    eclipse_fraction: float
+        fraction of the orbit spent in the planet's shadow
+    albedo: float
+        fraction of the solar flux reflected by the planet
+    planet_ir_flux: float
+        W/m^2, planetary IR at the spacecraft
+    planet_view_factors: float | npt.NDArray[np.floating]
+        fraction of each component's radiative area facing the planet
+    attitude: callable | None
+        attitude(phase) -> (K, N) multiplier on each component's direct solar
+        flux for orbit phases in [0, 1) (0 = noon), e.g. for a spinning or
+        slewing spacecraft; constant by default
+    background_temp: float
+        K, temperature of space
+    num_samples: int
+        table points per orbit
+
+    Returns
+    -------
+    OrbitEnvironment
+        tabulated environment
+
+    Math
+    ----
+    Q_i(t) = eps_i * A_i * (S * f_i * sun_i(t) + view_i * (a * S * max(cos(2 pi t / P), 0) + IR))
+    """
+    phase = np.arange(num_samples) / num_samples
+
+    in_sun = np.abs(phase - 0.5) >= eclipse_fraction / 2
+    sun_fraction = np.repeat(in_sun[:, None].astype(float), num_components, axis=1)
+    if attitude is not None:
+        sun_fraction = sun_fraction * attitude(phase)
+
+    albedo_flux = solar_flux * albedo * np.maximum(np.cos(2 * np.pi * phase), 0)
+    planetary_flux = np.broadcast_to(planet_view_factors, (num_components,)) * (
+        albedo_flux + planet_ir_flux
+    )[:, None]
+
+    return OrbitEnvironment(
+        name=name,
+        incident_radiative_flux=solar_flux,
+        background_temp=background_temp,
+        period=period,
+        sun_fraction=sun_fraction,
+        planetary_flux=planetary_flux,
+    )
@@ -0,0 +1,180 @@
+import dataclasses
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+import numpy.typing as npt
+from scipy.sparse import csr_matrix
+
+from array_architecture import (
+    CASE_PARAMETERS,
+    ArrayArchitecture,
+    SparseLinks,
+    compile_case_parameters,
+    radiative_exchange_matrix,
+)
+from base_classes import ThermalArchitecture
+from solver import SolverSettings, compile_for
+from spacecraft_prefabs import get_srs
+
+
+def _freeze(value):
+    # Marks every array of a (nested) dataclass read-only, in place
+    if isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    elif dataclasses.is_dataclass(value):
+        for field in dataclasses.fields(value):
+            _freeze(getattr(value, field.name))
+
+    return value
+
+
+@dataclass(frozen=True)
+class ParametricArchitecture:
+    """
+    Many cases of one spacecraft topology
+
+    The topology (links, thermal inertias, set temperatures) is compiled once,
+    and every case is a row of the (M, N) `CASE_PARAMETERS` arrays. View
+    factors follow the radiative areas through reciprocity, so each distinct
+    matrix is kept once and indexed per case. All arrays are read-only, so one
+    instance can be shared between threads, or its buffers mapped into worker
+    processes, without copies; `case` overlays a row on the topology as views.
+    """
+
+    topology: ArrayArchitecture  # compiled from the first case
+    parameters: dict[str, npt.NDArray[np.floating]]  # (M, N) by `CASE_PARAMETERS`
+    settings: SolverSettings  # the topology was compiled for, see `compile_for`
+    # (V, N, N) distinct view factor matrices and the one of each case, (M,);
+    # None without view factors
+    view_factors: npt.NDArray[np.floating] | None = None
+    view_factor_rows: npt.NDArray[np.integer] | None = None
+
+    @property
+    def num_cases(self) -> int:
+        return len(self.parameters[CASE_PARAMETERS[0]])
+
+    def check_settings(self, settings: SolverSettings):
+        """
+        Raises a ValueError unless the topology's sparsity and switch smoothing
+        are what `settings` compiles, e.g. hard switches for an implicit method
+        """
+        compiled = (self.settings.sparse, self.settings.effective_switch_smoothing)
+        if (settings.sparse, settings.effective_switch_smoothing) != compiled:
+            raise ValueError(
+                "settings compile a different topology than the parametric"
+                f" architecture's (sparse, switch smoothing) {compiled}"
+            )
+
+    def case(
+        self,
+        index: int,
+        overrides: dict[str, npt.NDArray[np.floating]] | None = None,
+    ) -> ArrayArchitecture:
+        """
+        Returns the architecture of one case, sharing the topology's arrays and
+        viewing its parameter rows
+
+        `overrides` replace (N,) per-component arrays of the case, e.g. a
+        perturbed emissivity. Only they and the radiative exchange matrix,
+        which depends on the case's areas and emissivities, are new arrays.
+        """
+        row = {name: values[index] for name, values in self.parameters.items()}
+        if overrides:
+            row |= {
+                name: np.asarray(values, dtype=float)
+                for name, values in overrides.items()
+            }
+        if self.view_factors is None:
+            return dataclasses.replace(self.topology, **row)
+
+        view_factors = self.view_factors[self.view_factor_rows[index]]
+        exchange = _freeze(
+            radiative_exchange_matrix(row["rad_area"], row["emissivity"], view_factors)
+        )
+        if isinstance(self.topology.links, SparseLinks):
+            exchange = csr_matrix(exchange)
+
+        return dataclasses.replace(
+            self.topology,
+            **row,
+            view_factors=view_factors,
+            radiative_exchange=exchange,
+        )
+
+
+def compile_parametric(
+    case_flags: list[dict],
+    settings: SolverSettings | None = None,
+    get_spacecraft: Callable[[dict], ThermalArchitecture] = get_srs,
+) -> ParametricArchitecture:
+    """
+    Compiles the cases of one spacecraft into a `ParametricArchitecture`
+
+    Only the first case is compiled in full. The others only contribute their
+    `CASE_PARAMETERS` and view factors, so `get_spacecraft` must build the same
+    topology for every case, which is checked on the thermal inertias.
+
+    Parameters
+    ----------
+    case_flags: list[dict]
+        case flags of each case, in row order
+    settings: SolverSettings | None
+        settings deciding sparsity and switch smoothing of the topology
+    get_spacecraft: Callable[[dict], ThermalArchitecture]
+        builds the spacecraft for a set of case flags, the sample return
+        spacecraft by default
+
+    Returns
+    -------
+    ParametricArchitecture
+        the shared topology and a parameter row per case
+    """
+    if settings is None:
+        settings = SolverSettings()
+
+    spacecraft = get_spacecraft(case_flags[0])
+    topology = compile_for(spacecraft, case_flags[0], settings)
+
+    # Which heaters have control laws depends on the heater power of each case
+    if topology.controls is not None:
+        raise ValueError("parametric architectures don't support heater control laws")
+
+    rows, view_factors, view_factor_rows = [], {}, []
+    for i, flags in enumerate(case_flags):
+        if i > 0:
+            spacecraft = get_spacecraft(flags)
+            if not np.array_equal(
+                spacecraft.component_thermal_inertias, topology.thermal_inertia
+            ):
+                raise ValueError("every case must share the first case's topology")
+
+        rows.append(compile_case_parameters(spacecraft, flags))
+
+        if spacecraft.view_factors is not None:
+            matrix = np.asarray(spacecraft.view_factors, dtype=float)
+            row, _ = view_factors.setdefault(
+                matrix.tobytes(), (len(view_factors), matrix)
+            )
+            view_factor_rows.append(row)
+
+    parameters = {
+        name: _freeze(np.stack([row[name] for row in rows])) for name in CASE_PARAMETERS
+    }
+    topology = dataclasses.replace(
+        topology,
+        **{name: values[0] for name, values in parameters.items()},
+        view_factors=None,
+        radiative_exchange=None,
+    )
+
+    if not view_factors:
+        return ParametricArchitecture(_freeze(topology), parameters, settings)
+
+    return ParametricArchitecture(
+        _freeze(topology),
+        parameters,
+        settings,
+        view_factors=_freeze(np.stack([matrix for _, matrix in view_factors.values()])),
+        view_factor_rows=_freeze(np.array(view_factor_rows)),
+    )
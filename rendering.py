@@ -0,0 +1,262 @@
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+
+import matplotlib
+import numpy as np
+import numpy.typing as npt
+from matplotlib import pyplot as plt
+
+from results import SimulationResult
+from store import ENVELOPE_CHANNEL, TEMPERATURE_CHANNEL, TIME_CHANNEL, ResultStore
+
+# Samples drawn per figure, trajectories longer than this are downsampled
+DEFAULT_MAX_POINTS = 4000
+DEFAULT_DPI = 300
+
+
+def downsample(
+    t: npt.NDArray[np.floating], values: npt.NDArray[np.floating], max_points: int
+) -> tuple[npt.NDArray[np.floating], npt.NDArray[np.floating]]:
+    """
+    Reduces (N, T) time series to about `max_points` samples for drawing
+
+    The samples are split into buckets and only the minimum and maximum of
+    every row in each bucket are kept (plus the first and last sample), so
+    spikes and the envelope of fast switching survive; the lines look the same
+    at figure resolution.
+    """
+    num_samples = len(t)
+    if num_samples <= max_points:
+        return np.asarray(t), np.asarray(values)
+
+    rows = np.atleast_2d(values)
+    num_buckets = max(max_points // (2 * len(rows)), 1)
+    bucket_size = -(-num_samples // num_buckets)
+
+    # Pad with the last sample so every bucket is full
+    indices = np.minimum(np.arange(num_buckets * bucket_size), num_samples - 1)
+    buckets = np.asarray(rows[:, indices]).reshape(len(rows), num_buckets, -1)
+    starts = np.arange(num_buckets)[:, None] * bucket_size
+
+    keep = np.unique(
+        np.concatenate(
+            (
+                [0, num_samples - 1],
+                np.minimum(starts.T + buckets.argmin(axis=-1), num_samples - 1).ravel(),
+                np.minimum(starts.T + buckets.argmax(axis=-1), num_samples - 1).ravel(),
+            )
+        )
+    )
+
+    return np.asarray(t)[keep], np.asarray(values)[..., keep]
+
+
+class FigureTemplate:
+    """
+    Component temperature figure which is set up once and reused: every
+    render only swaps the line data, labels and title before saving
+    """
+
+    def __init__(self, figsize=(12, 8)):
+        self.fig, self.ax = plt.subplots(figsize=figsize)
+        self.ax.set_ylabel("Component Temperature (K)")
+        self.ax.set_xlabel("Time (s)")
+        self.ax.grid()
+        self.lines = []
+        self.bands = []
+
+    def draw(
+        self,
+        t: npt.NDArray[np.floating],
+        temps: npt.NDArray[np.floating],
+        labels: list[str],
+        title: str,
+        envelope: npt.NDArray[np.floating] | None = None,
+    ):
+        # One line per component, in the color cycle's order like ax.plot
+        while len(self.lines) < len(temps):
+            self.lines.extend(self.ax.plot([], []))
+
+        # Min/max band of each component around its window means
+        for band in self.bands:
+            band.remove()
+        self.bands = []
+        if envelope is not None:
+            for line, low, high in zip(self.lines, *envelope):
+                self.bands.append(
+                    self.ax.fill_between(
+                        t, low, high, color=line.get_color(), alpha=0.2, linewidth=0
+                    )
+                )
+
+        for line, values, label in zip(self.lines, temps, labels):
+            line.set_data(t, values)
+            line.set_label(label)
+            line.set_visible(True)
+        for line in self.lines[len(temps) :]:
+            line.set_visible(False)
+
+        self.ax.relim(visible_only=True)
+        self.ax.autoscale_view()
+        self.ax.legend(handles=self.lines[: len(temps)])
+        self.ax.set_title(title)
+
+    def save(self, path: str | os.PathLike, dpi: int = DEFAULT_DPI):
+        self.fig.savefig(path, dpi=dpi)
+
+    def close(self):
+        plt.close(self.fig)
+
+
+def _downsample_with_envelope(t, temps, envelope, max_points):
+    # Downsamples the temperatures and their (2, N, T) envelope at the same times
+    if envelope is None:
+        return *downsample(t, temps, max_points), None
+
+    # Three times the rows, so three times the points for the same buckets
+    num_components = len(temps)
+    t, rows = downsample(t, np.concatenate((temps, *envelope)), 3 * max_points)
+    low, high = np.split(rows[num_components:], 2)
+
+    return t, rows[:num_components], np.stack((low, high))
+
+
+def _title(environment_name: str, case_name: str) -> str:
+    return f"Thermal Sim - {environment_name}\n" + case_name
+
+
+def plot_result(
+    result: SimulationResult,
+    show: bool = False,
+    output_directory: str | os.PathLike = "outputs",
+    max_points: int = DEFAULT_MAX_POINTS,
+):
+    """
+    Plots the component temperatures of a simulation to
+    outputs/<environment>_case_<case>.png
+    """
+    t, temps, envelope = _downsample_with_envelope(
+        result.t, result.temps, result.envelope, max_points
+    )
+
+    template = FigureTemplate()
+    template.draw(
+        t,
+        temps,
+        result.component_names,
+        _title(result.environment.name, result.case_name),
+        envelope,
+    )
+    template.save(Path(output_directory) / f"{result.output_name}.png")
+
+    if show:
+        plt.show()
+
+    template.close()
+
+
+# Figure reused by every render in this process
+_template: FigureTemplate | None = None
+
+
+def render_case(
+    store: ResultStore,
+    name: str,
+    output_directory: str | os.PathLike = "outputs",
+    max_points: int = DEFAULT_MAX_POINTS,
+    dpi: int = DEFAULT_DPI,
+) -> Path:
+    """
+    Plots the component temperatures of a stored case to
+    <output_directory>/<name>.png and returns the path
+
+    Only the downsampled samples are read from the memory-mapped channels.
+    """
+    global _template
+    if _template is None:
+        _template = FigureTemplate()
+
+    metadata = store.metadata(name)
+    t, temps, envelope = _downsample_with_envelope(
+        store.load(name, TIME_CHANNEL),
+        store.load(name, TEMPERATURE_CHANNEL),
+        (
+            store.load(name, ENVELOPE_CHANNEL)
+            if ENVELOPE_CHANNEL in metadata["channels"]
+            else None
+        ),
+        max_points,
+    )
+
+    _template.draw(
+        t,
+        temps,
+        metadata["component_names"],
+        _title(metadata["environment"]["name"], metadata["case_name"]),
+        envelope,
+    )
+
+    path = Path(output_directory) / f"{name}.png"
+    _template.save(path, dpi)
+    return path
+
+
+def _use_headless_backend():
+    matplotlib.use("Agg")
+
+
+class RenderPipeline:
+    """
+    Renders stored cases in the background while the simulation goes on
+
+    Cases are handed over by name once they are in the store and drawn by a
+    pool of worker processes with the non-interactive Agg backend, each
+    reusing one `FigureTemplate`. Closing the pipeline (or leaving its `with`
+    block) waits for the outstanding figures.
+    """
+
+    def __init__(
+        self,
+        store: ResultStore,
+        output_directory: str | os.PathLike = "outputs",
+        max_workers: int | None = 1,
+        max_points: int = DEFAULT_MAX_POINTS,
+        dpi: int = DEFAULT_DPI,
+    ):
+        self.store = store
+        self.output_directory = output_directory
+        self.max_points = max_points
+        self.dpi = dpi
+        self.futures: list[Future] = []
+        self._pool = ProcessPoolExecutor(
+            max_workers=max_workers, initializer=_use_headless_backend
+        )
+
+    def output_path(self, name: str) -> Path:
+        return Path(self.output_directory) / f"{name}.png"
+
+    def submit(self, name: str) -> Future:
+        future = self._pool.submit(
+            render_case,
+            self.store,
+            name,
+            self.output_directory,
+            self.max_points,
+            self.dpi,
+        )
+        self.futures.append(future)
+        return future
+
+    def close(self) -> list[Path]:
+        """
+        Waits for every submitted figure, returns their paths
+        """
+        self._pool.shutdown(wait=True)
+        return [future.result() for future in self.futures]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,214 @@
+import os
+from pathlib import Path
+
+import numpy as np
+import numpy.typing as npt
+
+from energy import SUMMARY_WINDOW
+from results import POWER_LABELS
+from store import TEMPERATURE_CHANNEL, TIME_CHANNEL, ResultStore
+
+PREAMBLE = r"""\documentclass{article}
+\usepackage[margin=0.75in]{geometry}
+\usepackage{graphicx}
+\usepackage{longtable}
+\begin{document}
+"""
+
+_LATEX_SPECIAL_CHARACTERS = {
+    "\\": r"\textbackslash{}",
+    "&": r"\&",
+    "%": r"\%",
+    "$": r"\$",
+    "#": r"\#",
+    "_": r"\_",
+    "{": r"\{",
+    "}": r"\}",
+    "~": r"\textasciitilde{}",
+    "^": r"\textasciicircum{}",
+}
+
+
+def latex_escape(text: str) -> str:
+    return "".join(_LATEX_SPECIAL_CHARACTERS.get(char, char) for char in text)
+
+
+def _short_power_label(label: str) -> str:
+    # "Avg Heater Power Draw" -> "Heater", keeps the power table on the page
+    return label.removeprefix("Avg ").removesuffix(" Draw").removesuffix(" Power")
+
+
+def equilibrium_temperatures(
+    t: npt.NDArray[np.floating], temps: npt.NDArray[np.floating]
+) -> npt.NDArray[np.floating]:
+    """
+    K, (N,), temperature of every component averaged over the samples in the
+    last `energy.SUMMARY_WINDOW` of the run, the window the average powers are
+    taken over
+
+    Only the window's columns of a memory-mapped (N, T) channel are read.
+    """
+    start = np.searchsorted(t, t[-1] - SUMMARY_WINDOW * (t[-1] - t[0]))
+    t_window = np.asarray(t[start:])
+    window = np.asarray(temps[:, start:])
+
+    if len(t_window) < 2 or t_window[-1] <= t_window[0]:
+        return window[:, -1]
+
+    return np.trapezoid(window, t_window, axis=-1) / (t_window[-1] - t_window[0])
+
+
+class ReportWriter:
+    """
+    LaTeX report of stored cases, written case by case as they finish
+
+    Every added case gets a page with its temperature figure, and a row block
+    in the equilibrium temperature and average power tables. The tables are
+    streamed to their own files next to the report (<stem>_temperatures.tex
+    and <stem>_powers.tex) and included at its start, so nothing but the open
+    files is held in memory however many cases are added. Closing the writer
+    (or leaving its `with` block) finishes all three files.
+    """
+
+    def __init__(
+        self,
+        store: ResultStore,
+        path: str | os.PathLike = "outputs/thermal_sim.tex",
+        figure_directory: str = "",
+        figures: bool = True,
+    ):
+        """
+        Parameters
+        ----------
+        store: ResultStore
+            store the cases are read from
+        path: str | os.PathLike
+            report file, the table files are written next to it
+        figure_directory: str
+            directory of the <name>.png figures, relative to the report
+        figures: bool
+            include the figures, off when they aren't rendered
+        """
+        self.store = store
+        self.path = Path(path)
+        self.figure_directory = figure_directory
+        self.figures = figures
+        self.num_cases = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temperatures_path = self.path.with_name(f"{self.path.stem}_temperatures.tex")
+        powers_path = self.path.with_name(f"{self.path.stem}_powers.tex")
+
+        self._document = open(self.path, "w")
+        self._document.write(PREAMBLE)
+        self._document.write(
+            r"\section*{Equilibrium Temperatures}"
+            + "\n"
+            + rf"\input{{{temperatures_path.stem}}}"
+            + "\n\n"
+            + r"\section*{Average Power}"
+            + "\n"
+            + rf"\input{{{powers_path.stem}}}"
+            + "\n"
+        )
+
+        self._temperatures = open(temperatures_path, "w")
+        self._temperatures.write(
+            self._table_header(
+                "llll", ["Environment", "Case", "Component", "Temperature (K)"]
+            )
+        )
+
+        self._powers = open(powers_path, "w")
+        self._powers.write(
+            self._table_header(
+                "ll" + "r" * len(POWER_LABELS),
+                ["Environment", "Case"]
+                + [f"{_short_power_label(label)} (W)" for label in POWER_LABELS],
+            )
+        )
+
+    @staticmethod
+    def _table_header(columns: str, headings: list[str]) -> str:
+        header = " & ".join(rf"\textbf{{{heading}}}" for heading in headings)
+        return (
+            r"{\small"
+            + "\n"
+            + rf"\begin{{longtable}}{{{columns}}}"
+            + "\n"
+            + rf"\hline {header} \\ \hline"
+            + "\n"
+            + r"\endhead"
+            + "\n"
+        )
+
+    def add(self, name: str):
+        """
+        Appends a stored case to the report and its tables
+        """
+        metadata = self.store.metadata(name)
+        environment = latex_escape(metadata["environment"]["name"])
+        case = latex_escape(metadata["case_name"])
+
+        temperatures = equilibrium_temperatures(
+            self.store.load(name, TIME_CHANNEL),
+            self.store.load(name, TEMPERATURE_CHANNEL),
+        )
+        for i, (component, temperature) in enumerate(
+            zip(metadata["component_names"], temperatures)
+        ):
+            row = [environment, case] if i == 0 else ["", ""]
+            row += [latex_escape(component), f"{temperature:.1f}"]
+            self._temperatures.write(" & ".join(row) + r" \\" + "\n")
+        self._temperatures.write(r"\hline" + "\n")
+
+        powers = [metadata["average_powers"][label] for label in POWER_LABELS]
+        self._powers.write(
+            " & ".join([environment, case] + [f"{power:.2f}" for power in powers])
+            + r" \\"
+            + "\n"
+        )
+
+        self._document.write(
+            r"\newpage \textbf{"
+            + f"Thermal Sim - {environment} - {case}"
+            + r"}"
+            + "\n\n"
+        )
+        if not metadata["success"]:
+            self._document.write(
+                rf"\emph{{Integration failed: {latex_escape(metadata['message'])}}}"
+                + "\n\n"
+            )
+        # Missing from cases stored before early termination existed
+        if metadata.get("t_equilibrium") is not None:
+            self._document.write(
+                f"Settled after {metadata['t_equilibrium']:.0f} s." + "\n\n"
+            )
+        if self.figures:
+            figure = Path(self.figure_directory, f"{name}.png").as_posix()
+            self._document.write(
+                rf"\includegraphics[width=\textwidth]{{{figure}}}" + "\n"
+            )
+
+        # Flushed so the report can be read while the sweep goes on
+        for f in (self._temperatures, self._powers, self._document):
+            f.flush()
+
+        self.num_cases += 1
+
+    def close(self):
+        # Temperature blocks already end in a rule
+        self._powers.write(r"\hline" + "\n")
+        for table in (self._temperatures, self._powers):
+            table.write(r"\end{longtable}" + "\n" + "}\n")
+            table.close()
+
+        self._document.write(r"\end{document}" + "\n")
+        self._document.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
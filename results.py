@@ -0,0 +1,85 @@
+from dataclasses import dataclass, field
+
+import numpy as np
+import numpy.typing as npt
+
+from base_classes import EnvironmentalConditions
+from energy import EnergyAccount
+from instrumentation import SolverProfile
+
+COMPONENT_LABELS = (
+    "Radiators",
+    "Structure",
+    "Electronics",
+    "Solar Arrays",
+    "Sample Box",
+    "Propellant Tanks",
+    "Engines",
+    "Antenna",
+)
+
+POWER_LABELS = (
+    "Avg Innate Power Draw",
+    "Avg Heater Power Draw",
+    "Avg Incoming Radiative Power",
+    "Avg Rejected Radiative Power",
+)
+
+
+@dataclass
+class SimulationResult:
+    """
+    Numerical output of one simulation, without any plotting state so it's cheap
+    to send back from a worker process
+    """
+
+    case_name: str
+    case_flags: dict
+    environment: EnvironmentalConditions
+    t: npt.NDArray[np.floating]  # s
+    y: npt.NDArray[np.floating]  # K, (N, T) component temperatures
+    num_components: int
+    success: bool
+    message: str
+    solve_time: float  # s, wall clock
+    cached: bool = False  # read back from a `ResultCache`
+    component_names: list[str] = field(
+        default_factory=lambda: list(COMPONENT_LABELS)
+    )
+    # W, (N, T) flow of each `odes.HEAT_FLOW_TERMS` term into each component
+    heat_flows: dict[str, npt.NDArray[np.floating]] = field(default_factory=dict)
+    # J, (len(HEAT_FLOW_TERMS), N, T) cumulative energy of each heat flow term,
+    # see `energy.integrate_heat_flows`
+    energy: npt.NDArray[np.floating] | None = None
+    # integrator statistics, see `solver.solution_stats`
+    stats: dict[str, int] = field(default_factory=dict)
+    # opt-in instrumentation of the integration, see `sweep.solve`
+    profile: SolverProfile | None = None
+    # K, (2, N, T) minimum and maximum temperature of each output window when
+    # sampled by window, see `sampling.sample_solution`
+    envelope: npt.NDArray[np.floating] | None = None
+    # s, time the spacecraft had settled by when the run was stopped at
+    # equilibrium, see `equilibrium.EquilibriumDetector`
+    t_equilibrium: float | None = None
+
+    @property
+    def temps(self) -> npt.NDArray[np.floating]:
+        return self.y[: self.num_components]
+
+    @property
+    def energy_account(self) -> EnergyAccount:
+        return EnergyAccount(self.t, self.energy)
+
+    @property
+    def average_powers(self) -> npt.NDArray[np.floating]:
+        # W, the `POWER_LABELS` terms averaged over the end of the run
+        return self.energy_account.summary_powers()
+
+    @property
+    def output_name(self) -> str:
+        return self.output_name_for(self.environment, self.case_name)
+
+    @staticmethod
+    def output_name_for(environment: EnvironmentalConditions, case_name: str) -> str:
+        # Name of a case's store directory and figure
+        return f"{environment.name}_case_{case_name}"
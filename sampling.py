@@ -0,0 +1,210 @@
+from dataclasses import dataclass
+
+import numpy as np
+import numpy.typing as npt
+
+from array_architecture import ArrayArchitecture
+from base_classes import EnvironmentalConditions
+from instrumentation import find_transitions
+from solver import SolverSettings
+
+
+@dataclass
+class SampledSolution:
+    t: npt.NDArray[np.floating]  # s, (T,) output times
+    y: npt.NDArray[np.floating]  # (states, T) state at the output times
+    energy: npt.NDArray[np.floating]  # J, (len(HEAT_FLOW_TERMS), N, T) cumulative
+    # K, (2, N, T) minimum and maximum temperature of each output window, None
+    # unless sampled by window
+    envelope: npt.NDArray[np.floating] | None = None
+
+
+def interpolate_samples(
+    t: npt.NDArray[np.floating],
+    values: npt.NDArray[np.floating],
+    t_out: npt.NDArray[np.floating],
+) -> npt.NDArray[np.floating]:
+    """
+    Interpolates (..., T) samples linearly to (..., T_out) output times within
+    [t[0], t[-1]], as `energy.EnergyAccount` reads cumulative energy between
+    steps
+    """
+    index = np.clip(np.searchsorted(t, t_out), 1, len(t) - 1)
+    t0, t1 = t[index - 1], t[index]
+    fraction = np.divide(
+        t_out - t0, t1 - t0, out=np.ones_like(t_out), where=t1 > t0
+    ).clip(0, 1)
+
+    return values[..., index - 1] + fraction * (
+        values[..., index] - values[..., index - 1]
+    )
+
+
+def simplify(
+    t: npt.NDArray[np.floating],
+    values: npt.NDArray[np.floating],
+    tolerance: float,
+    keep: npt.NDArray[np.integer] | None = None,
+) -> npt.NDArray[np.integer]:
+    """
+    Returns the indices of the samples needed to reproduce (N, T) series to
+    within `tolerance` by linear interpolation
+
+    Douglas-Peucker simplification over all rows at once: starting from the
+    first, last and `keep` samples, every span whose interpolation misses a
+    sample by more than the tolerance is split at its worst sample. Flat
+    plateaus collapse to their end points while transients keep their shape.
+    """
+    kept = np.zeros(len(t), dtype=bool)
+    kept[[0, -1]] = True
+    if keep is not None:
+        kept[keep] = True
+
+    anchors = np.flatnonzero(kept)
+    spans = list(zip(anchors[:-1], anchors[1:]))
+    while spans:
+        start, end = spans.pop()
+        if end - start < 2:
+            continue
+
+        interior = np.arange(start + 1, end)
+        fraction = (t[interior] - t[start]) / (t[end] - t[start])
+        line = values[:, [start]] + fraction * (values[:, [end]] - values[:, [start]])
+        error = np.abs(values[:, interior] - line).max(axis=0)
+
+        worst = int(error.argmax())
+        if error[worst] > tolerance:
+            split = interior[worst]
+            kept[split] = True
+            spans.extend(((start, split), (split, end)))
+
+    return np.flatnonzero(kept)
+
+
+def switch_samples(
+    sol,
+    t: npt.NDArray[np.floating],
+    y: npt.NDArray[np.floating],
+    arrays: ArrayArchitecture,
+    environment: EnvironmentalConditions,
+) -> npt.NDArray[np.integer]:
+    """
+    Returns the indices of the samples on either side of every heater, louver
+    and switch transition (`instrumentation.find_transitions`), and of the
+    switching events of event-driven solutions
+    """
+    times = find_transitions(t, y, arrays, environment).t
+    if getattr(sol, "t_switches", None) is not None:
+        times = np.concatenate((times, sol.t_switches))
+
+    after = np.clip(np.searchsorted(t, times), 0, len(t) - 1)
+    return np.unique(np.concatenate((after, np.maximum(after - 1, 0))))
+
+
+def window_statistics(
+    sol, edges: npt.NDArray[np.floating], num_rows: int
+) -> tuple[npt.NDArray[np.floating], ...]:
+    """
+    Returns the midpoints of the windows between consecutive edges and the
+    time-averaged, minimum and maximum of the first `num_rows` solution rows
+    over each, read from the steps and the dense output at the edges
+
+    Returns
+    -------
+    tuple[npt.NDArray[np.floating], ...]
+        s, (W,) midpoints, then (num_rows, W) means, minima and maxima
+    """
+    t = np.union1d(sol.t, edges)
+    values = sol.sol(t)[:num_rows]
+
+    # Trapezoid areas of every step, summed per window
+    window = np.searchsorted(edges, t[:-1], side="right") - 1
+    areas = (values[:, :-1] + values[:, 1:]) / 2 * np.diff(t)
+    mean = np.zeros((num_rows, len(edges) - 1))
+    np.add.at(mean.T, window, areas.T)
+    mean /= np.diff(edges)
+
+    # Samples on a shared edge count towards both windows
+    starts = np.searchsorted(t, edges[:-1])
+    ends = np.searchsorted(t, edges[1:], side="right")
+    minimum = np.stack(
+        [values[:, a:b].min(axis=-1) for a, b in zip(starts, ends)], axis=-1
+    )
+    maximum = np.stack(
+        [values[:, a:b].max(axis=-1) for a, b in zip(starts, ends)], axis=-1
+    )
+
+    return (edges[:-1] + edges[1:]) / 2, mean, minimum, maximum
+
+
+def sample_solution(
+    sol,
+    energy: npt.NDArray[np.floating],
+    arrays: ArrayArchitecture,
+    environment: EnvironmentalConditions,
+    settings: SolverSettings,
+) -> SampledSolution:
+    """
+    Reduces an `integrate` solution to the outputs `settings` asks for
+
+    By default every solver step is kept. `settings.t_eval` reads the dense
+    output at fixed times instead, and `settings.output_tolerance` then drops
+    the samples which linear interpolation reproduces to within that many
+    kelvin, keeping the samples around switching transitions (see `simplify`
+    and `switch_samples`). `settings.output_window` replaces the trajectory by
+    the mean temperature of each window of that length, with its minimum and
+    maximum as the envelope; it can't be combined with the other two.
+
+    Parameters
+    ----------
+    sol: OdeResult
+        solution from `solver.integrate`, with dense output
+    energy: npt.NDArray[np.floating]
+        J, cumulative energy at the solution times, see
+        `energy.integrate_heat_flows`
+    arrays: ArrayArchitecture
+        architecture the solution was integrated with
+    environment: EnvironmentalConditions
+        environmental conditions surrounding the spacecraft
+    settings: SolverSettings
+        integrator settings holding the output options
+
+    Returns
+    -------
+    SampledSolution
+        states and cumulative energy at the output times
+    """
+    if settings.output_window is not None:
+        if settings.t_eval is not None or settings.output_tolerance is not None:
+            raise ValueError("output windows replace t_eval and output_tolerance")
+
+        edges = np.arange(0, sol.t[-1], settings.output_window)
+        edges = np.append(edges, sol.t[-1])
+        t, mean, minimum, maximum = window_statistics(sol, edges, arrays.num_states)
+        num_components = arrays.num_components
+
+        return SampledSolution(
+            t=t,
+            y=mean,
+            energy=interpolate_samples(sol.t, energy, t),
+            envelope=np.stack((minimum, maximum))[:, :num_components],
+        )
+
+    t, y = sol.t, sol.y
+    if settings.t_eval is not None:
+        # Failed runs and runs stopped at equilibrium end early
+        t = np.asarray(settings.t_eval, dtype=float)
+        t = t[t <= sol.t[-1]]
+        y = sol.sol(t)
+        energy = interpolate_samples(sol.t, energy, t)
+
+    if settings.output_tolerance is not None and len(t) > 2:
+        kept = simplify(
+            t,
+            y[: arrays.num_components],
+            settings.output_tolerance,
+            switch_samples(sol, t, y, arrays, environment),
+        )
+        t, y, energy = t[kept], y[:, kept], energy[..., kept]
+
+    return SampledSolution(t=t, y=y, energy=energy)
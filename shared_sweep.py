@@ -0,0 +1,261 @@
+import copy
+import dataclasses
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+
+import numpy as np
+import numpy.typing as npt
+
+from base_classes import EnvironmentalConditions
+from parametric import ParametricArchitecture
+from solver import SolverSettings, integrate, solution_stats
+
+
+@dataclass(frozen=True)
+class SharedArray:
+    """
+    Picklable reference to an array living in a shared memory block
+    """
+
+    name: str  # shared memory block
+    shape: tuple[int, ...]
+    dtype: str
+
+    @classmethod
+    def create(
+        cls, values: npt.NDArray, blocks: list[shared_memory.SharedMemory]
+    ) -> "SharedArray":
+        """
+        Copies an array into a new block, appended to `blocks`
+        """
+        values = np.ascontiguousarray(values)
+        block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        blocks.append(block)
+
+        np.ndarray(values.shape, values.dtype, block.buf)[...] = values
+        return cls(block.name, values.shape, values.dtype.str)
+
+    def attach(
+        self, blocks: list[shared_memory.SharedMemory], writeable: bool = False
+    ) -> npt.NDArray:
+        """
+        Maps the array without copying, keeping its block open in `blocks`
+        """
+        block = shared_memory.SharedMemory(name=self.name)
+        blocks.append(block)
+
+        values = np.ndarray(self.shape, self.dtype, block.buf)
+        values.flags.writeable = writeable
+        return values
+
+
+def _map_arrays(value, function):
+    # Applies `function` to every array of a (nested) dataclass or dict. Fields
+    # are set on a shallow copy, skipping __post_init__, so attributes derived
+    # from the arrays (like `DenseLinks.variable`) carry over.
+    if isinstance(value, (np.ndarray, SharedArray)):
+        return function(value)
+
+    if isinstance(value, dict):
+        return {key: _map_arrays(item, function) for key, item in value.items()}
+
+    if dataclasses.is_dataclass(value):
+        mapped = copy.copy(value)
+        for field in dataclasses.fields(value):
+            object.__setattr__(
+                mapped, field.name, _map_arrays(getattr(value, field.name), function)
+            )
+        return mapped
+
+    return value
+
+
+def share(value, blocks: list[shared_memory.SharedMemory]):
+    """
+    Returns a copy of a (nested) dataclass or dict whose arrays are moved to
+    shared memory and replaced by `SharedArray` references
+    """
+    return _map_arrays(value, lambda values: SharedArray.create(values, blocks))
+
+
+def attach(value, blocks: list[shared_memory.SharedMemory]):
+    """
+    Inverse of `share`, maps every `SharedArray` read-only
+    """
+    return _map_arrays(value, lambda reference: reference.attach(blocks))
+
+
+@dataclass
+class SharedTaskResult:
+    """
+    What a worker sends back for one task, its temperatures are already in the
+    shared output array
+    """
+
+    task: int  # row of the output array
+    success: bool
+    message: str
+    solve_time: float  # s
+    stats: dict[str, int]
+    t_equilibrium: float | None  # s, when stopped at equilibrium
+
+
+@dataclass
+class SharedSweepResult:
+    t: npt.NDArray[np.floating]  # s, (T,) output times
+    # K, (tasks, N, T), NaN past a failed run's end and held past the end of one
+    # stopped at equilibrium
+    temps: npt.NDArray[np.floating]
+    tasks: list[SharedTaskResult]  # in task order
+
+
+# Worker state, set once per process by `_attach_worker`
+_worker: dict = {}
+
+
+def _attach_worker(
+    parametric: ParametricArchitecture,
+    output: SharedArray,
+    environment: EnvironmentalConditions,
+    settings: SolverSettings,
+    t_eval: npt.NDArray[np.floating],
+):
+    blocks = []
+    _worker.update(
+        blocks=blocks,
+        parametric=attach(parametric, blocks),
+        output=output.attach(blocks, writeable=True),
+        environment=environment,
+        settings=settings,
+        t_eval=t_eval,
+    )
+
+
+def _solve_task(task: int, case: int, overrides: dict | None) -> SharedTaskResult:
+    # Worker: integrates one task into its row of the shared output
+    start = time.perf_counter()
+    arrays = _worker["parametric"].case(case, overrides)
+    sol = integrate(arrays, _worker["environment"], _worker["settings"])
+
+    t_eval = _worker["t_eval"]
+    reached = t_eval <= sol.t[-1]
+    output = _worker["output"]
+    output[task] = np.nan
+    output[task][:, reached] = sol.sol(t_eval[reached])[: arrays.num_components]
+
+    # Runs stopped at equilibrium hold their final temperatures
+    if sol.t_equilibrium is not None:
+        output[task][:, ~reached] = sol.y[: arrays.num_components, -1:]
+
+    return SharedTaskResult(
+        task=task,
+        success=bool(sol.success),
+        message=sol.message,
+        solve_time=time.perf_counter() - start,
+        stats=solution_stats(sol, _worker["settings"]),
+        t_equilibrium=sol.t_equilibrium,
+    )
+
+
+def run_shared(
+    parametric: ParametricArchitecture,
+    environment: EnvironmentalConditions,
+    tasks: list[tuple[int, dict | None]] | None = None,
+    settings: SolverSettings | None = None,
+    t_eval: npt.NDArray[np.floating] | None = None,
+    max_workers: int | None = None,
+) -> SharedSweepResult:
+    """
+    Integrates cases of a parametric architecture on a process pool whose
+    workers map its arrays from shared memory
+
+    The topology and parameter table are copied into
+    `multiprocessing.shared_memory` once and attached read-only by every
+    worker, so a task only ships its case index and parameter overrides. Each
+    worker writes its temperatures at `t_eval` straight into a preallocated
+    shared (tasks, N, T) array and returns only its status and statistics.
+
+    Parameters
+    ----------
+    parametric: ParametricArchitecture
+        topology and per-case parameters, see `parametric.compile_parametric`
+    environment: EnvironmentalConditions
+        environment shared by every task
+    tasks: list[tuple[int, dict | None]] | None
+        (case index, overrides) per task, see `ParametricArchitecture.case`;
+        every case once without overrides by default
+    settings: SolverSettings | None
+        integrator settings, the ones the parametric architecture was compiled
+        with by default. Others may change the method, tolerances or end time
+        but must compile the same topology, see
+        `ParametricArchitecture.check_settings`.
+    t_eval: npt.NDArray[np.floating] | None
+        s, output times, `settings.t_eval` or else 101 points up to
+        `settings.t_end` by default
+    max_workers: int | None
+        number of worker processes, all cores by default. 1 runs the tasks in
+        this process.
+
+    Returns
+    -------
+    SharedSweepResult
+        temperatures and status of every task
+    """
+    if settings is None:
+        settings = parametric.settings
+    parametric.check_settings(settings)
+
+    if tasks is None:
+        tasks = [(case, None) for case in range(parametric.num_cases)]
+
+    if t_eval is None:
+        t_eval = settings.t_eval or np.linspace(0, settings.t_end, 101)
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    t_eval = np.asarray(t_eval, dtype=float)
+    num_components = parametric.topology.num_components
+
+    blocks = []
+    try:
+        shared = share(parametric, blocks)
+        output = SharedArray.create(
+            np.empty((len(tasks), num_components, len(t_eval))), blocks
+        )
+        initargs = (shared, output, environment, settings, t_eval)
+
+        if max_workers == 1:
+            _attach_worker(*initargs)
+            results = [
+                _solve_task(task, case, overrides)
+                for task, (case, overrides) in enumerate(tasks)
+            ]
+        else:
+            with ProcessPoolExecutor(
+                max_workers=min(max_workers, len(tasks)),
+                initializer=_attach_worker,
+                initargs=initargs,
+            ) as pool:
+                futures = [
+                    pool.submit(_solve_task, task, case, overrides)
+                    for task, (case, overrides) in enumerate(tasks)
+                ]
+                results = [future.result() for future in as_completed(futures)]
+
+        temps = np.array(np.ndarray(output.shape, output.dtype, blocks[-1].buf))
+    finally:
+        # Drops the in-process views before the blocks go away
+        _worker.clear()
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    return SharedSweepResult(
+        t=t_eval,
+        temps=temps,
+        tasks=sorted(results, key=lambda result: result.task),
+    )
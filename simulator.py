@@ -1,13 +1,13 @@
-from multiprocessing import Pool
-
-from matplotlib import pyplot as plt
-from scipy.integrate import solve_ivp
-
 from base_classes import EnvironmentalConditions, ThermalArchitecture
+from cache import ResultCache
+from case_generation import merge_cases
 from environmental_prefabs import EARTH, ENCELADUS, VENUS
-from odes import thermal_ode
-from spacecraft_prefabs import get_srs
-from functools import partial
+from incremental import incremental_sweep
+from rendering import RenderPipeline, plot_result
+from report import ReportWriter
+from solver import SolverSettings
+from store import ResultStore
+from sweep import solve
 
 from case_flags import (
     NOMINAL_CASES,
@@ -24,56 +24,36 @@ def run_sim(
     case_name: str,
     environment: EnvironmentalConditions,
     show: bool = False,
+    settings: SolverSettings | None = None,
+    cache: ResultCache | None = None,
+    store: ResultStore | None = None,
+    instrument: bool = False,
+    render: bool = True,
 ):
     """
     Runs a simulation of the thermal architecture
+
+    Pass `SolverSettings(method="BDF")` (or Radau/LSODA) to integrate stiff
+    cases with the analytic Jacobian, and e.g.
+    `SolverSettings(equilibrium_rate=1e-5)` to stop once the spacecraft has
+    settled. Returns the `SimulationResult`.
+
+    With `instrument` the solve is profiled and a summary printed, see
+    `instrumentation.SolverProfile`. `render=False` skips the figure.
     """
-    sol = solve_ivp(
-        thermal_ode,
-        (0, 1e6),
-        list(spacecraft.to_state()) + [0, 0, 0, 0],
-        args=(spacecraft, environment, case_flags),
-        method="RK45",
-        atol=1e-2,
+    result = solve(
+        spacecraft, case_flags, case_name, environment, settings, cache, instrument
     )
 
-    # Plot
-    fig, ax = plt.subplots(figsize=(12, 8))
-    ax.plot(sol.t, sol.y[0, :], label="Radiators")
-    ax.plot(sol.t, sol.y[1, :], label="Structure")
-    ax.plot(sol.t, sol.y[2, :], label="Electronics")
-    ax.plot(sol.t, sol.y[3, :], label="Solar Arrays")
-    ax.plot(sol.t, sol.y[4, :], label="Sample Box")
-    ax.plot(sol.t, sol.y[5, :], label="Propellant Tanks")
-    ax.plot(sol.t, sol.y[6, :], label="Engines")
-    ax.plot(sol.t, sol.y[7, :], label="Antenna")
-    ax.legend()
-    ax.set_ylabel("Component Temperature (K)")
-    ax.set_xlabel("Time (s)")
-    ax.grid()
-    ax.set_title(f"Thermal Sim - {environment.name}\n" + case_name)
-
-    fig.savefig(f"outputs/{environment.name}_case_{case_name}.png", dpi=300)
-    with open(f"outputs/{environment.name}_case_{case_name}.txt", "w") as f:
-        f.write(str(case_flags) + "\n\n")
-
-        labels = [
-            "Avg Innate Power Draw",
-            "Avg Heater Power Draw",
-            "Avg Incoming Radiative Power",
-            "Avg Rejected Radiative Power",
-        ]
-
-        for idx, label in enumerate(labels):
-            num_components = len(spacecraft.components)
-
-            power_value = (
-                sol.y[num_components + idx, -1] - sol.y[num_components + idx, -2]
-            ) / (sol.t[-1] - sol.t[-2])
-            f.write(f"{label}: {power_value:.2f} W\n")
-
-    if show:
-        plt.show()
+    if result.profile is not None:
+        print(f"{environment.name} - {case_name}")
+        print(result.profile.summary())
+
+    if render:
+        plot_result(result, show=show)
+    (ResultStore() if store is None else store).write(result)
+
+    return result
 
 
 if __name__ == "__main__":
@@ -87,60 +67,46 @@ if __name__ == "__main__":
 
     sim_type = "Nominal"
 
+    # False for headless batch runs, figures can be rendered from the store later
+    render_figures = True
+
     case_flag_collection = cases[sim_type]
 
-    case_flag_collection = (
-        NOMINAL_CASES
-        | INSULATION_PAINT_TRADE_CASES
-        | HEATER_RHU_TRADE_CASES
-        | RADIATOR_LOUVER_TRADE_CASES
-        | ACTIVE_COOLING_TRADE_CASES
-    )
+    # Every trade at once. Names shared between trades must agree, and names
+    # building the same physics are only solved once. Designed studies come
+    # from case_generation, e.g. full_factorial() for all 256 flag combinations
+    # or fractional_factorial({"louvers": "radiators*active_cooling"}).
+    case_flag_collection = merge_cases(*cases.values())
 
     environments = [ENCELADUS, VENUS, EARTH]
-    spacecraft_architectures = [
-        get_srs(case_flags) for case_flags in case_flag_collection.values()
-    ]
-
-    s = ""
-    i = 0
-
-    for environment in environments:
-        print(f"Simulating {environment}")
-
-        for spacecraft, case_flags, case_name in zip(
-            spacecraft_architectures,
-            case_flag_collection.values(),
-            case_flag_collection.keys(),
-        ):
-            i += 1
-            s += (
-                r"\newpage \textbf{"
-                + f"Thermal Sim - {environment.name} - {case_name}"
-                + r"}"
-                + "\n\n"
-            )
-            s += (
-                r"""
-    \includegraphics[width=\textwidth]{"""
-                + f"thermal_sim/{environment.name}_case_{case_name}.png"
-                + r"""}
-"""
-            )
-
-    with open("thermal_sim.tex", "w") as f:
-        f.write(s)
-
-    # with Pool() as pool:
-    #     for environment in environments:
-    #         print(f"Simulating {environment}")
-
-    #         partial_run_sim = partial(run_sim, environment=environment, show=False)
-    #         pool.starmap(
-    #             partial_run_sim,
-    #             zip(
-    #                 spacecraft_architectures,
-    #                 case_flag_collection.values(),
-    #                 case_flag_collection.keys(),
-    #             ),
-    #         )
+
+    # Workers only integrate, results are stored here as they come in and
+    # rendered from the store in the background. Only cases whose inputs
+    # changed since the last run are solved again; duplicate cases are read
+    # back from the result cache. The report (outputs/thermal_sim.tex) is
+    # written from the store as cases come in.
+    cache = ResultCache()
+    store = ResultStore()
+    renderer = RenderPipeline(store) if render_figures else None
+    report = ReportWriter(store, figures=render_figures)
+    results = incremental_sweep(
+        environments,
+        case_flag_collection,
+        store,
+        cache=cache,
+        renderer=renderer,
+        report=report,
+    )
+    num_runs = 0
+    for num_runs, result in enumerate(results, 1):
+        print(
+            f"[{num_runs}] {result.environment.name} - {result.case_name}"
+            f" ({'cached' if result.cached else f'{result.solve_time:.1f} s'})"
+        )
+
+    total_runs = len(environments) * len(case_flag_collection)
+    print(f"{num_runs} of {total_runs} cases re-run, the rest are up to date")
+
+    report.close()
+    if renderer is not None:
+        renderer.close()
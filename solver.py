@@ -0,0 +1,216 @@
+from dataclasses import dataclass
+
+from scipy.integrate import solve_ivp
+
+from array_architecture import ArrayArchitecture, compile_architecture
+from base_classes import EnvironmentalConditions, ThermalArchitecture
+from compiled_ode import JIT_AVAILABLE, CompiledODE, supports_compiled
+from control import initial_state
+from equilibrium import EquilibriumDetector
+from events import integrate_event_driven
+from instrumentation import SolverProbe
+from odes import thermal_jacobian, thermal_ode_vectorized
+
+# solve_ivp methods which make use of a Jacobian
+IMPLICIT_METHODS = ("BDF", "Radau", "LSODA")
+
+# K, heater/louver/switch ramp width used by implicit methods unless overridden.
+# Their Newton iterations stall on hard thresholds (e.g. a heater sitting
+# exactly at its set temperature).
+DEFAULT_IMPLICIT_SMOOTHING = 0.1
+
+# RHS evaluations of the explicit Runge-Kutta methods per step attempt, and
+# per accepted step for their dense output
+RK_EVALUATIONS = {"RK23": (3, 0), "RK45": (6, 0), "DOP853": (12, 3)}
+
+
+@dataclass
+class SolverSettings:
+    method: str = "RK45"  # any solve_ivp method, BDF/Radau/LSODA for stiff cases
+    t_end: float = 1e6  # s
+    rtol: float = 1e-3
+    atol: float = 1e-2
+    use_jacobian: bool = True  # pass the analytic Jacobian to implicit methods
+    sparse: bool = False  # compile the conductance network as SparseLinks
+    switch_smoothing: float | None = None  # K, None = hard for explicit methods
+    event_driven: bool = False  # freeze switch modes between solve_ivp events
+    hysteresis: float = 0.01  # K, event-driven mode only
+    max_events: int = 100000  # event-driven mode only
+    jit: bool = True  # use the numba-compiled RHS when numba is installed
+    # Output control, see `sampling.sample_solution`; every step by default
+    t_eval: tuple[float, ...] | None = None  # s, fixed output times
+    output_tolerance: float | None = None  # K, drop linearly interpolable samples
+    output_window: float | None = None  # s, keep only min/max/mean per window
+    # Early termination, see `equilibrium.EquilibriumDetector`; None runs to t_end
+    equilibrium_rate: float | None = None  # K/s, largest settled dT/dt
+    equilibrium_duty: float = 0.01  # largest settled heater duty cycle change
+    equilibrium_window: float = 1e5  # s, shortest time both have to hold
+
+    @property
+    def implicit(self) -> bool:
+        return self.method in IMPLICIT_METHODS
+
+    @property
+    def effective_switch_smoothing(self) -> float:
+        if self.switch_smoothing is not None:
+            return self.switch_smoothing
+
+        # Frozen modes are already smooth
+        if self.event_driven:
+            return 0.0
+
+        return DEFAULT_IMPLICIT_SMOOTHING if self.implicit else 0.0
+
+
+def integrate(
+    arrays: ArrayArchitecture,
+    environment: EnvironmentalConditions,
+    settings: SolverSettings,
+    probe: SolverProbe | None = None,
+):
+    """
+    Integrates the thermal ODE from the architecture's initial temperatures
+
+    The state is the component temperatures, followed by the heater controller
+    states if there are any; energy terms are integrated afterwards from the
+    dense output, see `energy.integrate_heat_flows`.
+    `arrays` should be compiled with
+    `settings.effective_switch_smoothing`, see `compile_for`. With
+    `settings.event_driven` the heater, louver and switch thresholds are
+    handled as events, see `integrate_event_driven`. With `settings.jit`
+    and numba installed, architectures `CompiledODE` supports use its
+    compiled RHS and Jacobian. A probe counts and times the RHS and Jacobian
+    calls, see `instrumentation.SolverProbe`. With `settings.equilibrium_rate`
+    the integration stops once the spacecraft has settled, see
+    `equilibrium.EquilibriumDetector`.
+
+    Parameters
+    ----------
+    arrays: ArrayArchitecture
+        spacecraft thermal architecture in array form
+    environment: EnvironmentalConditions
+        environmental conditions surrounding the spacecraft
+    settings: SolverSettings
+        integrator settings
+    probe: SolverProbe | None
+        opt-in instrumentation, nothing is wrapped without one
+
+    Returns
+    -------
+    OdeResult
+        the `solve_ivp` solution, with dense output, plus `t_equilibrium` (s),
+        the time the spacecraft had settled by when stopped at equilibrium and
+        None otherwise
+    """
+    options = {}
+    fun, jac = thermal_ode_vectorized, thermal_jacobian
+
+    if settings.jit and JIT_AVAILABLE and supports_compiled(arrays):
+        compiled = CompiledODE(arrays, environment)
+        fun, jac = compiled.rhs, compiled.jacobian
+
+    if probe is not None:
+        fun, jac = probe.wrap_rhs(fun), probe.wrap_jacobian(jac)
+
+    if settings.implicit and settings.use_jacobian:
+        options["jac"] = jac
+
+        # LSODA only accepts dense Jacobians
+        if settings.method == "LSODA" and settings.sparse:
+
+            def dense_jacobian(t, y, *args):
+                return jac(t, y, *args).toarray()
+
+            options["jac"] = dense_jacobian
+
+    y0 = initial_state(arrays)
+
+    equilibrium = None
+    if settings.equilibrium_rate is not None:
+        equilibrium = EquilibriumDetector(
+            arrays,
+            environment,
+            settings.equilibrium_rate,
+            settings.equilibrium_duty,
+            settings.equilibrium_window,
+        )
+
+    if settings.event_driven:
+        sol = integrate_event_driven(
+            fun,
+            options.get("jac"),
+            y0,
+            (0, settings.t_end),
+            arrays,
+            environment,
+            method=settings.method,
+            rtol=settings.rtol,
+            atol=settings.atol,
+            hysteresis=settings.hysteresis,
+            max_events=settings.max_events,
+            dense_output=True,
+            equilibrium=equilibrium,
+        )
+    else:
+        sol = solve_ivp(
+            fun,
+            (0, settings.t_end),
+            y0,
+            args=(arrays, environment),
+            method=settings.method,
+            rtol=settings.rtol,
+            atol=settings.atol,
+            dense_output=True,
+            events=equilibrium,
+            **options,
+        )
+
+    # The steps of explicit methods are replayed by `integrate_heat_flows`
+    sol.method = settings.method
+    sol.t_equilibrium = None
+    if equilibrium is not None and equilibrium.t_equilibrium is not None:
+        sol.t_equilibrium = equilibrium.t_equilibrium
+        sol.message = "Reached thermal equilibrium."
+
+    return sol
+
+
+def solution_stats(sol, settings: SolverSettings) -> dict[str, int]:
+    """
+    Returns the work counters of an `integrate` solution: RHS evaluations,
+    Jacobian evaluations, LU decompositions, accepted steps and, where they can
+    be told, rejected steps
+
+    `solve_ivp` doesn't count rejected steps. An explicit Runge-Kutta run
+    costs 2 RHS evaluations to start and a fixed number per step attempt
+    (`RK_EVALUATIONS`), which gives them back; implicit and event-driven runs
+    leave them out.
+    """
+    stats = {
+        name: int(getattr(sol, name))
+        for name in ("nfev", "njev", "nlu")
+        if hasattr(sol, name)
+    }
+    stats["nsteps"] = len(sol.t) - 1
+
+    if settings.method in RK_EVALUATIONS and not settings.event_driven:
+        per_attempt, per_step = RK_EVALUATIONS[settings.method]
+        attempts = (stats["nfev"] - 2 - per_step * stats["nsteps"]) // per_attempt
+        stats["nrejected"] = attempts - stats["nsteps"]
+
+    return stats
+
+
+def compile_for(
+    spacecraft: ThermalArchitecture, case_flags: dict, settings: SolverSettings
+) -> ArrayArchitecture:
+    """
+    Compiles a spacecraft thermal architecture with the sparsity and switch
+    smoothing requested by the solver settings
+    """
+    return compile_architecture(
+        spacecraft,
+        case_flags,
+        sparse=settings.sparse,
+        switch_smoothing=settings.effective_switch_smoothing,
+    )
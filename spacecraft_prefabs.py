@@ -4,51 +4,93 @@ from component_prefabs import get_components
 import numpy as np
 
 
-conductivity_matrix = [[ThermalLink(conductance=0) for _ in range(8)] for _ in range(8)]
-
-# Radiators <-> Structure
-conductivity_matrix[0][1] = ThermalLink(conductance=20)
-
-# Radiators <-> Sample Box
-# Thermal switch which shuts off which shuts off when radiator would heat component to greather than 160 K
-# (limit for sample preservation is 193 K)
-conductivity_matrix[0][4] = ThermalSwitch(
-    conductance=20, cool_limit=0, heat_limit=160, attenuation_factor=100
-)
-
-# Structure <-> Components
-# Structure <-> Electronics
-conductivity_matrix[1][2] = ThermalSwitch(
-    conductance=20, cool_limit=280, heat_limit=310, attenuation_factor=100
-)
-# Structure <-> Solar Arrays
-conductivity_matrix[1][3] = ThermalSwitch(
-    conductance=30, cool_limit=250, heat_limit=350, attenuation_factor=100
-)
-# Structure <-> Sample Box: Keep the sample box cold
-conductivity_matrix[1][4] = ThermalSwitch(
-    conductance=20, cool_limit=0, heat_limit=150, attenuation_factor=100
-)
-# Structure <-> Propellant Tanks: Keep hydrazine liquid
-conductivity_matrix[1][5] = ThermalSwitch(
-    conductance=10, cool_limit=288, heat_limit=400, attenuation_factor=100
-)
-# Structure <-> Engines
-conductivity_matrix[1][6] = ThermalSwitch(
-    conductance=10, cool_limit=250, heat_limit=300, attenuation_factor=100
-)
-# Structure <-> Antenna
-conductivity_matrix[1][7] = ThermalSwitch(
-    conductance=20, cool_limit=250, heat_limit=330, attenuation_factor=100
-)
-
-# Symmetrize Matrix
-for i in range(int(len(conductivity_matrix) / 2)):
-    for j in range(len(conductivity_matrix)):
-        conductivity_matrix[j][i] = conductivity_matrix[i][j]
-
-
-def get_srs(case_flags: dict) -> ThermalArchitecture:
+def get_conductivity_matrix() -> list[list[ThermalLink]]:
+    """
+    Returns a new symmetric 8 x 8 matrix of the links between the components,
+    so no two spacecraft share (and can modify) the same link objects
+    """
+    conductivity_matrix = [
+        [ThermalLink(conductance=0) for _ in range(8)] for _ in range(8)
+    ]
+
+    # Radiators <-> Structure
+    conductivity_matrix[0][1] = ThermalLink(conductance=20)
+
+    # Radiators <-> Sample Box
+    # Thermal switch which shuts off which shuts off when radiator would heat component to greather than 160 K
+    # (limit for sample preservation is 193 K)
+    conductivity_matrix[0][4] = ThermalSwitch(
+        conductance=20, cool_limit=0, heat_limit=160, attenuation_factor=100
+    )
+
+    # Structure <-> Components
+    # Structure <-> Electronics
+    conductivity_matrix[1][2] = ThermalSwitch(
+        conductance=20, cool_limit=280, heat_limit=310, attenuation_factor=100
+    )
+    # Structure <-> Solar Arrays
+    conductivity_matrix[1][3] = ThermalSwitch(
+        conductance=30, cool_limit=250, heat_limit=350, attenuation_factor=100
+    )
+    # Structure <-> Sample Box: Keep the sample box cold
+    conductivity_matrix[1][4] = ThermalSwitch(
+        conductance=20, cool_limit=0, heat_limit=150, attenuation_factor=100
+    )
+    # Structure <-> Propellant Tanks: Keep hydrazine liquid
+    conductivity_matrix[1][5] = ThermalSwitch(
+        conductance=10, cool_limit=288, heat_limit=400, attenuation_factor=100
+    )
+    # Structure <-> Engines
+    conductivity_matrix[1][6] = ThermalSwitch(
+        conductance=10, cool_limit=250, heat_limit=300, attenuation_factor=100
+    )
+    # Structure <-> Antenna
+    conductivity_matrix[1][7] = ThermalSwitch(
+        conductance=20, cool_limit=250, heat_limit=330, attenuation_factor=100
+    )
+
+    # Symmetrize Matrix
+    for i in range(len(conductivity_matrix)):
+        for j in range(i + 1, len(conductivity_matrix)):
+            conductivity_matrix[j][i] = conductivity_matrix[i][j]
+
+    return conductivity_matrix
+
+
+# Fraction of the first component's radiative area that sees the second; the
+# reverse follows from reciprocity, A_i * F_ij = A_j * F_ji. Illustrative
+# values, not taken from the spacecraft geometry, so `get_srs` only uses them
+# when asked to.
+view_factor_pairs = [
+    # Radiators -> Structure
+    (0, 1, 0.05),
+    # Radiators -> Solar Arrays
+    (0, 3, 0.05),
+    # Structure -> Solar Arrays
+    (1, 3, 0.1),
+    # Antenna -> Structure
+    (7, 1, 0.1),
+    # Antenna -> Solar Arrays
+    (7, 3, 0.05),
+]
+
+
+def get_view_factors(rad_areas, pairs=view_factor_pairs) -> np.ndarray:
+    """
+    Returns the view factor matrix between the components from (i, j, F_ij)
+    pairs, `view_factor_pairs` by default, and the components' radiative areas
+    """
+    view_factors = np.zeros((len(rad_areas), len(rad_areas)))
+
+    for i, j, view_factor in pairs:
+        view_factors[i, j] = view_factor
+        if rad_areas[j] > 0:
+            view_factors[j, i] = rad_areas[i] * view_factor / rad_areas[j]
+
+    return view_factors
+
+
+def get_srs(case_flags: dict, view_factor_pairs=None) -> ThermalArchitecture:
     """
     Returns the sample return spacecraft thermal architecture
     for a given set of case flags
@@ -57,6 +99,9 @@ def get_srs(case_flags: dict) -> ThermalArchitecture:
     ----------
     case_flags: dict
         dictionary of case flags
+    view_factor_pairs: list[tuple[int, int, float]] | None
+        (i, j, F_ij) view factors between the components, see
+        `get_view_factors`; None leaves out component <-> component radiation
 
 
     Returns
@@ -65,10 +110,12 @@ def get_srs(case_flags: dict) -> ThermalArchitecture:
         the spacecraft thermal architecture
     """
 
+    components = get_components(case_flags)
+
     return ThermalArchitecture(
-        get_components(case_flags),
+        components,
         # Symmetric matrix
-        conductivity_matrix=conductivity_matrix,
+        conductivity_matrix=get_conductivity_matrix(),
         # Skew-symmetric matrix
         active_transport_matrix=np.array(
             [
@@ -84,4 +131,7 @@ def get_srs(case_flags: dict) -> ThermalArchitecture:
         )
         if case_flags["active_cooling"]
         else np.zeros((8, 8)),
+        view_factors=None
+        if view_factor_pairs is None
+        else get_view_factors([c.rad_area for c in components], view_factor_pairs),
     )
@@ -0,0 +1,405 @@
+from dataclasses import dataclass, replace
+
+import numpy as np
+import numpy.typing as npt
+from scipy import sparse
+from scipy.sparse.linalg import spsolve
+
+from array_architecture import ArrayArchitecture, SwitchingModes, switching_fraction
+from base_classes import EnvironmentalConditions
+from energy import EnergyAccount, integrate_heat_flows
+from events import SwitchingSurfaces, build_switching_surfaces, modes_from_sides
+from odes import component_heat_flows, thermal_jacobian, thermal_ode_vectorized
+from orbit import OrbitEnvironment
+from solver import DEFAULT_IMPLICIT_SMOOTHING, SolverSettings, integrate
+
+# K, switch ramp widths the continuation stage works its way down through
+CONTINUATION_SMOOTHING = (1.0, DEFAULT_IMPLICIT_SMOOTHING)
+
+
+@dataclass
+class SteadyStateResult:
+    temps: npt.NDArray[np.floating]  # K, equilibrium component temperatures
+    modes: SwitchingModes  # heater/louver/switch states, duty fractions while sliding
+
+    # W, same terms as the power accumulators of `thermal_ode`
+    innate_power: float
+    heater_power: float
+    incoming_radiative_power: float
+    rejected_radiative_power: float
+
+    method: str  # "newton", or "transient" when the direct solve didn't converge
+    iterations: int  # continuation steps plus Newton iterations
+
+    @property
+    def converged(self) -> bool:
+        return self.method == "newton"
+
+    @property
+    def powers(self) -> npt.NDArray[np.floating]:
+        return np.array(
+            [
+                self.innate_power,
+                self.heater_power,
+                self.incoming_radiative_power,
+                self.rejected_radiative_power,
+            ]
+        )
+
+
+def _solve(matrix, rhs):
+    if sparse.issparse(matrix):
+        return spsolve(sparse.csc_matrix(matrix), rhs)
+
+    return np.linalg.solve(matrix, rhs)
+
+
+def _heat_flow_jacobian(temps, arrays, environment, modes=None):
+    # W/K, `thermal_jacobian` without the thermal inertia
+    jacobian = thermal_jacobian(0.0, temps, arrays, environment, modes)
+
+    if sparse.issparse(jacobian):
+        return sparse.csr_matrix(sparse.diags(arrays.thermal_inertia) @ jacobian)
+
+    return arrays.thermal_inertia[:, None] * jacobian
+
+
+def _pseudo_transient(
+    arrays: ArrayArchitecture,
+    environment: EnvironmentalConditions,
+    temps: npt.NDArray[np.floating],
+    max_steps: int,
+    max_change: float = 2.0,
+    xtol: float = 1e-4,
+):
+    """
+    Pseudo-transient continuation: implicit Euler steps of the ODE, lengthened
+    while they change the temperatures by less than `max_change` (K) so they
+    end up as Newton steps on the heat balance
+
+    Returns the final temperatures, the number of steps taken and whether they
+    converged.
+    """
+    time_step = 100.0  # s
+
+    for step in range(1, max_steps + 1):
+        flows = thermal_ode_vectorized(0.0, temps, arrays, environment)
+        flows = flows * arrays.thermal_inertia
+        jacobian = _heat_flow_jacobian(temps, arrays, environment)
+
+        if sparse.issparse(jacobian):
+            system = sparse.diags(arrays.thermal_inertia / time_step) - jacobian
+        else:
+            system = np.diag(arrays.thermal_inertia / time_step) - jacobian
+
+        try:
+            update = _solve(system, flows)
+        except np.linalg.LinAlgError:
+            return temps, step, False
+
+        change = np.max(np.abs(update))
+        if not np.isfinite(change) or np.any(temps + update <= 0):
+            time_step /= 10
+            continue
+
+        if change > 2 * max_change:
+            time_step *= 0.5 * max_change / change
+            continue
+
+        temps = temps + update
+
+        if change < xtol and time_step > 1e8:
+            return temps, step, True
+
+        time_step *= min(max_change / max(change, 1e-12), 10)
+
+    return temps, max_steps, False
+
+
+def _sliding_newton(
+    temps: npt.NDArray[np.floating],
+    sides: npt.NDArray[np.floating],
+    sliding: npt.NDArray[np.bool_],
+    surfaces: SwitchingSurfaces,
+    arrays: ArrayArchitecture,
+    environment: EnvironmentalConditions,
+    max_iterations: int,
+    xtol: float,
+):
+    """
+    Damped Newton iteration on the heat balance with the modes frozen
+
+    Components on a sliding surface are held at its temperature, the side of
+    that surface (the duty fraction) taking their place as the unknown. Returns
+    the temperatures, sides, number of iterations and whether it converged.
+    """
+    num_components = arrays.num_components
+    sliding_surfaces = np.flatnonzero(sliding)
+    pinned = surfaces.nodes[sliding_surfaces]
+    free = np.ones(num_components, dtype=bool)
+    free[pinned] = False
+
+    temps = temps.copy()
+    temps[pinned] = surfaces.offset[sliding_surfaces]
+    sides = sides.copy()
+
+    def heat_flows(temps, sides):
+        # W, the ODE's temperature rates without the thermal inertia
+        modes = modes_from_sides(sides, surfaces, arrays, environment)
+        rates = thermal_ode_vectorized(0.0, temps, arrays, environment, modes)
+        return rates * arrays.thermal_inertia, modes
+
+    flows, modes = heat_flows(temps, sides)
+    residual = np.max(np.abs(flows))
+
+    for iteration in range(1, max_iterations + 1):
+        jacobian = _heat_flow_jacobian(temps, arrays, environment, modes)
+
+        if len(pinned):
+            # The heat flows are linear in the sides
+            duty_columns = np.empty((num_components, len(pinned)))
+            for column, surface in enumerate(sliding_surfaces):
+                above, below = sides.copy(), sides.copy()
+                above[surface], below[surface] = 1.0, 0.0
+                duty_columns[:, column] = (
+                    heat_flows(temps, above)[0] - heat_flows(temps, below)[0]
+                )
+
+            if sparse.issparse(jacobian):
+                jacobian = jacobian.tolil()
+                jacobian[:, pinned] = duty_columns
+                jacobian = jacobian.tocsr()
+            else:
+                jacobian[:, pinned] = duty_columns
+
+        try:
+            step = _solve(jacobian, -flows)
+        except np.linalg.LinAlgError:
+            return temps, sides, iteration, False
+
+        if not np.all(np.isfinite(step)):
+            return temps, sides, iteration, False
+
+        # Backtrack until the temperatures stay positive and the heat balance
+        # improves
+        damping = 1.0
+        while damping > 1e-6:
+            new_temps, new_sides = temps.copy(), sides.copy()
+            new_temps[free] += damping * step[free]
+            new_sides[sliding_surfaces] += damping * step[pinned]
+
+            if np.all(new_temps > 0):
+                new_flows, new_modes = heat_flows(new_temps, new_sides)
+                new_residual = np.max(np.abs(new_flows))
+                if new_residual < residual or damping * np.max(np.abs(step)) < xtol:
+                    break
+
+            damping /= 2
+        else:
+            return temps, sides, iteration, False
+
+        temps, sides = new_temps, new_sides
+        flows, modes, residual = new_flows, new_modes, new_residual
+
+        update = np.abs(damping * step[free])
+        if update.size == 0 or np.max(update) < xtol:
+            return temps, sides, iteration, True
+
+    return temps, sides, max_iterations, False
+
+
+def solve_steady_state(
+    arrays: ArrayArchitecture,
+    environment: EnvironmentalConditions,
+    initial_temps: npt.NDArray[np.floating] | None = None,
+    xtol: float = 1e-8,
+    max_iterations: int = 500,
+    max_mode_iterations: int = 20,
+    fallback: SolverSettings | None = None,
+) -> SteadyStateResult:
+    """
+    Solves for the equilibrium temperatures of the thermal ODE directly
+
+    The equilibrium with smoothed switches (see `switching_fraction`) is found
+    first by pseudo-transient continuation, narrowing the ramps through
+    `CONTINUATION_SMOOTHING` as far as it converges. It's then refined with
+    the heater, louver and switch modes frozen: the heat balance is solved by
+    Newton's method with the analytic Jacobian, the modes are re-read from the
+    solution and the solve repeated until they agree with it. A component
+    which settles on one of its thresholds (e.g. too hot with its heater on,
+    too cold with it off) is held there with the duty fraction of that
+    threshold as the unknown, the equilibrium of the event-driven
+    integrator's sliding mode.
+
+    When the direct solve doesn't converge the ODE is integrated to
+    `fallback.t_end` instead.
+
+    Orbit environments have no equilibrium, only a periodic solution. They are
+    solved with their orbit-averaged fluxes (`OrbitEnvironment.averaged`),
+    whose equilibrium the periodic solution swings around: close to its mean
+    for components slow against the orbit, but not exactly, since radiation
+    goes as T^4. Other time-varying environments raise a ValueError.
+
+    Parameters
+    ----------
+    arrays: ArrayArchitecture
+        spacecraft thermal architecture in array form
+    environment: EnvironmentalConditions
+        environmental conditions surrounding the spacecraft
+    initial_temps: npt.NDArray[np.floating] | None
+        K, starting point, `arrays.initial_temps` by default
+    xtol: float
+        K, Newton stops once the largest temperature update is below this
+    max_iterations: int
+        continuation steps per smoothing width, and Newton iterations per set
+        of modes
+    max_mode_iterations: int
+        number of mode updates before giving up on the direct solve
+    fallback: SolverSettings | None
+        transient integration settings, event-driven BDF to 1e8 s or
+        equilibrium by default
+
+    Returns
+    -------
+    SteadyStateResult
+        equilibrium temperatures, modes and power terms
+
+    Math
+    ----
+    0 = Q(T, modes), Newton: dQ/dT @ dT = -Q
+    continuation: (C / dt - dQ/dT) @ dT = Q
+    """
+    if type(environment).absorbed_flux is not EnvironmentalConditions.absorbed_flux:
+        if not isinstance(environment, OrbitEnvironment):
+            raise ValueError(f"no steady state in time-varying {environment.name!r}")
+        environment = environment.averaged()
+
+    surfaces = build_switching_surfaces(arrays, environment, static_controls=True)
+
+    temps = np.array(
+        arrays.initial_temps if initial_temps is None else initial_temps, dtype=float
+    )
+
+    # Narrower ramps get closer to the hard thresholds but can stall on them;
+    # the sliding solve below starts from the narrowest one which converged
+    iterations = 0
+    smoothing = None
+    for width in CONTINUATION_SMOOTHING:
+        smooth_temps, steps, smooth_converged = _pseudo_transient(
+            replace(arrays, switch_smoothing=width),
+            environment,
+            temps,
+            max_iterations,
+        )
+        iterations += steps
+
+        if not smooth_converged:
+            break
+
+        temps, smoothing = smooth_temps, width
+
+    if smoothing is None:
+        return _transient_steady_state(arrays, environment, fallback, iterations)
+
+    # Single-component thresholds within a few ramp widths are candidates for
+    # sliding, with the smoothed mode as the first guess of the duty fraction.
+    # They have to switch something on their component (a switch's cool limit
+    # doesn't while it's heated) and only the closest one per component can
+    # hold it.
+    values = surfaces.values(temps)
+    sides = (values > 0).astype(float)
+    distance = np.where(surfaces.nodes >= 0, np.abs(values), np.inf)
+    sliding = distance < 5 * smoothing
+    for surface in np.flatnonzero(sliding):
+        node_flows = []
+        for side in (0.0, 1.0):
+            trial = sides.copy()
+            trial[surface] = side
+            modes = modes_from_sides(trial, surfaces, arrays, environment)
+            node_flows.append(
+                thermal_ode_vectorized(0.0, temps, arrays, environment, modes)[
+                    surfaces.nodes[surface]
+                ]
+            )
+        sliding[surface] = node_flows[0] != node_flows[1]
+
+    for node in np.unique(surfaces.nodes[sliding]):
+        on_node = np.flatnonzero(sliding & (surfaces.nodes == node))
+        sliding[on_node[on_node != on_node[np.argmin(distance[on_node])]]] = False
+
+    sides[sliding] = switching_fraction(values[sliding], smoothing)
+
+    seen = set()
+    converged = False
+
+    for mode_iteration in range(max_mode_iterations):
+        temps, sides, newton_iterations, newton_converged = _sliding_newton(
+            temps,
+            sides,
+            sliding,
+            surfaces,
+            arrays,
+            environment,
+            max_iterations,
+            xtol,
+        )
+        iterations += newton_iterations
+        if not newton_converged:
+            break
+
+        # Duty fractions outside [0, 1] mean the component leaves the threshold
+        leaving = sliding & ((sides < 0) | (sides > 1))
+        sides[leaving] = np.clip(np.round(sides[leaving]), 0, 1)
+        sliding &= ~leaving
+
+        new_sides = np.where(sliding | leaving, sides, surfaces.values(temps) > 0)
+        if not leaving.any() and np.array_equal(new_sides, sides):
+            converged = True
+            break
+
+        key = (new_sides.tobytes(), sliding.tobytes())
+        if key in seen:
+            break
+
+        seen.add(key)
+        sides = new_sides.astype(float)
+
+    if not converged:
+        return _transient_steady_state(arrays, environment, fallback, iterations)
+
+    modes = modes_from_sides(sides, surfaces, arrays, environment)
+    flows = component_heat_flows(0.0, temps, arrays, environment, modes)
+    powers = [
+        np.sum(flows[term])
+        for term in ("innate", "heater", "incident_radiative", "rejected_radiative")
+    ]
+
+    return SteadyStateResult(temps, modes, *powers, "newton", iterations)
+
+
+def _transient_steady_state(
+    arrays: ArrayArchitecture,
+    environment: EnvironmentalConditions,
+    settings: SolverSettings | None,
+    iterations: int,
+) -> SteadyStateResult:
+    # Integrates to the end time, or until the spacecraft settles, and reads
+    # the final temperatures and the powers averaged over the end of the run,
+    # like `run_sim`. Some cases are still drifting at `run_sim`'s 1e6 s.
+    if settings is None:
+        settings = SolverSettings(
+            method="BDF", t_end=1e8, event_driven=True, equilibrium_rate=1e-7
+        )
+
+    sol = integrate(arrays, environment, settings)
+
+    temps = sol.y[: arrays.num_components, -1]
+    energy = integrate_heat_flows(sol, arrays, environment)
+    powers = EnergyAccount(sol.t, energy).summary_powers()
+
+    surfaces = build_switching_surfaces(arrays, environment, static_controls=True)
+    modes = modes_from_sides(
+        (surfaces.values(temps) > 0).astype(float), surfaces, arrays, environment
+    )
+
+    return SteadyStateResult(temps, modes, *powers, "transient", iterations)
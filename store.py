@@ -0,0 +1,173 @@
+import dataclasses
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+import numpy.typing as npt
+
+from odes import HEAT_FLOW_TERMS
+from results import POWER_LABELS, SimulationResult
+
+# Channels stored per case, each a separate .npy file so one can be loaded (or
+# memory-mapped) without touching the others
+TIME_CHANNEL = "t"  # s, (T,)
+TEMPERATURE_CHANNEL = "temperature"  # K, (N, T)
+# W, heat flow of each term, then J, the cumulative energy of each term
+ENERGY_CHANNELS = tuple(f"{term}_energy" for term in HEAT_FLOW_TERMS)
+COMPONENT_CHANNELS = (TEMPERATURE_CHANNEL,) + HEAT_FLOW_TERMS + ENERGY_CHANNELS
+# K, (2, N, T) minimum and maximum temperature per output window, only stored
+# for results sampled by window
+ENVELOPE_CHANNEL = "temperature_envelope"
+
+METADATA_FILE = "meta.json"
+
+
+def save_atomic(path: Path, write):
+    # Writes through a temporary file so readers never see a partial file
+    fd, temporary = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+class ResultStore:
+    """
+    Columnar on-disk store of simulation results
+
+    Every case gets a directory named after `SimulationResult.output_name`
+    holding one .npy file per channel (the time samples, the temperatures,
+    each heat flow term of `odes.HEAT_FLOW_TERMS` and its cumulative energy,
+    and the temperature envelope of results sampled by window) plus a
+    meta.json with the case flags, environment, component names, solver
+    statistics (and profile when instrumented) and average powers. The
+    metadata is written last, so a case is only listed once all of its
+    channels are complete.
+    """
+
+    def __init__(self, directory: str | os.PathLike = "outputs/store"):
+        self.directory = Path(directory)
+
+    def write(self, result: SimulationResult) -> Path:
+        """
+        Stores the full time history of a simulation, returns its directory
+        """
+        case_directory = self.directory / result.output_name
+        case_directory.mkdir(parents=True, exist_ok=True)
+
+        channels = {
+            TIME_CHANNEL: result.t,
+            TEMPERATURE_CHANNEL: result.temps,
+            **result.heat_flows,
+            **dict(zip(ENERGY_CHANNELS, result.energy)),
+        }
+        if result.envelope is not None:
+            channels[ENVELOPE_CHANNEL] = result.envelope
+        for channel, values in channels.items():
+            save_atomic(
+                case_directory / f"{channel}.npy",
+                lambda f: np.save(f, np.ascontiguousarray(values, dtype=float)),
+            )
+
+        metadata = {
+            "case_name": result.case_name,
+            "case_flags": result.case_flags,
+            "environment": dataclasses.asdict(result.environment),
+            "component_names": list(result.component_names),
+            "channels": list(channels),
+            "num_samples": len(result.t),
+            "success": bool(result.success),
+            "message": result.message,
+            "solve_time": result.solve_time,
+            "cached": result.cached,
+            "stats": result.stats,
+            "t_equilibrium": result.t_equilibrium,
+            "profile": None if result.profile is None else result.profile.to_dict(),
+            "average_powers": dict(
+                zip(POWER_LABELS, result.average_powers.tolist())
+            ),
+        }
+        save_atomic(
+            case_directory / METADATA_FILE,
+            # Time-varying environments hold their flux tables as arrays
+            lambda f: f.write(
+                json.dumps(metadata, indent=2, default=np.ndarray.tolist).encode()
+            ),
+        )
+
+        return case_directory
+
+    def names(self) -> list[str]:
+        """
+        Returns the output names of every complete case in the store
+        """
+        return sorted(
+            path.parent.name for path in self.directory.glob(f"*/{METADATA_FILE}")
+        )
+
+    def metadata(self, name: str) -> dict:
+        with open(self.directory / name / METADATA_FILE) as f:
+            return json.load(f)
+
+    def load(
+        self,
+        name: str,
+        channel: str,
+        component: int | str | None = None,
+        mmap: bool = True,
+    ) -> npt.NDArray[np.floating]:
+        """
+        Loads one channel of a case, or one component's row of it
+
+        Parameters
+        ----------
+        name: str
+            output name of the case, see `names`
+        channel: str
+            "t", one of `COMPONENT_CHANNELS` or `ENVELOPE_CHANNEL` (whole
+            channel only)
+        component: int | str | None
+            component index or name, the whole (N, T) channel by default
+        mmap: bool
+            memory-map the file instead of reading it, so selecting a component
+            only reads that row
+
+        Returns
+        -------
+        npt.NDArray[np.floating]
+            channel values
+        """
+        values = np.load(
+            self.directory / name / f"{channel}.npy", mmap_mode="r" if mmap else None
+        )
+
+        if component is None:
+            return values
+
+        if isinstance(component, str):
+            component = self.metadata(name)["component_names"].index(component)
+
+        return np.array(values[component])
+
+    def series(
+        self,
+        channel: str,
+        component: int | str,
+        names: list[str] | None = None,
+    ) -> Iterator[tuple[str, npt.NDArray[np.floating], npt.NDArray[np.floating]]]:
+        """
+        Yields (name, t, values) of one component's channel for many cases, all
+        stored cases by default
+        """
+        for name in self.names() if names is None else names:
+            yield (
+                name,
+                np.array(self.load(name, TIME_CHANNEL)),
+                self.load(name, channel, component),
+            )
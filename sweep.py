@@ -0,0 +1,213 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterator
+
+import numpy as np
+
+from base_classes import EnvironmentalConditions, ThermalArchitecture
+from cache import CachedSolution, ResultCache
+from case_generation import group_cases
+from control import split_state
+from energy import integrate_heat_flows
+from instrumentation import SolverProbe
+from odes import component_heat_flows
+from results import SimulationResult
+from sampling import sample_solution
+from solver import SolverSettings, compile_for, integrate, solution_stats
+from spacecraft_prefabs import get_srs
+
+
+def solve(
+    spacecraft: ThermalArchitecture,
+    case_flags: dict,
+    case_name: str,
+    environment: EnvironmentalConditions,
+    settings: SolverSettings | None = None,
+    cache: ResultCache | None = None,
+    instrument: bool = False,
+) -> SimulationResult:
+    """
+    Integrates one case, numerics only
+
+    With a cache, a case whose compiled architecture, environment and settings
+    were solved before is read back instead of integrated. With `instrument`
+    the case is always integrated, under a `SolverProbe`, and the result
+    carries its `SolverProfile`. Only the output times the settings ask for
+    are kept, see `sampling.sample_solution`.
+    """
+    if settings is None:
+        settings = SolverSettings()
+
+    start = time.perf_counter()
+
+    arrays = compile_for(spacecraft, case_flags, settings)
+
+    component_names = [
+        component.name or f"Component {i}"
+        for i, component in enumerate(spacecraft.components)
+    ]
+
+    key = None if cache is None else cache.key(arrays, environment, settings)
+    solution = None if key is None or instrument else cache.get(key)
+    cached = solution is not None
+    probe = SolverProbe(arrays, environment) if instrument else None
+    profile = None
+
+    if not cached:
+        sol = integrate(arrays, environment, settings, probe)
+        sampled = sample_solution(
+            sol,
+            integrate_heat_flows(sol, arrays, environment),
+            arrays,
+            environment,
+            settings,
+        )
+        solution = CachedSolution(
+            t=sampled.t,
+            y=sampled.y,
+            energy=sampled.energy,
+            success=sol.success,
+            message=sol.message,
+            solve_time=time.perf_counter() - start,
+            stats=solution_stats(sol, settings),
+            envelope=sampled.envelope,
+            t_equilibrium=sol.t_equilibrium,
+        )
+
+        if key is not None and solution.success:
+            cache.put(key, solution)
+
+        if probe is not None:
+            profile = probe.report(sol, solution.solve_time, component_names)
+
+    # Per-component heat flows along the trajectory, modes read from the
+    # temperatures
+    temps, controller_states = split_state(solution.y.T, arrays)
+    heat_flows = {
+        term: np.broadcast_to(flows, temps.shape).T.copy()
+        for term, flows in component_heat_flows(
+            solution.t, temps, arrays, environment, None, controller_states
+        ).items()
+    }
+
+    return SimulationResult(
+        case_name=case_name,
+        case_flags=case_flags,
+        environment=environment,
+        t=solution.t,
+        y=solution.y,
+        num_components=arrays.num_components,
+        success=solution.success,
+        message=solution.message,
+        solve_time=time.perf_counter() - start,
+        cached=cached,
+        component_names=component_names,
+        heat_flows=heat_flows,
+        energy=solution.energy,
+        stats=solution.stats,
+        profile=profile,
+        envelope=solution.envelope,
+        t_equilibrium=solution.t_equilibrium,
+    )
+
+
+def solve_case(
+    case_flags: dict,
+    case_name: str,
+    environment: EnvironmentalConditions,
+    settings: SolverSettings | None = None,
+    cache: ResultCache | None = None,
+    instrument: bool = False,
+) -> SimulationResult:
+    """
+    Builds the sample return spacecraft for the case flags and integrates it
+
+    Runs in the sweep's worker processes, so only the case flags and the small
+    `SimulationResult` cross the process boundary.
+    """
+    return solve(
+        get_srs(case_flags),
+        case_flags,
+        case_name,
+        environment,
+        settings,
+        cache,
+        instrument,
+    )
+
+
+def run_sweep(
+    environments: list[EnvironmentalConditions],
+    cases: dict[str, dict],
+    settings: SolverSettings | None = None,
+    max_workers: int | None = None,
+    cache: ResultCache | None = None,
+    instrument: bool = False,
+) -> Iterator[SimulationResult]:
+    """
+    Runs every environment x case combination on a process pool, yielding the
+    results as they finish (not in submission order)
+
+    Names whose flags build the same physics (see `case_generation.group_cases`)
+    are solved once per environment and yielded under each name.
+
+    Parameters
+    ----------
+    environments: list[EnvironmentalConditions]
+        environments to simulate each case in
+    cases: dict[str, dict]
+        case flags by case name
+    settings: SolverSettings | None
+        integrator settings shared by every case
+    max_workers: int | None
+        number of worker processes, all cores by default. 1 runs the sweep in
+        this process.
+    cache: ResultCache | None
+        on-disk result cache shared by the workers, cases already in it aren't
+        integrated again
+    instrument: bool
+        profile every case, see `solve`
+
+    Returns
+    -------
+    Iterator[SimulationResult]
+        one result per environment x case combination
+    """
+    groups = {group.name: group for group in group_cases(cases, settings)}
+    results = run_tasks(
+        [
+            (group.case_flags, name, environment, settings, cache, instrument)
+            for environment in environments
+            for name, group in groups.items()
+        ],
+        max_workers,
+    )
+
+    for result in results:
+        yield from groups[result.case_name].fan_out(result)
+
+
+def run_tasks(
+    tasks: list[tuple], max_workers: int | None = None
+) -> Iterator[SimulationResult]:
+    """
+    Runs `solve_case` for every tuple of its arguments on a process pool,
+    yielding the results as they finish, see `run_sweep`
+    """
+    if not tasks:
+        return
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    if max_workers == 1:
+        for task in tasks:
+            yield solve_case(*task)
+        return
+
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(tasks))) as pool:
+        futures = [pool.submit(solve_case, *task) for task in tasks]
+
+        for future in as_completed(futures):
+            yield future.result()
@@ -0,0 +1,62 @@
+import dataclasses
+
+import numpy as np
+
+import case_flags
+from cache import ResultCache, architecture_key
+from environmental_prefabs import EARTH, VENUS
+from solver import SolverSettings, compile_for
+from spacecraft_prefabs import get_srs
+from sweep import solve
+
+SETTINGS = SolverSettings(t_end=1e4)
+
+
+def test_keys_follow_the_physics(tmp_path):
+    cache = ResultCache(tmp_path)
+    flags = case_flags.BASELINE_WITH_HEATERS
+    arrays = compile_for(get_srs(flags), flags, SETTINGS)
+    key = cache.key(arrays, EARTH, SETTINGS)
+
+    # Names don't take part, values do
+    assert cache.key(arrays, dataclasses.replace(EARTH, name="x"), SETTINGS) == key
+    assert cache.key(arrays, VENUS, SETTINGS) != key
+    assert cache.key(arrays, EARTH, dataclasses.replace(SETTINGS, rtol=1e-4)) != key
+
+    hotter = dataclasses.replace(arrays, initial_temps=arrays.initial_temps + 1)
+    assert cache.key(hotter, EARTH, SETTINGS) != key
+    assert architecture_key(hotter) != architecture_key(arrays)
+
+
+def test_solve_reads_back_unchanged_cases(tmp_path):
+    cache = ResultCache(tmp_path)
+    flags = case_flags.BASELINE_WITH_HEATERS
+    spacecraft = get_srs(flags)
+
+    first = solve(spacecraft, flags, "first", EARTH, SETTINGS, cache)
+    again = solve(spacecraft, flags, "again", EARTH, SETTINGS, cache)
+    assert not first.cached and again.cached
+    np.testing.assert_array_equal(again.y, first.y)
+    np.testing.assert_array_equal(again.energy, first.energy)
+    assert cache.stats()["entries"] == 1
+
+    longer = dataclasses.replace(SETTINGS, t_end=2e4)
+    assert not solve(spacecraft, flags, "longer", EARTH, longer, cache).cached
+    assert not solve(spacecraft, flags, "venus", VENUS, SETTINGS, cache).cached
+    assert cache.stats()["entries"] == 3
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ResultCache(tmp_path, max_entries=2)
+    flags = case_flags.BASELINE_WITH_HEATERS
+    spacecraft = get_srs(flags)
+
+    keys = []
+    for t_end in (1e3, 2e3, 3e3):
+        settings = dataclasses.replace(SETTINGS, t_end=t_end)
+        solve(spacecraft, flags, "case", EARTH, settings, cache)
+        arrays = compile_for(spacecraft, flags, settings)
+        keys.append(cache.key(arrays, EARTH, settings))
+
+    assert cache.get(keys[0]) is None
+    assert cache.get(keys[1]) is not None and cache.get(keys[2]) is not None
@@ -0,0 +1,61 @@
+import pytest
+
+import case_flags
+from case_generation import (
+    CASE_FLAGS,
+    canonical_flags,
+    fractional_factorial,
+    full_factorial,
+    group_cases,
+    merge_cases,
+)
+
+
+def test_full_factorial_counts():
+    cases = full_factorial()
+    assert len(cases) == 2 ** len(CASE_FLAGS)
+    assert len({tuple(flags.values()) for flags in cases.values()}) == len(cases)
+
+    base = dict.fromkeys(CASE_FLAGS, False) | {"insulation": True}
+    cases = full_factorial(("rhus", "radiators", "louvers"), base)
+    assert len(cases) == 8
+    assert all(flags["insulation"] for flags in cases.values())
+    assert not any(flags["paint"] for flags in cases.values())
+
+
+def test_fractional_factorial_half_fractions():
+    generators = {"louvers": "radiators*active_cooling"}
+    half = fractional_factorial(generators)
+    other = fractional_factorial({"louvers": "-radiators*active_cooling"})
+
+    assert len(half) == len(other) == 2 ** (len(CASE_FLAGS) - 1)
+    # The two halves make up the full factorial
+    assert half.keys().isdisjoint(other.keys())
+    assert half | other == full_factorial()
+
+    # Defining relation I = radiators*active_cooling*louvers
+    for flags in half.values():
+        assert (flags["radiators"] == flags["active_cooling"]) == flags["louvers"]
+
+
+def test_invalid_designs_raise():
+    with pytest.raises(ValueError):
+        fractional_factorial({"louvers": "radiators*fins"})
+    with pytest.raises(ValueError):
+        fractional_factorial({"louvers": "radiators"}, factors=("louvers", "radiators"))
+    with pytest.raises(ValueError):
+        canonical_flags({"rhus": True})
+    with pytest.raises(ValueError):
+        merge_cases(
+            {"a": case_flags.NOTHING}, {"a": case_flags.BASELINE_WITH_HEATERS}
+        )
+
+
+def test_groups_cover_every_case_once():
+    cases = full_factorial(("paint", "insulation", "electric_heaters"))
+    groups = group_cases(cases)
+
+    grouped = [name for group in groups for name in group.cases]
+    assert sorted(grouped) == sorted(cases)
+    # Paint makes no difference under insulation
+    assert len(groups) < len(cases)
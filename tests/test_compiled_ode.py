@@ -0,0 +1,111 @@
+import importlib.util
+import sys
+
+import numpy as np
+import pytest
+
+from array_architecture import compile_architecture
+from case_flags import FINAL_DESIGN_ELEC_ON, NOTHING_WITH_RADIATORS_AND_LOUVERS
+import compiled_ode
+from compiled_ode import CompiledODE, supports_compiled
+from environmental_prefabs import EARTH, LOW_EARTH_ORBIT, VENUS
+from events import build_switching_surfaces, modes_from_sides
+from odes import thermal_jacobian, thermal_ode_vectorized
+from spacecraft_prefabs import get_srs, view_factor_pairs
+
+ENVIRONMENTS = {"earth": EARTH, "venus": VENUS, "leo": LOW_EARTH_ORBIT}
+CASES = {
+    "final design": FINAL_DESIGN_ELEC_ON,
+    "louvers": NOTHING_WITH_RADIATORS_AND_LOUVERS,
+}
+
+
+def _arrays(case, smoothing, view_factors):
+    case_flags = CASES[case]
+    return compile_architecture(
+        get_srs(case_flags, view_factor_pairs if view_factors else None),
+        case_flags,
+        switch_smoothing=smoothing,
+    )
+
+
+def _assert_matches_numpy(ode, arrays, environment, frozen, seed=0):
+    surfaces = build_switching_surfaces(arrays, environment)
+
+    rng = np.random.default_rng(seed)
+    for _ in range(5):
+        temps = arrays.initial_temps + rng.normal(0, 30, arrays.num_components)
+        # Orbit times off the table's sample points, and past one period
+        t = rng.uniform(0, 3 * getattr(environment, "period", 1e4))
+        modes = None
+        if frozen:
+            sides = rng.uniform(0, 1, len(surfaces.nodes))
+            modes = modes_from_sides(sides, surfaces, arrays, environment)
+
+        np.testing.assert_allclose(
+            ode.rhs(t, temps, modes=modes),
+            thermal_ode_vectorized(t, temps, arrays, environment, modes),
+            rtol=1e-10,
+            atol=1e-12,
+        )
+        np.testing.assert_allclose(
+            ode.jacobian(t, temps, modes=modes),
+            thermal_jacobian(t, temps, arrays, environment, modes),
+            rtol=1e-10,
+            atol=1e-12,
+        )
+
+
+@pytest.mark.skipif(not compiled_ode.JIT_AVAILABLE, reason="numba not installed")
+@pytest.mark.parametrize("environment", ENVIRONMENTS)
+@pytest.mark.parametrize("case", CASES)
+@pytest.mark.parametrize("smoothing", [0.0, 0.1])
+@pytest.mark.parametrize("view_factors", [False, True])
+@pytest.mark.parametrize("frozen", [False, True])
+def test_compiled_kernels_match_numpy(
+    environment, case, smoothing, view_factors, frozen
+):
+    arrays = _arrays(case, smoothing, view_factors)
+    environment = ENVIRONMENTS[environment]
+    assert supports_compiled(arrays)
+    ode = CompiledODE(arrays, environment)
+
+    _assert_matches_numpy(ode, arrays, environment, frozen)
+
+
+@pytest.mark.parametrize("frozen", [False, True])
+def test_plain_python_kernels_without_numba(monkeypatch, frozen):
+    # A fresh copy of the module which fails to import numba
+    monkeypatch.setitem(sys.modules, "numba", None)
+    spec = importlib.util.spec_from_file_location(
+        "compiled_ode_without_numba", compiled_ode.__file__
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    assert not module.JIT_AVAILABLE
+    assert module._jit(_arrays) is _arrays
+
+    arrays = _arrays("louvers", 0.1, True)
+    for environment in ENVIRONMENTS.values():
+        ode = module.CompiledODE(arrays, environment)
+        _assert_matches_numpy(ode, arrays, environment, frozen)
+
+
+def test_accumulator_states_fall_back_to_numpy():
+    arrays = _arrays("final design", 0.0, False)
+    ode = CompiledODE(arrays, EARTH)
+    y = np.concatenate((arrays.initial_temps, np.zeros(4)))
+
+    np.testing.assert_allclose(
+        ode.rhs(0.0, y), thermal_ode_vectorized(0.0, y, arrays, EARTH)
+    )
+
+
+def test_sparse_links_not_supported():
+    case_flags = FINAL_DESIGN_ELEC_ON
+    arrays = compile_architecture(get_srs(case_flags), case_flags, sparse=True)
+
+    assert not supports_compiled(arrays)
+    with pytest.raises(ValueError):
+        CompiledODE(arrays, EARTH)
@@ -0,0 +1,52 @@
+import numpy as np
+
+from array_architecture import compile_architecture
+from base_classes import ProportionalHeater, RelayHeater
+from case_flags import FINAL_DESIGN_ELEC_ON
+from control import controlled_heater_outputs, controller_rates, initial_state
+from spacecraft_prefabs import get_srs
+
+
+def _arrays():
+    case_flags = FINAL_DESIGN_ELEC_ON
+    spacecraft = get_srs(case_flags)
+    spacecraft.components[2].heater = RelayHeater(
+        power=100, set_temp=293, deadband=2, lag=10
+    )
+    spacecraft.components[3].heater = ProportionalHeater(
+        power=100, set_temp=293, band=5
+    )
+    return compile_architecture(spacecraft, case_flags)
+
+
+def test_relay_holds_its_output_inside_the_deadband():
+    arrays = _arrays()
+    relay = arrays.controls.output_state[arrays.controls.relay][0]
+    temps = arrays.initial_temps.copy()
+
+    for temp, output, direction in [
+        (290.0, 0.0, 1),  # below the band: switches on
+        (292.0, 0.0, 0),  # inside it: stays off...
+        (292.0, 1.0, 0),  # ...or on
+        (294.0, 1.0, -1),  # above the set point: switches off
+    ]:
+        temps[2] = temp
+        states = np.zeros(arrays.controls.num_states)
+        states[relay] = output
+
+        rate = controller_rates(temps, states, arrays)[relay]
+        assert np.sign(rate) == direction
+
+
+def test_proportional_output_falls_across_its_band():
+    arrays = _arrays()
+    temps = arrays.initial_temps.copy()
+    states = initial_state(arrays)[arrays.num_components :]
+
+    outputs = []
+    for temp in (285.0, 290.5, 293.0, 300.0):
+        temps[3] = temp
+        components, heater_outputs = controlled_heater_outputs(temps, states, arrays)
+        outputs.append(heater_outputs[list(components).index(3)])
+
+    np.testing.assert_allclose(outputs, [1.0, 0.5, 0.0, 0.0])
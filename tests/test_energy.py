@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+import case_flags
+from energy import integrate_heat_flows
+from environmental_prefabs import EARTH, ENCELADUS, LOW_EARTH_ORBIT, VENUS
+from solver import SolverSettings, compile_for, integrate
+from spacecraft_prefabs import get_srs
+
+ENVIRONMENTS = {
+    "earth": EARTH,
+    "venus": VENUS,
+    "enceladus": ENCELADUS,
+    "leo": LOW_EARTH_ORBIT,
+}
+CASES = {
+    "nothing": case_flags.NOTHING,
+    "heaters": case_flags.BASELINE_WITH_HEATERS,
+    "louvers": case_flags.NOTHING_WITH_RADIATORS_AND_LOUVERS,
+    "final design": case_flags.FINAL_DESIGN_ELEC_ON,
+}
+
+
+def _imbalance(settings, environment, flags):
+    # J, (N, T) heat flow terms against C dT per component, and their scale
+    arrays = compile_for(get_srs(flags), flags, settings)
+    sol = integrate(arrays, environment, settings)
+    energy = integrate_heat_flows(sol, arrays, environment)
+
+    temps = sol.y[: arrays.num_components]
+    stored = arrays.thermal_inertia[:, None] * (temps - temps[:, :1])
+    return energy.sum(axis=0) - stored, np.abs(energy).max(axis=(0, 2))
+
+
+@pytest.mark.parametrize("case", CASES)
+@pytest.mark.parametrize("environment", ENVIRONMENTS)
+def test_default_settings_balance_every_component(environment, case):
+    # RK45 with hard switches, the steps are replayed
+    imbalance, scale = _imbalance(
+        SolverSettings(t_end=2e5), ENVIRONMENTS[environment], CASES[case]
+    )
+
+    assert np.all(np.abs(imbalance) <= 1e-9 * scale[:, None] + 1e-6)
+
+
+# DOP853's first trial step goes non-finite before it is rejected
+@pytest.mark.filterwarnings("ignore:invalid value:RuntimeWarning")
+@pytest.mark.parametrize("method", ["RK23", "DOP853"])
+def test_other_runge_kutta_methods_balance(method):
+    imbalance, scale = _imbalance(
+        SolverSettings(method=method, t_end=2e5), EARTH, CASES["heaters"]
+    )
+
+    assert np.all(np.abs(imbalance) <= 1e-9 * scale[:, None] + 1e-6)
+
+
+def test_step_cut_by_equilibrium_balances_to_local_error():
+    settings = SolverSettings(t_end=1e7, rtol=1e-6, atol=1e-6, equilibrium_rate=1e-5)
+    imbalance, scale = _imbalance(settings, EARTH, CASES["nothing"])
+
+    assert np.all(np.abs(imbalance[:, :-1]) <= 1e-9 * scale[:, None] + 1e-6)
+    assert np.all(np.abs(imbalance[:, -1]) <= 1e-4 * scale)
+
+
+@pytest.mark.parametrize("event_driven", [False, True])
+def test_quadrature_balances_to_local_error(event_driven):
+    # Implicit steps are integrated by quadrature of the dense output
+    settings = SolverSettings(
+        method="BDF", t_end=2e5, rtol=1e-6, atol=1e-6, event_driven=event_driven
+    )
+    imbalance, scale = _imbalance(settings, EARTH, CASES["heaters"])
+
+    assert np.all(np.abs(imbalance[:, -1]) <= 1e-2 * scale)
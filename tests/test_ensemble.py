@@ -0,0 +1,40 @@
+import numpy as np
+from scipy.integrate import solve_ivp
+
+import case_flags
+from array_architecture import compile_architecture
+from ensemble import compile_ensemble, integrate_ensemble
+from environmental_prefabs import EARTH
+from odes import thermal_ode_vectorized
+from spacecraft_prefabs import get_srs
+
+# Wide ramps keep the explicit reference runs from chattering
+SMOOTHING = 1.0
+TOLERANCES = {"rtol": 1e-5, "atol": 1e-5}
+
+
+def test_ensemble_matches_per_member_runs():
+    members = list(case_flags.HEATER_RHU_TRADE_CASES.values())[:4]
+    t_eval = np.linspace(0, 5e4, 11)
+
+    result = integrate_ensemble(
+        compile_ensemble([get_srs(flags) for flags in members], members, SMOOTHING),
+        EARTH,
+        t_end=t_eval[-1],
+        t_eval=t_eval,
+        **TOLERANCES,
+    )
+
+    assert result.success.all()
+    for member, flags in enumerate(members):
+        arrays = compile_architecture(get_srs(flags), flags, switch_smoothing=SMOOTHING)
+        sol = solve_ivp(
+            thermal_ode_vectorized,
+            (0, t_eval[-1]),
+            arrays.initial_temps,
+            args=(arrays, EARTH),
+            t_eval=t_eval,
+            **TOLERANCES,
+        )
+
+        np.testing.assert_allclose(result.y[member], sol.y, atol=0.05)
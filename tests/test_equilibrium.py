@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+import case_flags
+from environmental_prefabs import EARTH, ENCELADUS
+from equilibrium import EquilibriumDetector, slowest_time_constant
+from solver import SolverSettings, compile_for, integrate
+from spacecraft_prefabs import get_srs
+
+RATE = 1e-5  # K/s
+WINDOW = 1e5  # s
+
+
+def _arrays(settings=None):
+    flags = case_flags.NOTHING
+    return compile_for(get_srs(flags), flags, settings or SolverSettings())
+
+
+@pytest.mark.parametrize("tau", [2e4, 1e5])
+def test_detector_stops_where_the_drift_falls_below_the_rate(tau):
+    # Every component relaxes exponentially, so the rate falls below the
+    # threshold at t* = tau * ln(amplitude / (rate * tau))
+    arrays = _arrays()
+    amplitude = 50.0
+    detector = EquilibriumDetector(arrays, EARTH, RATE, 0.01, WINDOW)
+
+    for t in np.arange(0, 1e7, 100.0):
+        y = 250 + amplitude * np.exp(-t / tau) * np.ones(arrays.num_components)
+        if detector(t, y) <= 0:
+            break
+
+    crossing = tau * np.log(amplitude / (RATE * tau))
+    assert detector.t_equilibrium is not None
+    assert abs(detector.t_equilibrium - crossing) <= detector.block_length
+    # The settled window spans the spacecraft's own slowest time constant
+    slowest = slowest_time_constant(arrays, EARTH, np.full(arrays.num_components, 250))
+    assert detector.settled_window >= max(WINDOW, slowest)
+    assert detector.settled_window < max(WINDOW, slowest) + 2 * detector.block_length
+    assert t == pytest.approx(detector.t_end, abs=100)
+
+
+def test_slowest_time_constant():
+    arrays = _arrays()
+
+    # The propellant tanks: 2.5e6 J/K on 10 W/K, and slower when cold
+    assert slowest_time_constant(arrays, EARTH) > 2.5e5
+    cold = np.full(arrays.num_components, 150.0)
+    assert slowest_time_constant(arrays, EARTH, cold) > slowest_time_constant(
+        arrays, EARTH
+    )
+
+
+@pytest.mark.parametrize("environment", [EARTH, ENCELADUS], ids=lambda e: e.name)
+def test_integration_stops_after_the_slowest_time_constant(environment):
+    settings = SolverSettings(
+        method="BDF", event_driven=True, t_end=1e8, equilibrium_rate=RATE
+    )
+    arrays = _arrays(settings)
+    sol = integrate(arrays, environment, settings)
+
+    assert sol.t_equilibrium is not None
+    assert sol.t[-1] < settings.t_end
+    tau = slowest_time_constant(arrays, environment, sol.y[: arrays.num_components, -1])
+    assert sol.t[-1] - sol.t_equilibrium >= max(WINDOW, 0.9 * tau)
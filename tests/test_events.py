@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+import case_flags
+from environmental_prefabs import EARTH, ENCELADUS, VENUS
+from solver import SolverSettings, compile_for, integrate
+from spacecraft_prefabs import get_srs
+
+ENVIRONMENTS = {"earth": EARTH, "venus": VENUS, "enceladus": ENCELADUS}
+CASES = {
+    "heaters": case_flags.BASELINE_WITH_HEATERS,
+    "louvers": case_flags.NOTHING_WITH_RADIATORS_AND_LOUVERS,
+    "final design": case_flags.FINAL_DESIGN_ELEC_ON,
+}
+TOLERANCES = {"t_end": 2e5, "rtol": 1e-6, "atol": 1e-6}
+
+
+def _final_temps(flags, environment, settings):
+    arrays = compile_for(get_srs(flags), flags, settings)
+    sol = integrate(arrays, environment, settings)
+
+    assert sol.success
+    assert np.all(np.diff(sol.t) > 0)
+    return sol, sol.y[: arrays.num_components, -1]
+
+
+@pytest.mark.parametrize("environment", ENVIRONMENTS)
+@pytest.mark.parametrize("case", CASES)
+def test_event_driven_matches_narrow_smoothing(environment, case):
+    environment = ENVIRONMENTS[environment]
+    sol, event_driven = _final_temps(
+        CASES[case],
+        environment,
+        SolverSettings(method="BDF", event_driven=True, **TOLERANCES),
+    )
+    _, smoothed = _final_temps(
+        CASES[case],
+        environment,
+        SolverSettings(method="BDF", switch_smoothing=0.01, **TOLERANCES),
+    )
+
+    # Switching events actually happened, in order
+    assert len(sol.t_switches) > 0
+    assert np.all(np.diff(sol.t_switches) >= 0)
+    np.testing.assert_allclose(event_driven, smoothed, atol=0.05)
@@ -0,0 +1,36 @@
+import numpy as np
+
+from array_architecture import compile_architecture
+from case_flags import FINAL_DESIGN_ELEC_ON
+from heat_transfer import radiative_exchange_fluxes
+from spacecraft_prefabs import get_srs, view_factor_pairs
+
+
+def _arrays(sparse=False):
+    case_flags = FINAL_DESIGN_ELEC_ON
+    return compile_architecture(
+        get_srs(case_flags, view_factor_pairs), case_flags, sparse=sparse
+    )
+
+
+def test_radiative_exchange_conserves_energy():
+    rng = np.random.default_rng(0)
+    temps = rng.uniform(150, 350, (4, 8))
+
+    for sparse in (False, True):
+        arrays = _arrays(sparse)
+        fluxes = radiative_exchange_fluxes(temps, arrays)
+
+        # Whatever one component radiates to another, that one absorbs
+        np.testing.assert_allclose(fluxes.sum(axis=-1), 0, atol=1e-9)
+        np.testing.assert_allclose(
+            radiative_exchange_fluxes(np.full(8, 250.0), arrays), 0, atol=1e-9
+        )
+
+
+def test_view_factors_are_reciprocal():
+    arrays = _arrays()
+    exchange_areas = arrays.rad_area[:, None] * arrays.view_factors
+
+    np.testing.assert_allclose(exchange_areas, exchange_areas.T)
+    assert np.all(arrays.view_factors.sum(axis=-1) <= 1)
@@ -0,0 +1,53 @@
+import numpy as np
+
+from monte_carlo import TemperatureHistogram
+
+PERCENTILES = [1, 5, 25, 50, 75, 95, 99]
+
+
+def _samples(seed=0):
+    # (M, N, T) temperatures spread over a few hundred bins
+    rng = np.random.default_rng(seed)
+    return 280 + 15 * rng.standard_normal((4000, 3, 5))
+
+
+def test_percentiles_match_numpy():
+    temps = _samples()
+    histogram = TemperatureHistogram.empty(3, 5, low=200.0, high=400.0)
+    histogram.add(temps)
+
+    # The histogram ranks by q * M like the inverted CDF, so the sample at that
+    # rank lies in the bin the percentile is interpolated in
+    np.testing.assert_allclose(
+        histogram.percentiles(PERCENTILES),
+        np.percentile(temps, PERCENTILES, axis=0, method="inverted_cdf"),
+        atol=histogram.resolution,
+    )
+    np.testing.assert_allclose(histogram.mean, temps.mean(axis=0))
+    assert histogram.num_out_of_range == 0
+
+
+def test_merged_chunks_match_one_histogram():
+    temps = _samples(1)
+    whole = TemperatureHistogram.empty(3, 5, low=200.0, high=400.0)
+    whole.add(temps)
+
+    merged = TemperatureHistogram.empty(3, 5, low=200.0, high=400.0)
+    for chunk in np.array_split(temps, 7):
+        part = TemperatureHistogram.empty(3, 5, low=200.0, high=400.0)
+        part.add(chunk)
+        merged.merge(part)
+
+    np.testing.assert_array_equal(merged.counts, whole.counts)
+    np.testing.assert_array_equal(
+        merged.percentiles(PERCENTILES), whole.percentiles(PERCENTILES)
+    )
+
+
+def test_out_of_range_temperatures_are_counted():
+    histogram = TemperatureHistogram.empty(1, 1, low=200.0, high=400.0)
+    histogram.add(np.array([150.0, 300.0, 450.0])[:, None, None])
+
+    assert histogram.num_out_of_range == 2
+    assert histogram.minimum[0, 0] == 150 and histogram.maximum[0, 0] == 450
+    assert 300 <= histogram.percentiles(50)[0, 0, 0] <= 300 + histogram.resolution
@@ -0,0 +1,111 @@
+import numpy as np
+import pytest
+from scipy import sparse
+
+from array_architecture import compile_architecture
+from base_classes import PIDHeater, ProportionalHeater, VariableConductanceLink
+from case_flags import BASELINE_WITH_RADIATORS_AND_LOUVERS, FINAL_DESIGN_ELEC_ON
+from control import initial_state
+from environmental_prefabs import EARTH, LOW_EARTH_ORBIT
+from events import build_switching_surfaces, modes_from_sides
+from odes import thermal_jacobian, thermal_ode_vectorized
+from spacecraft_prefabs import get_srs, view_factor_pairs
+
+ENVIRONMENTS = {"earth": EARTH, "leo": LOW_EARTH_ORBIT}
+
+
+def _spacecraft(case_flags, view_factors=False, controlled=False):
+    spacecraft = get_srs(case_flags, view_factor_pairs if view_factors else None)
+
+    if controlled:
+        # Structure <-> Electronics as a heat pipe, and control laws on the
+        # electronics and solar array heaters
+        links = spacecraft.conductivity_matrix
+        links[1][2] = links[2][1] = VariableConductanceLink(
+            conductance=20, min_conductance=2, low_temp=250, high_temp=300
+        )
+        components = spacecraft.components
+        components[2].heater = PIDHeater(
+            power=100, set_temp=293, gain=0.2, integral_time=1e4, derivative_time=50
+        )
+        components[3].heater = ProportionalHeater(power=100, set_temp=293, band=5)
+
+    return spacecraft
+
+
+def _finite_difference_jacobian(t, y, arrays, environment, modes, step=1e-4):
+    columns = []
+    for j in range(len(y)):
+        offset = np.zeros_like(y)
+        offset[j] = step
+        columns.append(
+            (
+                thermal_ode_vectorized(t, y + offset, arrays, environment, modes)
+                - thermal_ode_vectorized(t, y - offset, arrays, environment, modes)
+            )
+            / (2 * step)
+        )
+
+    return np.stack(columns, axis=-1)
+
+
+def _dense(jacobian):
+    return jacobian.toarray() if sparse.issparse(jacobian) else jacobian
+
+
+@pytest.mark.parametrize("environment", ENVIRONMENTS)
+@pytest.mark.parametrize("smoothing", [0.0, 0.1, 1.0])
+@pytest.mark.parametrize("sparse_links", [False, True])
+@pytest.mark.parametrize("view_factors", [False, True])
+@pytest.mark.parametrize("controlled", [False, True])
+def test_jacobian_matches_finite_differences(
+    environment, smoothing, sparse_links, view_factors, controlled
+):
+    case_flags = FINAL_DESIGN_ELEC_ON
+    arrays = compile_architecture(
+        _spacecraft(case_flags, view_factors, controlled),
+        case_flags,
+        sparse=sparse_links,
+        switch_smoothing=smoothing,
+    )
+    environment = ENVIRONMENTS[environment]
+
+    # Spread the temperatures over the heater, louver and switch thresholds
+    rng = np.random.default_rng(0)
+    y = initial_state(arrays)
+    for _ in range(5):
+        y[: arrays.num_components] = arrays.initial_temps + rng.normal(
+            0, 30, arrays.num_components
+        )
+        t = rng.uniform(0, 1e4)
+
+        analytic = _dense(thermal_jacobian(t, y, arrays, environment))
+        numeric = _finite_difference_jacobian(t, y, arrays, environment, None)
+
+        np.testing.assert_allclose(
+            analytic, numeric, rtol=1e-5, atol=1e-6 * np.abs(numeric).max()
+        )
+
+
+@pytest.mark.parametrize("environment", ENVIRONMENTS)
+@pytest.mark.parametrize("sparse_links", [False, True])
+def test_jacobian_with_frozen_modes(environment, sparse_links):
+    case_flags = BASELINE_WITH_RADIATORS_AND_LOUVERS
+    arrays = compile_architecture(
+        _spacecraft(case_flags, view_factors=True), case_flags, sparse=sparse_links
+    )
+    environment = ENVIRONMENTS[environment]
+    surfaces = build_switching_surfaces(arrays, environment)
+
+    rng = np.random.default_rng(1)
+    for _ in range(5):
+        temps = arrays.initial_temps + rng.normal(0, 30, arrays.num_components)
+        sides = rng.uniform(0, 1, len(surfaces.nodes))
+        modes = modes_from_sides(sides, surfaces, arrays, environment)
+
+        analytic = _dense(thermal_jacobian(0.0, temps, arrays, environment, modes))
+        numeric = _finite_difference_jacobian(0.0, temps, arrays, environment, modes)
+
+        np.testing.assert_allclose(
+            analytic, numeric, rtol=1e-5, atol=1e-6 * np.abs(numeric).max()
+        )
@@ -0,0 +1,89 @@
+import numpy as np
+
+from array_architecture import compile_architecture
+from case_flags import FINAL_DESIGN_ELEC_ON
+from compiled_ode import CompiledODE
+from environmental_prefabs import LEO_PLANET_VIEW_FACTORS, LOW_EARTH_ORBIT
+from heat_transfer import incident_radiation_fluxes
+from orbit import orbit_environment
+from spacecraft_prefabs import get_srs
+
+SOLAR_FLUX, PERIOD, ECLIPSE, ALBEDO, PLANET_IR = 1400, 5520, 0.38, 0.3, 237
+
+
+def _direct_flux(t, illumination_factor):
+    # W/m^2, the orbit's flux evaluated straight from its definition
+    phase = np.mod(t, PERIOD)[..., None] / PERIOD
+    in_sun = np.abs(phase - 0.5) >= ECLIPSE / 2
+    albedo = SOLAR_FLUX * ALBEDO * np.maximum(np.cos(2 * np.pi * phase), 0)
+    return SOLAR_FLUX * illumination_factor * in_sun + LEO_PLANET_VIEW_FACTORS * (
+        albedo + PLANET_IR
+    )
+
+
+def test_prefab_matches_its_definition():
+    environment = orbit_environment(
+        "leo",
+        SOLAR_FLUX,
+        PERIOD,
+        num_components=8,
+        eclipse_fraction=ECLIPSE,
+        albedo=ALBEDO,
+        planet_ir_flux=PLANET_IR,
+        planet_view_factors=LEO_PLANET_VIEW_FACTORS,
+    )
+    np.testing.assert_array_equal(
+        environment.sun_fraction, LOW_EARTH_ORBIT.sun_fraction
+    )
+    np.testing.assert_array_equal(
+        environment.planetary_flux, LOW_EARTH_ORBIT.planetary_flux
+    )
+
+
+def test_table_flux_matches_direct_flux():
+    illumination_factor = np.linspace(0, 1, 8)
+    environment = LOW_EARTH_ORBIT
+
+    # Exact on the table's grid, over several orbits (up to the rounding of
+    # the times)
+    grid = environment.times + 3 * PERIOD
+    np.testing.assert_allclose(
+        environment.absorbed_flux(grid, illumination_factor),
+        _direct_flux(grid, illumination_factor),
+        atol=1e-6,
+    )
+
+    # Between the grid points, away from the eclipse edges, within the linear
+    # interpolation error of the albedo's cosine
+    t = np.random.default_rng(0).uniform(0, 5 * PERIOD, 1000)
+    phase = np.mod(t, PERIOD) / PERIOD
+    spacing = PERIOD / len(environment.times)
+    edges = 0.5 + np.array([-1, 1]) * ECLIPSE / 2
+    t = t[np.abs(phase[:, None] - edges).min(axis=1) * PERIOD > spacing]
+    curvature = SOLAR_FLUX * ALBEDO * (2 * np.pi / PERIOD) ** 2
+    np.testing.assert_allclose(
+        environment.absorbed_flux(t, illumination_factor),
+        _direct_flux(t, illumination_factor),
+        atol=curvature * spacing**2 / 8 + 1e-9,
+    )
+
+    # Scalar reads take the same table rows
+    for time in t[:20]:
+        np.testing.assert_allclose(
+            environment.absorbed_flux(time, illumination_factor),
+            _direct_flux(time, illumination_factor),
+            atol=curvature * spacing**2 / 8 + 1e-9,
+        )
+
+
+def test_compiled_incident_table_matches_direct_flux():
+    arrays = compile_architecture(get_srs(FINAL_DESIGN_ELEC_ON), FINAL_DESIGN_ELEC_ON)
+    ode = CompiledODE(arrays, LOW_EARTH_ORBIT)
+
+    for t in np.random.default_rng(1).uniform(0, 5 * PERIOD, 50):
+        np.testing.assert_allclose(
+            ode._incident_at(t),
+            incident_radiation_fluxes(arrays, LOW_EARTH_ORBIT, t),
+            rtol=1e-12,
+            atol=1e-12,
+        )
@@ -0,0 +1,83 @@
+import dataclasses
+from functools import partial
+
+import numpy as np
+import pytest
+
+import case_flags
+from cache import architecture_key
+from environmental_prefabs import EARTH
+from parametric import compile_parametric
+from shared_sweep import run_shared
+from solver import SolverSettings, compile_for
+from spacecraft_prefabs import get_srs, view_factor_pairs
+from sweep import run_sweep
+
+# Every case of every trade study, in one parametric architecture
+ALL_CASES = [
+    flags
+    for name in dir(case_flags)
+    if name.endswith("_CASES")
+    for flags in getattr(case_flags, name).values()
+]
+SETTINGS = {
+    "explicit": SolverSettings(),
+    "implicit sparse": SolverSettings(method="BDF", sparse=True),
+    "event-driven": SolverSettings(method="BDF", event_driven=True),
+}
+
+
+@pytest.mark.parametrize("settings", SETTINGS)
+@pytest.mark.parametrize("view_factors", [False, True])
+def test_case_matches_full_compile(settings, view_factors):
+    settings = SETTINGS[settings]
+    pairs = view_factor_pairs if view_factors else None
+    get_spacecraft = partial(get_srs, view_factor_pairs=pairs)
+    parametric = compile_parametric(ALL_CASES, settings, get_spacecraft)
+
+    assert parametric.num_cases == len(ALL_CASES)
+    for i, flags in enumerate(ALL_CASES):
+        expected = compile_for(get_spacecraft(flags), flags, settings)
+        assert architecture_key(parametric.case(i)) == architecture_key(expected)
+
+
+def test_case_overrides():
+    settings = SolverSettings()
+    parametric = compile_parametric(ALL_CASES, settings)
+    emissivity = np.linspace(0.1, 0.8, parametric.topology.num_components)
+
+    overridden = parametric.case(3, {"emissivity": emissivity})
+
+    expected = compile_for(get_srs(ALL_CASES[3]), ALL_CASES[3], settings)
+    expected = dataclasses.replace(expected, emissivity=emissivity)
+    assert architecture_key(overridden) == architecture_key(expected)
+
+
+def test_check_settings():
+    parametric = compile_parametric(ALL_CASES, SolverSettings())
+
+    parametric.check_settings(SolverSettings(method="RK23"))
+    parametric.check_settings(SolverSettings(method="BDF", event_driven=True))
+    with pytest.raises(ValueError):
+        parametric.check_settings(SolverSettings(method="BDF"))
+    with pytest.raises(ValueError):
+        parametric.check_settings(SolverSettings(sparse=True))
+
+
+def test_shared_sweep_matches_process_sweep():
+    cases = dict(list(case_flags.HEATER_RHU_TRADE_CASES.items())[4:7])
+    t_eval = tuple(np.linspace(0, 2e4, 11))
+    settings = SolverSettings(t_end=2e4, t_eval=t_eval)
+
+    shared = run_shared(
+        compile_parametric(list(cases.values()), settings), EARTH, max_workers=2
+    )
+    swept = {
+        result.case_name: result
+        for result in run_sweep([EARTH], cases, settings, max_workers=2)
+    }
+
+    assert all(task.success for task in shared.tasks)
+    np.testing.assert_allclose(shared.t, t_eval)
+    for temps, name in zip(shared.temps, cases):
+        np.testing.assert_allclose(temps, swept[name].y[: len(temps)], rtol=1e-9)
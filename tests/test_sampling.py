@@ -0,0 +1,67 @@
+import dataclasses
+
+import numpy as np
+import pytest
+
+import case_flags
+from energy import integrate_heat_flows
+from environmental_prefabs import EARTH
+from sampling import interpolate_samples, sample_solution, simplify
+from solver import SolverSettings, compile_for, integrate
+from spacecraft_prefabs import get_srs
+
+SETTINGS = SolverSettings(t_end=2e5, t_eval=np.linspace(0, 2e5, 2001))
+
+
+def _solve(settings):
+    flags = case_flags.NOTHING
+    arrays = compile_for(get_srs(flags), flags, settings)
+    sol = integrate(arrays, EARTH, settings)
+    energy = integrate_heat_flows(sol, arrays, EARTH)
+
+    return sol, energy, arrays
+
+
+@pytest.mark.parametrize("tolerance", [0.01, 0.1, 1.0])
+def test_simplified_output_within_tolerance(tolerance):
+    sol, energy, arrays = _solve(SETTINGS)
+    full = sample_solution(sol, energy, arrays, EARTH, SETTINGS)
+    settings = dataclasses.replace(SETTINGS, output_tolerance=tolerance)
+    reduced = sample_solution(sol, energy, arrays, EARTH, settings)
+
+    assert len(reduced.t) < len(full.t)
+    assert reduced.t[0] == full.t[0] and reduced.t[-1] == full.t[-1]
+    temps = arrays.num_components
+    error = np.abs(interpolate_samples(reduced.t, reduced.y, full.t) - full.y)
+    assert error[:temps].max() <= tolerance
+    # Kept samples are unchanged
+    np.testing.assert_array_equal(reduced.y, full.y[:, np.isin(full.t, reduced.t)])
+
+
+def test_simplify_keeps_corners():
+    t = np.linspace(0, 4, 401)
+    values = np.abs(t - 2)[None]
+
+    kept = simplify(t, values, 1e-9)
+    np.testing.assert_array_equal(t[kept], [0, 2, 4])
+    assert set(simplify(t, values, 1e-9, keep=np.array([100]))) == {0, 100, 200, 400}
+
+
+def test_output_windows_bracket_the_mean():
+    settings = dataclasses.replace(SETTINGS, t_eval=None, output_window=1e4)
+    sol, energy, arrays = _solve(settings)
+    sampled = sample_solution(sol, energy, arrays, EARTH, settings)
+
+    assert len(sampled.t) == 20
+    minimum, maximum = sampled.envelope
+    temps = sampled.y[: arrays.num_components]
+    assert np.all(minimum <= temps + 1e-9) and np.all(temps <= maximum + 1e-9)
+
+    with pytest.raises(ValueError):
+        sample_solution(
+            sol,
+            energy,
+            arrays,
+            EARTH,
+            dataclasses.replace(settings, output_tolerance=0.1),
+        )
@@ -0,0 +1,71 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pytest
+
+import case_flags
+from base_classes import EnvironmentalConditions
+from energy import EnergyAccount, integrate_heat_flows
+from environmental_prefabs import EARTH, ENCELADUS, LOW_EARTH_ORBIT, VENUS
+from solver import SolverSettings, compile_for, integrate
+from spacecraft_prefabs import get_srs
+from steady_state import solve_steady_state
+
+# Cases whose transient has settled by `LONG_TRANSIENT.t_end`, with and without
+# components held on a heater, louver or switch threshold; weakly coupled
+# propellant tanks are still drifting there in some of the others
+SETTLED_CASES = [
+    (EARTH, case_flags.NOTHING),
+    (EARTH, case_flags.BASELINE_WITH_HEATERS),
+    (VENUS, case_flags.RADIATOR_LOUVER_BASELINE),
+    (VENUS, case_flags.INSULATION_AND_PAINT_BASELINE),
+    (ENCELADUS, case_flags.BASELINE_WITH_HEATERS),
+]
+LONG_TRANSIENT = SolverSettings(
+    method="BDF", t_end=1e8, rtol=1e-6, atol=1e-6, event_driven=True
+)
+
+
+@pytest.mark.parametrize("environment, flags", SETTLED_CASES)
+def test_newton_matches_long_transient(environment, flags):
+    arrays = compile_for(get_srs(flags), flags, LONG_TRANSIENT)
+
+    result = solve_steady_state(arrays, environment)
+    sol = integrate(arrays, environment, LONG_TRANSIENT)
+    powers = EnergyAccount(
+        sol.t, integrate_heat_flows(sol, arrays, environment)
+    ).summary_powers()
+
+    assert result.method == "newton"
+    np.testing.assert_allclose(
+        result.temps, sol.y[: arrays.num_components, -1], atol=1e-3
+    )
+    np.testing.assert_allclose(result.powers, powers, rtol=1e-2, atol=1e-2)
+
+
+def test_orbit_is_solved_with_averaged_fluxes():
+    flags = case_flags.NOTHING
+    arrays = compile_for(get_srs(flags), flags, LONG_TRANSIENT)
+    settings = SolverSettings(method="BDF", t_end=1e7, rtol=1e-6, atol=1e-6)
+
+    result = solve_steady_state(arrays, LOW_EARTH_ORBIT)
+    sol = integrate(arrays, LOW_EARTH_ORBIT.averaged(), settings)
+
+    assert result.method == "newton"
+    np.testing.assert_allclose(
+        result.temps, sol.y[: arrays.num_components, -1], atol=1e-2
+    )
+
+
+@dataclass
+class _Flicker(EnvironmentalConditions):
+    def absorbed_flux(self, t, illumination_factor):
+        return super().absorbed_flux(t, illumination_factor) * (1 + np.sin(t))
+
+
+def test_other_time_varying_environments_raise():
+    flags = case_flags.NOTHING
+    arrays = compile_for(get_srs(flags), flags, LONG_TRANSIENT)
+
+    with pytest.raises(ValueError):
+        solve_steady_state(arrays, _Flicker("flicker", 1361, 2.7))
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+import case_flags
+from environmental_prefabs import EARTH, LOW_EARTH_ORBIT
+from odes import HEAT_FLOW_TERMS
+from solver import SolverSettings
+from spacecraft_prefabs import get_srs
+from store import ENERGY_CHANNELS, ResultStore
+from sweep import solve
+
+
+# The orbit environment's flux tables are stored as lists
+@pytest.mark.parametrize("environment", [EARTH, LOW_EARTH_ORBIT], ids=lambda e: e.name)
+def test_round_trip(tmp_path, environment):
+    flags = case_flags.BASELINE_WITH_HEATERS
+    settings = SolverSettings(t_end=1e4)
+    result = solve(get_srs(flags), flags, "round_trip", environment, settings)
+    store = ResultStore(tmp_path)
+    store.write(result)
+
+    name = result.output_name
+    assert store.names() == [name]
+    np.testing.assert_array_equal(store.load(name, "t"), result.t)
+    np.testing.assert_array_equal(store.load(name, "temperature"), result.temps)
+    for term, channel, energy in zip(HEAT_FLOW_TERMS, ENERGY_CHANNELS, result.energy):
+        np.testing.assert_array_equal(store.load(name, term), result.heat_flows[term])
+        np.testing.assert_array_equal(store.load(name, channel), energy)
+
+    # One component's row, by index or name
+    electronics = result.component_names.index("Electronics")
+    np.testing.assert_array_equal(
+        store.load(name, "temperature", "Electronics"), result.temps[electronics]
+    )
+    [(series_name, t, temps)] = store.series("temperature", electronics)
+    assert series_name == name
+    np.testing.assert_array_equal(temps, result.temps[electronics])
+
+    metadata = store.metadata(name)
+    assert metadata["case_flags"] == flags
+    assert metadata["component_names"] == list(result.component_names)
+    assert metadata["num_samples"] == len(result.t)
+    np.testing.assert_allclose(
+        list(metadata["average_powers"].values()), result.average_powers
+    )